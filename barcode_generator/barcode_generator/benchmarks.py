@@ -0,0 +1,305 @@
+# Offline benchmarks for the parse -> render -> place pipeline.
+#
+# The document methods need a site, so each benchmark drives the same helpers
+# they call: parse_input_data reads rows through the tokenizer,
+# generate_barcode_image and add_item_name_to_image wrap render.py, and
+# create_pdf streams render_stream into place_labels. Nothing touches frappe or
+# the network, so the suite runs from a plain checkout:
+#
+#     python -m barcode_generator.barcode_generator.benchmarks [--quick] [--save]
+#
+# Each benchmark runs in a forked child, so it starts from the same memory
+# state and its peak resident memory can be read without tracing overhead
+# (tracemalloc slows ReportLab's pure Python encoders down twentyfold).
+#
+# Results are compared against the stored baseline JSON; a benchmark whose
+# throughput drops, or whose output grows, by more than the tolerance is
+# reported as a regression and the run exits with status 1.
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import traceback
+from dataclasses import asdict, dataclass
+
+from reportlab.pdfgen import canvas
+
+from barcode_generator.barcode_generator.layout import PAGE_SIZES, compute_layout
+from barcode_generator.barcode_generator.pdf_writer import place_labels
+from barcode_generator.barcode_generator.render import (
+    BARCODE_CLASSES,
+    MATRIX_TYPES,
+    RenderConfig,
+    add_item_name_to_image,
+    render_label,
+    render_stream,
+)
+from barcode_generator.barcode_generator.tokenizer import iter_rows, unique_codes
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+# Allowed slowdown (or output growth) against the baseline before a benchmark counts as a regression
+REGRESSION_TOLERANCE = 0.25
+
+# A valid code for every symbology
+SAMPLE_CODES = {
+    'Code128': "01192202500024",
+    'Code39': "CPVC-2500024",
+    'EAN13': "590123412345",
+    'EAN8': "9638507",
+    'UPC-A': "03600029145",
+    'ITF': "01192202500024",
+    'DataMatrix': "01192202500024",
+    'PDF417': "01192202500024",
+}
+
+SAMPLE_ITEM_NAME = "1/2 PIPE CPVC NIPRO"
+
+# Sizes per benchmark for full and --quick runs
+PARSE_SIZES = {False: (1000, 100000), True: (1000,)}
+PDF_SIZES = {False: (100, 1000, 10000), True: (100,)}
+RENDER_REPEAT = {False: 20, True: 5}
+
+# Benchmarks finishing faster than this are run again and the fastest run kept, to damp timer noise
+SHORT_RUN_SECONDS = 1.0
+SHORT_RUN_ATTEMPTS = 3
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    count: int
+    seconds: float
+    peak_bytes: int
+    output_bytes: int = 0
+
+    @property
+    def codes_per_sec(self):
+        return self.count / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {**asdict(self), "codes_per_sec": round(self.codes_per_sec, 1)}
+
+
+def measure(name, count, func, warmup=None):
+    """Time func in a forked child, recording wall time, peak memory growth and the output size it returns.
+
+    warmup runs in the child before the clock starts, so one-off costs such as
+    font loading don't skew short benchmarks. Short benchmarks are repeated and
+    the fastest run kept.
+    """
+    best = None
+    for _ in range(SHORT_RUN_ATTEMPTS):
+        result = _measure_once(name, count, func, warmup)
+        if best is None or result.seconds < best.seconds:
+            best = result
+        if result.seconds >= SHORT_RUN_SECONDS:
+            break
+    return best
+
+
+def _measure_once(name, count, func, warmup):
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if not pid:
+        # Child: report back through the pipe and never return into the caller's loop
+        os.close(read_fd)
+        status = 0
+        try:
+            if warmup:
+                warmup()
+            gc.collect()
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            output_bytes = func() or 0
+            seconds = time.perf_counter() - start
+            peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+            report = {"seconds": seconds, "peak_bytes": peak_kb * 1024, "output_bytes": output_bytes}
+        except Exception:
+            report = {"error": traceback.format_exc()}
+            status = 1
+        with os.fdopen(write_fd, 'w') as f:
+            json.dump(report, f)
+        os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+
+    report = json.loads(data) if data else {"error": "benchmark process died"}
+    if "error" in report:
+        raise RuntimeError(f"{name} failed:\n{report['error']}")
+    return BenchmarkResult(name, count, report["seconds"], report["peak_bytes"], report["output_bytes"])
+
+
+def make_input(count):
+    """Manual input text with count distinct "Item Name,Barcode" lines"""
+    return "\n".join(f"ITEM {i},{1192202500000 + i:014d}" for i in range(count))
+
+
+def bench_parse(sizes):
+    for count in sizes:
+        text = make_input(count)
+
+        def parse():
+            list(unique_codes(iter_rows(text)))
+
+        yield measure(f"parse_input_data[{count}]", count, parse)
+
+
+def bench_render(repeat):
+    for barcode_type in (*BARCODE_CLASSES, *MATRIX_TYPES):
+        for page_size in PAGE_SIZES:
+            config = RenderConfig(barcode_type=barcode_type, page_size=page_size)
+            code_text = SAMPLE_CODES[barcode_type]
+
+            def render_once():
+                _, error = render_label(config, code_text, SAMPLE_ITEM_NAME)
+                if error:
+                    raise RuntimeError(error)
+
+            def render():
+                for _ in range(repeat):
+                    render_once()
+
+            yield measure(f"generate_barcode_image[{barcode_type},{page_size}]", repeat, render, warmup=render_once)
+
+
+def bench_item_name(repeat):
+    for page_size in ('A4', 'Letter'):
+        config = RenderConfig(page_size=page_size)
+        img, _ = render_label(config, SAMPLE_CODES['Code128'])
+
+        def add_name():
+            add_item_name_to_image(config, img, SAMPLE_ITEM_NAME, SAMPLE_CODES['Code128'])
+
+        def add_names():
+            for _ in range(repeat):
+                add_name()
+
+        yield measure(f"add_item_name_to_image[{page_size}]", repeat, add_names, warmup=add_name)
+
+
+def bench_pdf(sizes, workers=1):
+    for render_mode in ('Raster', 'Bilevel'):
+        config = RenderConfig(render_mode=render_mode)
+        layout = compute_layout(config.page_size)
+        for count in sizes:
+            rows = [(f"ITEM {i}", f"{1192202500000 + i:014d}") for i in range(count)]
+
+            def create_pdf():
+                buffer = io.BytesIO()
+                c = canvas.Canvas(buffer, pagesize=layout.pagesize)
+                labels = (
+                    (item_name, code_text, img, 1)
+                    for item_name, code_text, img, _ in render_stream(config, rows, workers=workers)
+                )
+                place_labels(c, config, layout, labels)
+                c.save()
+                return buffer.tell()
+
+            # Raster keeps its original name so earlier baselines still apply
+            name = f"create_pdf[{count}]" if render_mode == 'Raster' else f"create_pdf[{render_mode},{count}]"
+            yield measure(name, count, create_pdf)
+
+
+def run(quick=False, workers=1, on_result=None):
+    """Run every benchmark and return the results"""
+    results = []
+    for benchmarks in (
+        bench_parse(PARSE_SIZES[quick]),
+        bench_render(RENDER_REPEAT[quick]),
+        bench_item_name(RENDER_REPEAT[quick] * 5),
+        bench_pdf(PDF_SIZES[quick], workers),
+    ):
+        for result in benchmarks:
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Regressions against baseline as (name, metric, baseline value, current value)"""
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        entry = previous.get(result.name)
+        # --quick runs fewer repeats; per-code rates are only compared like for like
+        if not entry or entry["count"] != result.count:
+            continue
+        if result.codes_per_sec < entry["codes_per_sec"] * (1 - tolerance):
+            regressions.append((result.name, "codes_per_sec", entry["codes_per_sec"], round(result.codes_per_sec, 1)))
+        if entry.get("output_bytes") and result.output_bytes > entry["output_bytes"] * (1 + tolerance):
+            regressions.append((result.name, "output_bytes", entry["output_bytes"], result.output_bytes))
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [result.as_dict() for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+
+
+def format_result(result, baseline_entry=None):
+    line = (
+        f"{result.name:<52} {result.seconds:>9.3f}s {result.codes_per_sec:>11.1f}/s "
+        f"{result.peak_bytes / 1024 / 1024:>8.1f}MB"
+    )
+    if result.output_bytes:
+        line += f" {result.output_bytes:>10}B"
+    if baseline_entry and baseline_entry.get("codes_per_sec"):
+        change = result.codes_per_sec / baseline_entry["codes_per_sec"] - 1
+        line += f"  ({change:+.0%} vs baseline)"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the barcode render and PDF pipeline")
+    parser.add_argument("--quick", action="store_true", help="small sizes only, for a fast check")
+    parser.add_argument("--workers", type=int, default=1, help="render processes for create_pdf")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    results = run(
+        quick=args.quick,
+        workers=args.workers,
+        on_result=lambda result: print(format_result(result, previous.get(result.name)), flush=True)
+    )
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, before, after in regressions:
+        print(f"REGRESSION {name}: {metric} {before} -> {after}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
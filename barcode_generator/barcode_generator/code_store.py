@@ -0,0 +1,101 @@
+# Compact on-disk store of parsed codes.
+#
+# Rows are kept as a gzip stream of JSON lines, one columnar block per line:
+# {"i": [item names], "c": [codes], "q": [quantities]}. Further blocks can be
+# appended as extra gzip members without rewriting what is already stored.
+# A 64-bit key per item/code pair is kept in a ".keys" file next to the store,
+# so appends can be deduplicated without reading the rows back.
+
+import gzip
+import hashlib
+import json
+import os
+from array import array
+from itertools import islice
+
+# Rows per stored block
+BLOCK_SIZE = 5000
+
+
+def write_codes(path, codes):
+    """Store (item_name, code, qty) rows at path, replacing it atomically; returns (rows, labels)"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    keys = array('Q')
+    with gzip.open(tmp_path, 'wb', compresslevel=5) as f:
+        counts = _write_blocks(f, codes, keys)
+    with open(f"{tmp_path}.keys", 'wb') as f:
+        keys.tofile(f)
+    os.replace(f"{tmp_path}.keys", get_keys_path(path))
+    os.replace(tmp_path, path)
+    return counts
+
+
+def append_codes(path, codes):
+    """Add rows to the end of the store as a new gzip member; returns (rows, labels) added"""
+    keys = array('Q')
+    with gzip.open(path, 'ab', compresslevel=5) as f:
+        counts = _write_blocks(f, codes, keys)
+    with open(get_keys_path(path), 'ab') as f:
+        keys.tofile(f)
+    return counts
+
+
+def new_codes(path, codes):
+    """Rows whose item/code pair is neither stored at path nor repeated earlier in codes"""
+    seen = read_keys(path)
+    fresh = []
+    for item_name, code_text, qty in codes:
+        key = row_key(item_name, code_text)
+        if key not in seen:
+            seen.add(key)
+            fresh.append((item_name, code_text, qty))
+    return fresh
+
+
+def row_key(item_name, code_text):
+    digest = hashlib.blake2b(f"{item_name}\x1f{code_text}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def read_keys(path):
+    """Keys of the rows stored at path"""
+    keys_path = get_keys_path(path)
+    if not os.path.exists(keys_path):
+        return set()
+    keys = array('Q')
+    with open(keys_path, 'rb') as f:
+        keys.frombytes(f.read())
+    return set(keys)
+
+
+def get_keys_path(path):
+    return f"{path}.keys"
+
+
+def iter_codes(path):
+    """Yield the stored (item_name, code, qty) rows in order"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            block = json.loads(line)
+            yield from zip(block["i"], block["c"], block["q"], strict=True)
+
+
+def read_sample(path, size):
+    """First size stored rows"""
+    return list(islice(iter_codes(path), size))
+
+
+def _write_blocks(f, codes, keys):
+    rows = labels = 0
+    codes = iter(codes)
+    while True:
+        block = list(islice(codes, BLOCK_SIZE))
+        if not block:
+            return rows, labels
+
+        items, code_texts, quantities = zip(*block, strict=True)
+        line = json.dumps({"i": items, "c": code_texts, "q": quantities}, ensure_ascii=False, separators=(',', ':'))
+        f.write(line.encode('utf-8') + b"\n")
+        keys.extend(row_key(item_name, code_text) for item_name, code_text in zip(items, code_texts, strict=True))
+        rows += len(block)
+        labels += sum(quantities)
@@ -0,0 +1,307 @@
+# Data Matrix (ECC 200) encoder producing module rows.
+#
+# Text is packed with ASCII encodation (two digits share a codeword), the
+# smallest square symbol that holds it is chosen, Reed-Solomon error
+# correction is added per interleaved block and the codewords are laid out
+# with the standard diagonal placement. Everything that depends only on the
+# symbol size (the size lookup, generator polynomials and the finished module
+# placement map) is computed once and cached, so fixed-length codes only pay
+# for packing and error correction.
+
+from dataclasses import dataclass
+from functools import cache
+
+# Light modules around the symbol; the standard asks for at least one
+QUIET_ZONE = 2
+
+PAD = 129
+UPPER_SHIFT = 235
+
+
+@dataclass(frozen=True)
+class SymbolSize:
+    """One square ECC 200 symbol size"""
+    size: int
+    region_size: int
+    regions: int
+    data_codewords: int
+    ecc_codewords: int
+    blocks: int
+
+    @property
+    def mapping_size(self):
+        # Data modules per side once the finder patterns are left out
+        return self.region_size * self.regions
+
+
+# size, data region size, regions per side, data codewords, error correction codewords, interleaved blocks
+SYMBOL_SIZES = tuple(SymbolSize(*row) for row in (
+    (10, 8, 1, 3, 5, 1),
+    (12, 10, 1, 5, 7, 1),
+    (14, 12, 1, 8, 10, 1),
+    (16, 14, 1, 12, 12, 1),
+    (18, 16, 1, 18, 14, 1),
+    (20, 18, 1, 22, 18, 1),
+    (22, 20, 1, 30, 20, 1),
+    (24, 22, 1, 36, 24, 1),
+    (26, 24, 1, 44, 28, 1),
+    (32, 14, 2, 62, 36, 1),
+    (36, 16, 2, 86, 42, 1),
+    (40, 18, 2, 114, 48, 1),
+    (44, 20, 2, 144, 56, 1),
+    (48, 22, 2, 174, 68, 1),
+    (52, 24, 2, 204, 84, 2),
+    (64, 14, 4, 280, 112, 2),
+    (72, 16, 4, 368, 144, 4),
+    (80, 18, 4, 456, 192, 4),
+    (88, 20, 4, 576, 224, 4),
+    (96, 22, 4, 696, 272, 4),
+    (104, 24, 4, 816, 336, 6),
+    (120, 18, 6, 1050, 408, 6),
+    (132, 20, 6, 1304, 496, 8),
+    (144, 22, 6, 1558, 620, 10),
+))
+
+
+def _galois_tables():
+    """Exponent and log tables of GF(256) with the Data Matrix polynomial x^8 + x^5 + x^3 + x^2 + 1"""
+    exp = [0] * 510
+    log = [0] * 256
+    value = 1
+    for power in range(255):
+        exp[power] = exp[power + 255] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= 0x12D
+    return exp, log
+
+
+EXP, LOG = _galois_tables()
+
+
+def encode_datamatrix(text):
+    """Module rows ('1' dark, '0' light) of the smallest square symbol holding text, quiet zone included"""
+    data = encode_ascii(text)
+    size = symbol_size_for(len(data))
+    codewords = add_error_correction(pad_codewords(data, size.data_codewords), size)
+
+    template, width, placement = _symbol_layout(size)
+    cells = bytearray(template)
+    for index, position, mask in placement:
+        if codewords[position] & mask:
+            cells[index] = 49  # '1'
+    return tuple(cells[start:start + width].decode('ascii') for start in range(0, len(cells), width))
+
+
+def encode_ascii(text):
+    """Codewords for text in ASCII encodation"""
+    try:
+        data = str(text).encode('latin-1')
+    except UnicodeEncodeError:
+        raise ValueError("Data Matrix can only encode Latin-1 text")
+
+    codewords = []
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if 48 <= byte <= 57 and i + 1 < len(data) and 48 <= data[i + 1] <= 57:
+            # Digit pair
+            codewords.append(130 + (byte - 48) * 10 + data[i + 1] - 48)
+            i += 2
+            continue
+        if byte > 127:
+            codewords.append(UPPER_SHIFT)
+            byte -= 128
+        codewords.append(byte + 1)
+        i += 1
+    return codewords
+
+
+@cache
+def symbol_size_for(data_count):
+    """Smallest symbol with room for data_count codewords"""
+    for size in SYMBOL_SIZES:
+        if size.data_codewords >= data_count:
+            return size
+    raise ValueError("Text is too long for a Data Matrix symbol")
+
+
+def pad_codewords(codewords, capacity):
+    """Fill the symbol's remaining data capacity with (randomised) pad codewords"""
+    padded = list(codewords)
+    if len(padded) < capacity:
+        padded.append(PAD)
+    while len(padded) < capacity:
+        value = PAD + (149 * (len(padded) + 1)) % 253 + 1
+        padded.append(value - 254 if value > 254 else value)
+    return padded
+
+
+def add_error_correction(data, size):
+    """Data codewords followed by the interleaved Reed-Solomon codewords of each block"""
+    blocks = size.blocks
+    generator = _generator(size.ecc_codewords // blocks)
+    codewords = data + [0] * size.ecc_codewords
+    for block in range(blocks):
+        for i, value in enumerate(_remainder(data[block::blocks], generator)):
+            codewords[size.data_codewords + block + i * blocks] = value
+    return codewords
+
+
+@cache
+def _generator(degree):
+    """Coefficients, highest first and without the leading 1, of prod(x + a^i) for i = 1..degree"""
+    poly = [1]
+    for i in range(1, degree + 1):
+        poly = [
+            coefficient ^ (_multiply(poly[j - 1], EXP[i]) if j else 0)
+            for j, coefficient in enumerate([*poly, 0])
+        ]
+    return tuple(poly[1:])
+
+
+def _remainder(data, generator):
+    """Error correction codewords of one block"""
+    ecc = [0] * len(generator)
+    for value in data:
+        factor = value ^ ecc[0]
+        ecc = [*ecc[1:], 0]
+        if factor:
+            for i, coefficient in enumerate(generator):
+                ecc[i] ^= _multiply(factor, coefficient)
+    return ecc
+
+
+def _multiply(a, b):
+    if not (a and b):
+        return 0
+    return EXP[LOG[a] + LOG[b]]
+
+
+@cache
+def _symbol_layout(size):
+    """Finder patterns and quiet zone as a flat b'0'/b'1' template, its width, and where each codeword bit goes.
+
+    The placement is a tuple of (index into the template, codeword position, bit mask).
+    """
+    width = size.size + 2 * QUIET_ZONE
+    template = bytearray(b'0' * width * width)
+    box = size.region_size + 2
+
+    def index(row, col):
+        return (row + QUIET_ZONE) * width + col + QUIET_ZONE
+
+    # Each data region is framed by a solid "L" on the left and bottom and alternating clock tracks on top and right
+    for region_row in range(size.regions):
+        for region_col in range(size.regions):
+            top, left = region_row * box, region_col * box
+            for offset in range(box):
+                template[index(top + offset, left)] = 49
+                template[index(top + box - 1, left + offset)] = 49
+                if offset % 2 == 0:
+                    template[index(top, left + offset)] = 49
+                else:
+                    template[index(top + offset, left + box - 1)] = 49
+
+    def symbol_index(row, col):
+        # Mapping matrix coordinates to symbol coordinates, skipping the finder patterns
+        return index(
+            row // size.region_size * box + 1 + row % size.region_size,
+            col // size.region_size * box + 1 + col % size.region_size,
+        )
+
+    placement = []
+    for (row, col), bit in _module_placement(size.mapping_size, size.mapping_size).items():
+        if bit is True:
+            template[symbol_index(row, col)] = 49
+        elif bit:
+            position, mask = bit
+            placement.append((symbol_index(row, col), position, mask))
+    return bytes(template), width, tuple(placement)
+
+
+def _module_placement(nrow, ncol):
+    """(row, col) -> (codeword position, bit mask) for the mapping matrix, or True/False for fixed modules"""
+    cells = {}
+
+    def module(row, col, position, bit):
+        if row < 0:
+            row += nrow
+            col += 4 - (nrow + 4) % 8
+        if col < 0:
+            col += ncol
+            row += 4 - (ncol + 4) % 8
+        cells[row, col] = (position, 1 << (8 - bit))
+
+    def utah(row, col, position):
+        module(row - 2, col - 2, position, 1)
+        module(row - 2, col - 1, position, 2)
+        module(row - 1, col - 2, position, 3)
+        module(row - 1, col - 1, position, 4)
+        module(row - 1, col, position, 5)
+        module(row, col - 2, position, 6)
+        module(row, col - 1, position, 7)
+        module(row, col, position, 8)
+
+    # The four corner cases, as (row, col) of bits 1 to 8
+    corners = (
+        ((nrow - 1, 0), (nrow - 1, 1), (nrow - 1, 2), (0, ncol - 2),
+         (0, ncol - 1), (1, ncol - 1), (2, ncol - 1), (3, ncol - 1)),
+        ((nrow - 3, 0), (nrow - 2, 0), (nrow - 1, 0), (0, ncol - 4),
+         (0, ncol - 3), (0, ncol - 2), (0, ncol - 1), (1, ncol - 1)),
+        ((nrow - 3, 0), (nrow - 2, 0), (nrow - 1, 0), (0, ncol - 2),
+         (0, ncol - 1), (1, ncol - 1), (2, ncol - 1), (3, ncol - 1)),
+        ((nrow - 1, 0), (nrow - 1, ncol - 1), (0, ncol - 3), (0, ncol - 2),
+         (0, ncol - 1), (1, ncol - 3), (1, ncol - 2), (1, ncol - 1)),
+    )
+
+    def corner(which, position):
+        for bit, (row, col) in enumerate(corners[which], 1):
+            module(row, col, position, bit)
+
+    position = 0
+    row, col = 4, 0
+    while row < nrow or col < ncol:
+        if row == nrow and col == 0:
+            corner(0, position)
+            position += 1
+        if row == nrow - 2 and col == 0 and ncol % 4:
+            corner(1, position)
+            position += 1
+        if row == nrow - 2 and col == 0 and ncol % 8 == 4:
+            corner(2, position)
+            position += 1
+        if row == nrow + 4 and col == 2 and not ncol % 8:
+            corner(3, position)
+            position += 1
+
+        # Sweep up and to the right
+        while True:
+            if row < nrow and col >= 0 and (row, col) not in cells:
+                utah(row, col, position)
+                position += 1
+            row -= 2
+            col += 2
+            if not (row >= 0 and col < ncol):
+                break
+        row += 1
+        col += 3
+
+        # Then down and to the left
+        while True:
+            if row >= 0 and col < ncol and (row, col) not in cells:
+                utah(row, col, position)
+                position += 1
+            row += 2
+            col -= 2
+            if not (row < nrow and col >= 0):
+                break
+        row += 3
+        col += 1
+
+    # Some sizes leave the bottom right corner unfilled; it takes a fixed pattern
+    if (nrow - 1, ncol - 1) not in cells:
+        cells[nrow - 1, ncol - 1] = cells[nrow - 2, ncol - 2] = True
+        cells[nrow - 1, ncol - 2] = cells[nrow - 2, ncol - 1] = False
+    return cells
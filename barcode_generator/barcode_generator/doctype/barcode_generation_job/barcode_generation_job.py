@@ -0,0 +1,95 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import json
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now_datetime
+
+# Minimum change in percent before progress is written back to the database
+PROGRESS_STEP = 2
+
+
+class BarcodeGenerationJob(Document):
+    def mark_running(self):
+        """Flag the job as picked up by a worker"""
+        self.db_set({
+            "status": "Running",
+            "stage": "Starting",
+            "percent": 0,
+            "started_on": now_datetime(),
+        }, commit=True)
+
+    def update_progress(self, stage, percent):
+        """Record stage and percent, skipping writes for tiny percent changes"""
+        percent = min(100, max(0, int(percent)))
+        if stage == self.stage and abs(percent - (self.percent or 0)) < PROGRESS_STEP:
+            return
+
+        self.db_set({"stage": stage, "percent": percent}, update_modified=False, commit=True)
+
+    def mark_completed(self, file_url):
+        """Store the result URL once the output file exists"""
+        self.db_set({
+            "status": "Completed",
+            "stage": "Completed",
+            "percent": 100,
+            "file_url": file_url,
+            "finished_on": now_datetime(),
+        }, commit=True)
+
+    def mark_failed(self, error):
+        """Store the failure reason"""
+        self.db_set({
+            "status": "Failed",
+            "stage": "Failed",
+            "error": str(error)[:1000],
+            "finished_on": now_datetime(),
+        }, commit=True)
+
+    def record_metrics(self, metrics):
+        """Store the stage timings and counters of a finished run (RunMetrics.as_dict())"""
+        counters = metrics.get("counters", {})
+        duration = metrics.get("total_seconds") or 0
+        self.db_set({
+            "duration": duration,
+            "codes_per_sec": counters.get("labels", 0) / duration if duration else 0,
+            "pages": counters.get("pages", 0),
+            "bytes_written": counters.get("bytes_written", 0),
+            "rendered": counters.get("rendered", 0),
+            "cache_hits": counters.get("cache_hits", 0),
+            "render_errors": counters.get("errors", 0),
+            "metrics": json.dumps(metrics, indent=1),
+        }, update_modified=False, commit=True)
+
+    def as_metrics(self):
+        """Return the recorded metrics of this run"""
+        return {
+            "job_id": self.name,
+            "generator": self.generator,
+            "status": self.status,
+            "started_on": self.started_on,
+            "finished_on": self.finished_on,
+            "total_codes": self.total_codes,
+            "duration": self.duration,
+            "codes_per_sec": self.codes_per_sec,
+            "pages": self.pages,
+            "bytes_written": self.bytes_written,
+            "rendered": self.rendered,
+            "cache_hits": self.cache_hits,
+            "errors": self.render_errors,
+            "metrics": json.loads(self.metrics) if self.metrics else None,
+        }
+
+    def as_status(self):
+        """Return the fields polled by the form while the job runs"""
+        return {
+            "job_id": self.name,
+            "generator": self.generator,
+            "status": self.status,
+            "stage": self.stage,
+            "percent": self.percent or 0,
+            "file_url": self.file_url,
+            "error": self.error,
+        }
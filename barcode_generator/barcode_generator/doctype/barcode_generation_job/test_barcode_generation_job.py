@@ -0,0 +1,9 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestBarcodeGenerationJob(FrappeTestCase):
+	pass
@@ -11,9 +11,16 @@ frappe.ui.form.on('Bulk Barcode Generator', {
             preview_input_codes(frm);
         }, __('Actions'));
         
+        frm.add_custom_button(__('Preview Labels'), function() {
+            preview_labels(frm);
+        }, __('Actions'));
+        
         // Add download button if PDF exists
         if (frm.doc.generated_pdf) {
-            frm.add_custom_button(__('Download PDF'), function() {
+            // ZPL/EPL runs leave a printer command file instead of a PDF
+            const extension = frm.doc.generated_pdf.split('.').pop().toUpperCase();
+            const file_label = ['ZPL', 'EPL', 'ZIP'].includes(extension) ? extension : 'PDF';
+            frm.add_custom_button(__('Download {0}', [file_label]), function() {
                 window.open(frm.doc.generated_pdf, '_blank');
             }, __('Actions'));
         }
@@ -50,11 +57,26 @@ frappe.ui.form.on('Bulk Barcode Generator', {
         }
     },
     
+    item_column: function(frm) {
+        reimport_upload(frm);
+    },
+    
+    barcode_column: function(frm) {
+        reimport_upload(frm);
+    },
+    
     input_data: function(frm) {
         // Update code count when input data changes
         update_code_count(frm);
     },
     
+    page_size: function(frm) {
+        // ZPL/EPL output is only offered for thermal labels
+        if (frm.doc.page_size !== '50x25mm Label' && ['ZPL', 'EPL'].includes(frm.doc.output_format)) {
+            frm.set_value('output_format', 'PDF');
+        }
+    },
+    
     barcode_type: function(frm) {
         // Show/hide dimensions based on barcode type
         if (['DataMatrix', 'PDF417'].includes(frm.doc.barcode_type)) {
@@ -64,8 +86,16 @@ frappe.ui.form.on('Bulk Barcode Generator', {
     }
 });
 
+function reimport_upload(frm) {
+    // Read the uploaded file again with the chosen columns
+    if (frm.doc.upload_file && !frm.is_new()) {
+        frm.save().then(() => frm.reload_doc());
+    }
+}
+
 function update_code_count(frm) {
-    if (frm.doc.input_data) {
+    // Uploaded files are counted on the server when the document is saved
+    if (frm.doc.input_data && !frm.doc.upload_file) {
         let codes = frm.doc.input_data.split('\n').filter(line => line.trim());
         frm.set_value('total_codes', codes.length);
         
@@ -79,22 +109,28 @@ function update_code_count(frm) {
 function preview_input_codes(frm) {
     let data_source = "";
     
-    if (frm.doc.upload_file && frm.doc.input_data) {
+    let args = {};
+    
+    if (frm.doc.upload_file && !frm.is_new()) {
+        // Rows of an uploaded file are parsed on save and read back from the server
         data_source = "from uploaded file";
+        args.doc_name = frm.doc.name;
+    } else if (frm.doc.session_state) {
+        data_source = "appended to this session";
+        args.doc_name = frm.doc.name;
     } else if (frm.doc.input_data) {
         data_source = "from manual input";
+        args.input_data = frm.doc.input_data;
     }
     
-    if (!frm.doc.input_data) {
+    if (!args.doc_name && !args.input_data) {
         frappe.msgprint(__('Please upload a file or enter some codes manually first'));
         return;
     }
     
     frappe.call({
         method: 'barcode_generator.barcode_generator.doctype.bulk_barcode_generator.bulk_barcode_generator.preview_codes',
-        args: {
-            input_data: frm.doc.input_data
-        },
+        args: args,
         callback: function(r) {
             if (r.message && r.message.success) {
                 let codes = r.message.codes;
@@ -140,13 +176,83 @@ function preview_input_codes(frm) {
     });
 }
 
+// Settings the preview takes from the form before they are saved
+const PREVIEW_SETTINGS = [
+    'barcode_type', 'page_size', 'render_mode', 'include_text', 'codes_per_row',
+    'barcode_width', 'barcode_height', 'item_name_font_size', 'label_border', 'label_header'
+];
+
+function preview_labels(frm) {
+    if (!frm.doc.input_data && !frm.doc.upload_file && !frm.doc.session_state) {
+        frappe.msgprint(__('Please upload a file or enter some codes manually first'));
+        return;
+    }
+    if (frm.is_new()) {
+        frappe.msgprint(__('Save the document to preview its labels'));
+        return;
+    }
+    
+    // Unsaved layout changes show up straight away; the codes are the saved ones
+    let settings = {};
+    PREVIEW_SETTINGS.forEach(fieldname => settings[fieldname] = frm.doc[fieldname]);
+    frappe.call({
+        method: 'barcode_generator.barcode_generator.doctype.bulk_barcode_generator.bulk_barcode_generator.preview_labels',
+        args: {
+            doc_name: frm.doc.name,
+            settings: settings
+        },
+        freeze: true,
+        freeze_message: __('Rendering preview...'),
+        callback: function(r) {
+            if (r.message && r.message.success) {
+                let preview = r.message;
+                let html = `
+                    <div style="max-height: 500px; overflow-y: auto;">
+                        <p><strong>${__('First page')}: ${preview.labels.length} / ${preview.codes_per_page} ${__('labels')}</strong>
+                           (${preview.label_width_mm} x ${preview.label_height_mm} mm)</p>
+                        <div style="display: grid; grid-template-columns: repeat(${preview.codes_per_row}, 1fr); gap: 8px;">
+                `;
+                
+                preview.labels.forEach(label => {
+                    let content = label.image
+                        ? `<img src="${label.image}" style="max-width: 100%;">`
+                        : `<span class="text-danger">${__('Error')}: ${frappe.utils.escape_html(label.code)}</span>`;
+                    html += `<div style="border: 1px dashed var(--border-color); padding: 4px; text-align: center;">${content}</div>`;
+                });
+                
+                html += '</div></div>';
+                
+                let dialog = new frappe.ui.Dialog({
+                    title: __('Label Preview'),
+                    size: 'large',
+                    fields: [
+                        {
+                            fieldtype: 'HTML',
+                            fieldname: 'preview_html',
+                            options: html
+                        }
+                    ]
+                });
+                dialog.show();
+            } else {
+                frappe.msgprint(__('Error previewing labels: ') + (r.message?.message || 'Unknown error'));
+            }
+        }
+    });
+}
+
 function generate_barcode_pdf(frm) {
     // Validate form
-    if (!frm.doc.input_data) {
+    if (!frm.doc.input_data && !frm.doc.upload_file && !frm.doc.session_state) {
         frappe.msgprint(__('Please enter codes to generate barcodes'));
         return;
     }
     
+    if (frm.doc.session_state === 'Open') {
+        frappe.msgprint(__('Seal the session before generating labels'));
+        return;
+    }
+    
     if (!frm.doc.name) {
         frappe.msgprint(__('Please save the document first'));
         return;
@@ -164,25 +270,18 @@ function generate_barcode_pdf(frm) {
             frappe.call({
                 method: 'barcode_generator.barcode_generator.doctype.bulk_barcode_generator.bulk_barcode_generator.generate_pdf',
                 args: {
-                    doc_name: frm.doc.name
+                    doc_name: frm.doc.name,
+                    queued: 1
                 },
                 callback: function(r) {
-                    frappe.hide_progress();
-                    
                     if (r.message && r.message.success) {
-                        frm.reload_doc();
                         frappe.show_alert({
-                            message: __('PDF generated successfully!'),
-                            indicator: 'green'
+                            message: __('PDF generation queued'),
+                            indicator: 'blue'
                         });
-                        
-                        // Automatically download
-                        if (r.message.file_url) {
-                            setTimeout(() => {
-                                window.open(r.message.file_url, '_blank');
-                            }, 1000);
-                        }
+                        poll_generation_status(frm, r.message.job_id);
                     } else {
+                        frappe.hide_progress();
                         frappe.msgprint({
                             title: __('Generation Failed'),
                             message: r.message?.message || __('Unknown error occurred'),
@@ -203,6 +302,51 @@ function generate_barcode_pdf(frm) {
     );
 }
 
+function poll_generation_status(frm, job_id) {
+    // Poll the background job until it completes or fails
+    frappe.call({
+        method: 'barcode_generator.barcode_generator.doctype.bulk_barcode_generator.bulk_barcode_generator.get_generation_status',
+        args: {
+            job_id: job_id
+        },
+        callback: function(r) {
+            let status = r.message;
+            if (!status || !status.success) {
+                frappe.hide_progress();
+                frappe.msgprint(__('Error checking generation status: ') + (status?.message || 'Unknown error'));
+                return;
+            }
+            
+            if (status.status === 'Completed') {
+                frappe.hide_progress();
+                frm.reload_doc();
+                frappe.show_alert({
+                    message: __('PDF generated successfully!'),
+                    indicator: 'green'
+                });
+                
+                // Automatically download
+                if (status.file_url) {
+                    setTimeout(() => {
+                        window.open(status.file_url, '_blank');
+                    }, 1000);
+                }
+            } else if (status.status === 'Failed') {
+                frappe.hide_progress();
+                frm.reload_doc();
+                frappe.msgprint({
+                    title: __('Generation Failed'),
+                    message: status.error || __('Unknown error occurred'),
+                    indicator: 'red'
+                });
+            } else {
+                frappe.show_progress(__('Generating Barcodes'), status.percent, 100, status.stage || __('Queued'));
+                setTimeout(() => poll_generation_status(frm, job_id), 2000);
+            }
+        }
+    });
+}
+
 // Real-time progress updates
 frappe.realtime.on('progress', function(data) {
     if (data.title && data.title.includes('barcode')) {
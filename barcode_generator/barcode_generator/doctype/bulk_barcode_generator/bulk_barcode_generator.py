@@ -2,675 +2,825 @@
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import now_datetime, get_site_path
+from frappe.utils import add_to_date, cint, flt, now_datetime, get_site_path
 import os
 import io
 import base64
 import csv
-from PIL import Image, ImageDraw, ImageFont
-import barcode
-from barcode.writer import ImageWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4, letter, A3, A5, legal
+import hashlib
+import json
+from dataclasses import astuple
 from reportlab.lib.units import mm
-import qrcode
+from reportlab.pdfgen import canvas
 import re
+from itertools import islice
+from werkzeug.wrappers import Response
+
+from barcode_generator.barcode_generator.fingerprints import (
+    build_manifest,
+    is_same_output,
+    row_fingerprint,
+    row_fingerprints,
+)
+from barcode_generator.barcode_generator.code_store import (
+    append_codes,
+    get_keys_path,
+    iter_codes,
+    new_codes,
+    read_sample,
+    write_codes,
+)
+from barcode_generator.barcode_generator.instrumentation import RunMetrics
+from barcode_generator.barcode_generator.importer import format_input_line, iter_upload_rows
+from barcode_generator.barcode_generator.label_templates import LabelTemplate
+from barcode_generator.barcode_generator.layout import compute_layout, get_page_size
+from barcode_generator.barcode_generator.pdf_writer import place_labels
+from barcode_generator.barcode_generator.printer_commands import (
+    DEFAULT_DOTS_PER_MM,
+    PRINTER_FORMATS,
+    LabelArea,
+    write_printer_file,
+)
+from barcode_generator.barcode_generator.render import (
+    THERMAL_PAGE_SIZE,
+    RenderConfig,
+    add_item_name_to_image,
+    add_text_to_image,
+    create_error_image,
+    default_worker_count,
+    make_thumbnail,
+    render_label,
+    render_stream,
+)
+from barcode_generator.barcode_generator.render_cache import CACHE_VERSION, RenderCache, encode_image, render_key
+from barcode_generator.barcode_generator.storage import (
+    get_file_url_path,
+    get_work_path,
+    read_json_gz,
+    store_output_file,
+    temp_output_file,
+    write_json_gz,
+)
+from barcode_generator.barcode_generator.svg import SVG_CONTENT_TYPE, symbol_svg, write_svg_archive
+from barcode_generator.barcode_generator.symbology import HAS_PDF417, encode_symbol
+from barcode_generator.barcode_generator.tokenizer import count_rows, iter_rows, parse_fields, unique_codes
+from barcode_generator.barcode_generator.validation import ValidationReport, validate_codes
+from barcode_generator.barcode_generator.volumes import plan_volume_reuse, read_bundle_volumes, write_volume_bundle
+
+# Rows shown by preview_codes
+PREVIEW_SIZE = 10
+
+# Parsed rows kept on the document for display
+CODES_SAMPLE_SIZE = 20
+
+# Line numbers of malformed upload rows listed when the file is imported
+BAD_LINES_REPORTED = 20
+
+# Label preview thumbnails: width in pixels, and how long a rendered preview is kept
+PREVIEW_THUMBNAIL_WIDTH = 240
+PREVIEW_CACHE_TTL = 60 * 60
+
+# Rows accepted by one append_to_session call
+SESSION_CHUNK_LIMIT = 10000
+
+# Rows accepted by one stateless render request
+RENDER_CODE_LIMIT = 100
 
-# Try to import pandas, fall back to basic CSV handling if not available
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
+# Settings a stateless render request or a label preview may set; everything else keeps the
+# DocType default, or the saved value for a preview
+RENDER_SETTINGS = (
+    "barcode_type", "page_size", "render_mode", "include_text", "codes_per_row",
+    "barcode_width", "barcode_height", "item_name_font_size", "label_border", "label_header",
+)
+
+# Bounds of the numeric layout settings; 0 keeps the page size's default. Client settings are
+# checked against these before a layout is computed, so a request cannot ask for millions of slots
+LAYOUT_SETTING_LIMITS = {
+    "codes_per_row": (1, 20),
+    "barcode_width": (1, 400),
+    "barcode_height": (1, 400),
+    "item_name_font_size": (4, 72),
+}
+
+RENDER_CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": SVG_CONTENT_TYPE,
+    "pdf": "application/pdf",
+}
+
+# How long clients may reuse a rendered label without asking again, in seconds
+RENDER_MAX_AGE = 24 * 60 * 60
+
+# Seconds past the job timeout after which a Running job is taken to have lost its worker
+STALE_JOB_GRACE = 5 * 60
+
+# Fields a session's settings may not set; they are managed by the session API
+SESSION_MANAGED_FIELDS = (
+    "name", "doctype", "title", "upload_file", "input_data", "codes_hash", "codes_sample", "total_codes",
+    "session_state", "generation_status", "generated_pdf", "generated_on", "output_manifest",
+)
 
 class BulkBarcodeGenerator(Document):
     def validate(self):
         """Validate input data before saving"""
-        # Process upload file if provided
-        if self.upload_file and not self.input_data:
-            self.process_uploaded_file()
-        
-        if not self.input_data:
-            frappe.throw("Input data is required. Either upload a file or enter data manually.")
-        
-        # Count total codes
-        codes = self.parse_input_data()
-        self.total_codes = len(codes)
-        
-        if self.total_codes == 0:
-            frappe.throw("No valid codes found in input data")
+        if self.session_state:
+            # Session rows are appended straight to the code store
+            if self.session_state == "Sealed" and not self.total_codes:
+                frappe.throw("No codes were appended to this session")
+        else:
+            if not self.upload_file and not self.input_data:
+                frappe.throw("Input data is required. Either upload a file or enter data manually.")
+            
+            # Parse only when the input changed; the parsed rows live in the code store
+            if not self.is_code_store_current():
+                self.update_code_store()
+            
+            if self.total_codes == 0:
+                frappe.throw("No valid codes found in input data")
         
-        if self.total_codes > 1000:
-            frappe.throw("Maximum 1000 codes allowed per batch")
+        self.validate_layout()
 
-    def process_uploaded_file(self):
-        """Process uploaded CSV/Excel file and populate input_data"""
-        if not self.upload_file:
-            return
-        
+        if self.barcode_type == "PDF417" and not HAS_PDF417:
+            frappe.throw("PDF417 needs the pdf417gen package. Run bench setup requirements to install it.")
+
+        if self.is_printer_output() and self.page_size != THERMAL_PAGE_SIZE:
+            frappe.throw(f"{self.output_format} output is only available for the {THERMAL_PAGE_SIZE} page size")
+
+        if self.label_logo and not os.path.exists(self.get_label_logo_path()):
+            frappe.throw("The label logo file could not be found")
+
+        # Printer command files and SVG archives stay small however many labels they hold
+        if self.total_codes > 1000 and not cint(self.large_batch_mode) and self.is_pdf_output():
+            frappe.throw("Maximum 1000 codes allowed per batch. Enable Large Batch Mode for bigger runs.")
+
+    def on_update(self):
+        # Stores of earlier inputs are kept until the new one is saved
+        if self.has_value_changed("codes_hash"):
+            self.remove_code_stores(keep=self.codes_hash)
+
+    def on_trash(self):
+        self.remove_code_stores()
+        path = self.get_fingerprint_path()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def after_rename(self, old, new, merge=False):
+        # Working files are named after the document
+        old_codes = f"{old}-{(self.codes_hash or '')[:16]}.jsonl.gz"
+        for folder, old_name, new_name in (
+            ("barcode_codes", old_codes, self.get_codes_path()),
+            ("barcode_codes", get_keys_path(old_codes), get_keys_path(self.get_codes_path())),
+            ("barcode_fingerprints", f"{old}.json.gz", self.get_fingerprint_path()),
+        ):
+            old_path = get_work_path(folder, old_name)
+            if os.path.exists(old_path):
+                os.replace(old_path, new_name)
+
+    def get_source_hash(self):
+        """Hash of the input the codes are parsed from: the uploaded file and its columns, or the manual input"""
+        if self.session_state:
+            # Session rows have no source besides the store itself
+            return self.codes_hash
+        if self.upload_file:
+            source = f"file:{self.upload_file}\x1f{self.item_column or ''}\x1f{self.barcode_column or ''}"
+        else:
+            source = f"text:{self.input_data or ''}"
+        return hashlib.sha1(source.encode()).hexdigest()
+
+    def get_codes_path(self, codes_hash=None):
+        """Code store for the input with the given hash, the stored one by default"""
+        codes_hash = codes_hash or self.codes_hash or ""
+        return get_work_path("barcode_codes", f"{self.name}-{codes_hash[:16]}.jsonl.gz")
+
+    def is_code_store_current(self):
+        """Whether the code store holds the rows of the current input"""
+        source_hash = self.get_source_hash()
+        return self.codes_hash == source_hash and os.path.exists(self.get_codes_path(source_hash))
+
+    def update_code_store(self):
+        """Parse the input into a new code store and keep its counts and a sample on the document"""
+        source_hash = self.get_source_hash()
+        path = self.get_codes_path(source_hash)
+        bad_lines = []
         try:
-            # Get the file
-            file_doc = frappe.get_doc("File", {"file_url": self.upload_file})
-            file_path = file_doc.get_full_path()
-            
-            # Read file based on extension
-            if file_path.endswith('.csv'):
-                if HAS_PANDAS:
-                    df = pd.read_csv(file_path)
-                    input_lines = self._process_dataframe(df)
-                else:
-                    # Fallback to basic CSV reading
-                    input_lines = self._process_csv_basic(file_path)
-            elif file_path.endswith(('.xlsx', '.xls')):
-                if HAS_PANDAS:
-                    df = pd.read_excel(file_path)
-                    input_lines = self._process_dataframe(df)
-                else:
-                    frappe.throw("Excel file support requires pandas. Please use CSV format or install pandas.")
-            else:
-                frappe.throw("Supported file formats: CSV, Excel (.xlsx, .xls)")
-            
-            # Set input_data
-            self.input_data = "\n".join(input_lines)
-            
-            if not input_lines:
-                frappe.throw("No valid data found in uploaded file")
-                
+            rows, self.total_codes = write_codes(path, self.iter_source_codes(on_bad_line=bad_lines.append))
         except Exception as e:
-            frappe.throw(f"Error processing uploaded file: {str(e)}")
-
-    def _process_dataframe(self, df):
-        """Process pandas DataFrame and return input lines"""
-        input_lines = []
+            if self.upload_file:
+                frappe.throw(f"Error processing uploaded file: {str(e)}")
+            raise
         
-        # Check if we have expected columns
-        if len(df.columns) >= 2:
-            # Use first two columns as Item Name and Barcode
-            item_col = df.columns[0]
-            barcode_col = df.columns[1]
-            
-            for _, row in df.iterrows():
-                item_name = str(row[item_col]).strip() if pd.notna(row[item_col]) else ""
-                barcode_num = str(row[barcode_col]).strip() if pd.notna(row[barcode_col]) else ""
-                
-                if barcode_num:  # Only add if barcode exists
-                    if item_name:
-                        input_lines.append(f"{item_name},{barcode_num}")
-                    else:
-                        input_lines.append(barcode_num)
+        if self.upload_file and not rows:
+            frappe.throw("Error processing uploaded file: No valid data found in uploaded file")
+
+        if bad_lines:
+            lines = ", ".join(map(str, bad_lines[:BAD_LINES_REPORTED]))
+            more = f" and {len(bad_lines) - BAD_LINES_REPORTED} more" if len(bad_lines) > BAD_LINES_REPORTED else ""
+            frappe.msgprint(
+                f"Skipped {len(bad_lines)} rows with more columns than the header row (lines {lines}{more})",
+                title="Rows skipped",
+                indicator="orange",
+            )
         
-        elif len(df.columns) == 1:
-            # Single column - treat as barcode numbers only
-            barcode_col = df.columns[0]
-            for _, row in df.iterrows():
-                barcode_num = str(row[barcode_col]).strip() if pd.notna(row[barcode_col]) else ""
-                if barcode_num:
-                    input_lines.append(barcode_num)
+        self.codes_hash = source_hash
+        self.codes_sample = "\n".join(format_input_line(*code) for code in read_sample(path, CODES_SAMPLE_SIZE))
+
+    def remove_code_stores(self, keep=None):
+        """Delete this document's code stores, except the one for the keep hash"""
+        folder = os.path.dirname(self.get_codes_path())
+        pattern = re.compile(re.escape(self.name) + r"-([0-9a-f]{16})\.jsonl\.gz(?:\.keys)?")
+        for file_name in os.listdir(folder):
+            match = pattern.fullmatch(file_name)
+            if match and not (keep and keep.startswith(match.group(1))):
+                os.remove(os.path.join(folder, file_name))
+
+    def iter_uploaded_rows(self, on_bad_line=None):
+        """Rows read from the uploaded CSV/Excel file, in chunks; malformed rows are reported through on_bad_line"""
+        # Get the file
+        file_doc = frappe.get_doc("File", {"file_url": self.upload_file})
+        file_path = file_doc.get_full_path()
         
+        for rows in iter_upload_rows(
+            file_path,
+            item_column=(self.item_column or "").strip(),
+            barcode_column=(self.barcode_column or "").strip(),
+            on_bad_line=on_bad_line,
+        ):
+            yield from rows
+
+    def iter_source_codes(self, on_bad_line=None):
+        """Parse the input lazily: the uploaded file if there is one, otherwise the manual input"""
+        if self.upload_file:
+            # Columns arrive already split; they are checked like session rows, not re-parsed as text
+            rows = (parse_fields(item_name, code, qty) for item_name, code, qty in self.iter_uploaded_rows(on_bad_line))
         else:
-            frappe.throw("File must contain at least one column")
-        
-        return input_lines
+            rows = iter_rows(self.input_data)
+        return unique_codes(rows)
 
-    def _process_csv_basic(self, file_path):
-        """Process CSV file using basic csv module"""
-        input_lines = []
-        
-        with open(file_path, 'r', encoding='utf-8-sig') as csvfile:  # utf-8-sig to handle BOM
-            # Try to detect delimiter
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
-            sniffer = csv.Sniffer()
-            delimiter = sniffer.sniff(sample).delimiter
-            
-            reader = csv.reader(csvfile, delimiter=delimiter)
-            
-            # Skip header if it exists
-            first_row = next(reader, None)
-            if first_row and (first_row[0].lower().strip() in ['item', 'product', 'name', 'item name']):
-                # Skip header row
-                pass
-            else:
-                # Process first row as data
-                if first_row:
-                    csvfile.seek(0)
-                    reader = csv.reader(csvfile, delimiter=delimiter)
-            
-            for row in reader:
-                if not row:
-                    continue
-                    
-                # Clean row data
-                clean_row = [cell.strip() for cell in row if cell.strip()]
-                
-                if len(clean_row) >= 2:
-                    # Two columns: Item Name, Barcode
-                    item_name = clean_row[0]
-                    barcode_num = clean_row[1]
-                    if barcode_num:
-                        input_lines.append(f"{item_name},{barcode_num}")
-                elif len(clean_row) == 1:
-                    # Single column: Just barcode
-                    barcode_num = clean_row[0]
-                    if barcode_num:
-                        input_lines.append(barcode_num)
-        
-        return input_lines
+    def iter_input_codes(self):
+        """Stream the (item_name, barcode, qty) rows, from the code store when it is current"""
+        if self.is_code_store_current():
+            return iter_codes(self.get_codes_path())
+        return self.iter_source_codes()
 
     def parse_input_data(self):
-        """Parse input data and return list of (item_name, barcode) tuples with improved handling"""
-        if not self.input_data:
-            return []
-        
-        codes = []
-        for line in self.input_data.split('\n'):
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
-                
-            # Try to parse different formats with improved logic:
-            # Format 1: "Item Name,Barcode" or "Item Name\tBarcode"
-            # Format 2: "Item Name | Barcode"  
-            # Format 3: Just "Barcode" (no item name)
-            # Format 4: "Item Name Barcode" (space separated)
-            
-            if ',' in line:
-                # CSV format: Item Name,Barcode
-                parts = line.split(',', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    codes.append((item_name, barcode_num))
-                else:
-                    # Just barcode with comma artifacts
-                    clean_line = line.replace(',', '').strip()
-                    if clean_line:
-                        codes.append(("", clean_line))
-                    
-            elif '\t' in line:
-                # Tab-separated: Item Name\tBarcode
-                parts = line.split('\t', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    codes.append((item_name, barcode_num))
-                else:
-                    clean_line = line.replace('\t', '').strip()
-                    if clean_line:
-                        codes.append(("", clean_line))
-                    
-            elif '|' in line:
-                # Pipe-separated: Item Name | Barcode
-                parts = line.split('|', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    codes.append((item_name, barcode_num))
-                else:
-                    clean_line = line.replace('|', '').strip()
-                    if clean_line:
-                        codes.append(("", clean_line))
-            else:
-                # Plain text - could be just barcode or "Item Name Barcode"
-                clean_line = line.strip()
-                if clean_line:
-                    # Check if it contains multiple words and last word looks like a barcode
-                    words = clean_line.split()
-                    if len(words) >= 2:
-                        # Check if last word looks like a barcode (alphanumeric, possibly with special chars)
-                        last_word = words[-1]
-                        if re.match(r'^[A-Za-z0-9\-_\.]+$', last_word) and len(last_word) >= 4:
-                            # Treat last word as barcode, rest as item name
-                            item_name = ' '.join(words[:-1])
-                            barcode_num = last_word
-                            codes.append((item_name, barcode_num))
-                        else:
-                            # Treat entire line as barcode
-                            codes.append(("", clean_line))
-                    else:
-                        # Single word - treat as barcode number
-                        codes.append(("", clean_line))
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_codes = []
-        for item_name, barcode_num in codes:
-            key = f"{item_name}:{barcode_num}"
-            if key not in seen:
-                seen.add(key)
-                unique_codes.append((item_name, barcode_num))
+        """Return list of (item_name, barcode, qty) tuples, skipping unusable lines"""
+        # validate and create_pdf both need the rows; load them once per input
+        source_hash = self.get_source_hash()
+        cached = getattr(self, '_parsed_input', None)
+        if cached and cached[0] == source_hash:
+            return cached[1]
         
-        return unique_codes
+        codes = list(self.iter_input_codes())
+        self._parsed_input = (source_hash, codes)
+        return codes
 
     def get_page_size(self):
         """Get page size in points"""
-        page_sizes = {
-            'A4': A4,
-            'Letter': letter,
-            'A3': A3,
-            'A5': A5,
-            'Legal': legal,
-            '50x25mm Label': (50 * mm, 25 * mm)  # Thermal label size
-        }
-        return page_sizes.get(self.page_size, A4)
+        return get_page_size(self.page_size)
 
-    def generate_barcode_image(self, code_text, item_name=""):
-        """Generate a single barcode image with item name"""
+    def get_layout(self):
+        """Label grid for the selected page size and dimensions"""
+        return compute_layout(
+            self.page_size,
+            barcode_width=self.barcode_width,
+            barcode_height=self.barcode_height,
+            codes_per_row=cint(self.codes_per_row),
+            item_name_font_size=cint(self.item_name_font_size),
+        )
+
+    def validate_layout(self):
+        """Reject layout settings outside LAYOUT_SETTING_LIMITS or with more columns than fit on the page"""
+        for fieldname, (low, high) in LAYOUT_SETTING_LIMITS.items():
+            value = self.get(fieldname)
+            if value and not low <= value <= high:
+                frappe.throw(f"{self.meta.get_label(fieldname)} must be between {low} and {high}")
         try:
-            # Map barcode types
-            barcode_classes = {
-                'Code128': barcode.Code128,
-                'Code39': barcode.Code39,
-                'EAN13': barcode.EAN13,
-                'EAN8': barcode.EAN8,
-                'UPC-A': barcode.UPCA,
-                'ITF': barcode.ITF,
-            }
-            
-            if self.barcode_type in barcode_classes:
-                # For standard barcodes
-                barcode_class = barcode_classes[self.barcode_type]
-                
-                # Different options for thermal vs standard printing
-                if self.page_size == '50x25mm Label':
-                    # Thermal label optimized settings
-                    options = {
-                        'module_width': 0.25,   # Even smaller modules for thermal labels
-                        'module_height': 6.0,   # Compact height for thermal
-                        'quiet_zone': 1.5,     # Minimal quiet zone for thermal
-                        'font_size': 8,         # Smaller font for thermal labels
-                        'text_distance': 4.0,   # More space between bars and text to prevent overlap
-                        'background': 'white',
-                        'foreground': 'black',
-                        'write_text': self.include_text,  # Control text display
-                    }
-                else:
-                    # Standard paper optimized settings (A4, Letter, etc.)
-                    options = {
-                        'module_width': 0.5,    # Increased module width for A4 (0.5mm)
-                        'module_height': 15.0,  # Increased height for better visibility
-                        'quiet_zone': 6.0,      # Increased quiet zone for better scanning
-                        'font_size': 18,        # Much larger font size for A4 readability
-                        'text_distance': 8.0,   # More space between bars and text
-                        'background': 'white',
-                        'foreground': 'black',
-                        'write_text': self.include_text,  # Control text display
-                    }
-                
-                # Generate barcode
-                code_obj = barcode_class(str(code_text), writer=ImageWriter())
-                
-                # Save to memory buffer
-                buffer = io.BytesIO()
-                code_obj.write(buffer, options=options)
-                buffer.seek(0)
-                
-                # Open as PIL image and ensure it's RGB
-                img = Image.open(buffer)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Add item name above the barcode if provided
-                if item_name and item_name.strip():
-                    img = self.add_item_name_to_image(img, item_name, code_text)
-                
-                return img
-                
-            elif self.barcode_type in ['DataMatrix', 'PDF417']:
-                # For QR codes and 2D barcodes, use qrcode library
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_L,
-                    box_size=10,
-                    border=4,
-                )
-                qr.add_data(str(code_text))
-                qr.make(fit=True)
-                
-                img = qr.make_image(fill_color="black", back_color="white")
-                
-                # Convert to RGB if needed
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Add item name and barcode text
-                if item_name and item_name.strip():
-                    img = self.add_item_name_to_image(img, item_name, code_text)
-                elif self.include_text:
-                    img = self.add_text_to_image(img, code_text)
-                
-                return img
-            
-        except Exception as e:
-            frappe.log_error(f"Error generating barcode for {code_text}: {str(e)}")
-            # Return a placeholder image
-            return self.create_error_image(code_text, str(e))
+            self.get_layout()
+        except ValueError as e:
+            frappe.throw(str(e))
+
+    def get_label_logo_path(self):
+        """Full path of the attached label logo"""
+        return frappe.get_doc("File", {"file_url": self.label_logo}).get_full_path()
+
+    def get_label_template(self):
+        """Border, header and logo printed on every label, or None when there are none"""
+        template = LabelTemplate(
+            border=bool(cint(self.label_border)),
+            header=(self.label_header or "").strip(),
+            logo_path=self.get_label_logo_path() if self.label_logo else "",
+        )
+        return None if template.is_empty else template
+
+    def get_render_config(self):
+        """Snapshot the settings that affect rendering so worker processes don't need this document"""
+        return RenderConfig(
+            barcode_type=self.barcode_type,
+            page_size=self.page_size,
+            include_text=cint(self.include_text),
+            item_name_font_size=cint(self.item_name_font_size),
+            render_mode=self.render_mode or 'Raster',
+            font_path=frappe.conf.get("barcode_font_path") or '',
+        )
+
+    def generate_barcode_image(self, code_text, item_name=""):
+        """Generate a single barcode image with item name, served from the render cache when possible"""
+        config = self.get_render_config()
+        cache = get_render_cache()
+        key = render_key(config, code_text, item_name)
+
+        img = cache.get(key)
+        if img is not None:
+            return img
+
+        img, error = render_label(config, code_text, item_name)
+        if error:
+            frappe.log_error(error)
+        elif img:
+            cache.put(key, img)
+        return img
 
     def add_item_name_to_image(self, img, item_name, barcode_text):
         """Add item name above the barcode with appropriate font size for paper type"""
         try:
-            # Only add space for item name if it exists
-            if not (item_name and item_name.strip()):
-                return img
-            
-            # Different settings for thermal vs standard labels
-            if self.page_size == '50x25mm Label':
-                # Thermal label settings - more space for text
-                extra_height = 35  # More space for thermal labels to show item name clearly
-                barcode_y = 30    # Position barcode lower to make room for text above
-                font_size = self.item_name_font_size or 14  # Larger font for better visibility on thermal
-            else:
-                # Standard paper settings - large text
-                extra_height = 60  # Increased space for much larger font (24pt)
-                barcode_y = 60
-                font_size = self.item_name_font_size or 24  # Increased default to 24pt for A4
-                
-            new_height = img.height + extra_height
-            new_img = Image.new('RGB', (img.width, new_height), 'white')
-            
-            # Position the barcode image (leave space at top for item name)
-            new_img.paste(img, (0, barcode_y))
-            
-            # Add item name text
-            draw = ImageDraw.Draw(new_img)
-            
-            # Try to use appropriate font with configurable size
-            try:
-                # Try to load TrueType font if available
-                try:
-                    # Try common system font paths
-                    item_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", font_size)
-                except:
-                    try:
-                        # Linux font path
-                        item_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", font_size)
-                    except:
-                        try:
-                            # Windows font path
-                            item_font = ImageFont.truetype("arial.ttf", font_size)
-                        except:
-                            try:
-                                # Alternative Linux fonts
-                                item_font = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", font_size)
-                            except:
-                                # Fallback to default
-                                item_font = ImageFont.load_default()
-            except:
-                item_font = None
-            
-            # Add item name at the top
-            if item_name and item_name.strip():
-                # Truncate long item names to fit width
-                max_chars = 25 if self.page_size == '50x25mm Label' else 35
-                display_name = item_name[:max_chars] + "..." if len(item_name) > max_chars else item_name
-                
-                # Calculate text position (centered)
-                text_bbox = draw.textbbox((0, 0), display_name, font=item_font)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_x = max(0, (img.width - text_width) // 2)
-                
-                # Position text differently for thermal vs standard
-                if self.page_size == '50x25mm Label':
-                    # For thermal labels - text at top with more margin
-                    text_y = 5  # Close to top
-                else:
-                    # For standard labels
-                    text_y = 12
-                
-                # Draw item name with larger font and more top margin
-                draw.text((text_x, text_y), display_name, fill='black', font=item_font)
-            
-            return new_img
+            return add_item_name_to_image(self.get_render_config(), img, item_name, barcode_text)
         except Exception as e:
             frappe.log_error(f"Error adding text to image: {str(e)}")
             return img
 
     def add_text_to_image(self, img, text):
         """Add text below barcode image (fallback method)"""
-        try:
-            # Create new image with extra space for text
-            new_height = img.height + 30
-            new_img = Image.new('RGB', (img.width, new_height), 'white')
-            
-            # Paste original image
-            new_img.paste(img, (0, 0))
-            
-            # Add text
-            draw = ImageDraw.Draw(new_img)
-            
-            # Try to use a font, fallback to default
-            try:
-                font = ImageFont.load_default()
-            except:
-                font = None
-            
-            # Calculate text position (centered)
-            text_bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_x = (img.width - text_width) // 2
-            
-            # More spacing for thermal labels to prevent overlap
-            if self.page_size == '50x25mm Label':
-                text_y = img.height + 8  # More space for thermal labels
-            else:
-                text_y = img.height + 5  # Standard spacing
-            
-            draw.text((text_x, text_y), text, fill='black', font=font)
-            
-            return new_img
-        except:
-            return img
+        return add_text_to_image(self.get_render_config(), img, text)
 
     def create_error_image(self, code_text, error_msg):
         """Create an error placeholder image"""
-        img = Image.new('RGB', (200, 100), 'white')
-        draw = ImageDraw.Draw(img)
-        draw.rectangle([0, 0, 199, 99], outline='red', width=2)
+        return create_error_image(code_text, error_msg)
+
+    def get_preview(self, thumbnail_width=PREVIEW_THUMBNAIL_WIDTH):
+        """Thumbnails of the labels on the first page, rendered with the current settings"""
+        config = self.get_render_config()
+        layout = self.get_layout()
+
+        # Only as many rows as fill the first page are read
+        page = []
+        for item_name, barcode_num, qty in self.iter_input_codes():
+            page.extend([(item_name, barcode_num)] * min(qty, layout.codes_per_page - len(page)))
+            if len(page) >= layout.codes_per_page:
+                break
+
+        key = "barcode_preview:" + hashlib.sha1(
+            repr((astuple(config), astuple(layout), page, thumbnail_width)).encode()
+        ).hexdigest()
+        preview = frappe.cache().get_value(key)
+        if preview:
+            return preview
+
+        # Same render path and render cache as create_pdf, so a later run reuses these labels
+        thumbnails = {}
+        rendered = render_stream(config, list(dict.fromkeys(page)), cache=get_render_cache())
+        for item_name, barcode_num, img, error in rendered:
+            if img:
+                data = encode_image(make_thumbnail(img, thumbnail_width))
+                thumbnails[(item_name, barcode_num)] = "data:image/png;base64," + base64.b64encode(data).decode()
+            else:
+                thumbnails[(item_name, barcode_num)] = None
+
+        preview = {
+            "labels": [
+                {"item_name": item_name, "code": barcode_num, "image": thumbnails[(item_name, barcode_num)]}
+                for item_name, barcode_num in page
+            ],
+            "codes_per_row": layout.codes_per_row,
+            "codes_per_page": layout.codes_per_page,
+            "label_width_mm": round(layout.barcode_width / mm, 1),
+            "label_height_mm": round(layout.barcode_height / mm, 1),
+        }
+        frappe.cache().set_value(key, preview, expires_in_sec=PREVIEW_CACHE_TTL)
+        return preview
+
+    def get_render_chunk_size(self):
+        """Codes handed to a render worker at a time"""
+        return cint(frappe.conf.get("barcode_render_chunk_size")) or 50
+
+    def get_render_workers(self, total_codes):
+        """Size of the render process pool; small batches are rendered in-process"""
+        workers = cint(frappe.conf.get("barcode_render_workers")) or default_worker_count()
+        if total_codes <= self.get_render_chunk_size():
+            return 1
+        return workers
+
+    def iter_labels(self, config, codes, stats=None, workers=None):
+        """Stream (item_name, code, label, qty) for each code in order.
+
+        Raster labels come from the render cache or the render pool; vector
+        labels are module patterns drawn later. Nothing is buffered beyond the
+        render pool's in-flight window. Render counters are added to stats.
+        workers overrides the configured pool size; 1 renders in this process.
+        """
+        if config.is_vector:
+            stats = {} if stats is None else stats
+            for item_name, barcode_num, qty in codes:
+                try:
+                    symbol = encode_symbol(config.barcode_type, barcode_num)
+                except Exception as e:
+                    self.report_error(f"Error generating barcode for {barcode_num}: {str(e)}")
+                    stats["errors"] = stats.get("errors", 0) + 1
+                    symbol = None
+                stats["rendered"] = stats.get("rendered", 0) + 1
+                yield item_name, barcode_num, symbol, qty
+            return
+
+        # Each row is rendered once however many copies it asks for
+        rendered = render_stream(
+            config,
+            ((item_name, barcode_num) for item_name, barcode_num, _ in codes),
+            cache=get_render_cache(),
+            workers=workers or self.get_render_workers(len(codes)),
+            chunk_size=self.get_render_chunk_size(),
+            stats=stats
+        )
+        for (item_name, barcode_num, img, error), (_, _, qty) in zip(rendered, codes, strict=True):
+            if error:
+                self.report_error(error)
+            if img:
+                yield item_name, barcode_num, img, qty
+
+    def check_input_codes(self, codes, report):
+        """Rows that pass the validation pass, with missing check digits added if enabled; the rest go to report"""
+        codes, _ = validate_codes(
+            self.barcode_type, codes, add_check_digits=cint(self.add_check_digits), report=report
+        )
+        if report.invalid_count and self.on_invalid_code == "Stop":
+            frappe.throw(f"{report.invalid_count} of {report.checked} codes are invalid, see the Error Log for the list")
+        return codes
+
+    def report_error(self, message):
+        """Add a generation error to the run's report, or log it straight away outside a run"""
+        report = self.flags.validation_report
+        if report is None:
+            frappe.log_error(message)
+        else:
+            report.add_error(message)
+
+    def log_validation_report(self, report):
+        """Write the run's invalid codes and generation errors as one Error Log entry"""
+        if report:
+            frappe.log_error(
+                title=f"Barcode generation issues in {self.name}",
+                message=report.summary(),
+                reference_doctype=self.doctype,
+                reference_name=self.name,
+            )
+
+    def is_pdf_output(self):
+        """Whether the output is a PDF (or a ZIP of PDF volumes)"""
+        return (self.output_format or "PDF") == "PDF"
+
+    def is_printer_output(self):
+        """Whether the output is a ZPL/EPL command file rather than a PDF"""
+        return self.output_format in PRINTER_FORMATS
+
+    def build_output_manifest(self, config, layout, codes):
+        """Fingerprints of the settings and rows an output file is generated from"""
+        if self.is_printer_output():
+            extra = (self.output_format, self.get_printer_dots_per_mm())
+        elif self.output_format == "SVG":
+            extra = ("SVG",)
+        elif cint(self.large_batch_mode):
+            extra = (1, cint(self.max_pages_per_volume), flt(self.max_volume_size_mb))
+        else:
+            extra = (0,)
+        template = self.get_label_template()
+        if template and self.is_pdf_output():
+            extra += (astuple(template),)
+        if cint(self.private_output):
+            extra += ("private",)
+        return build_manifest(config, layout, codes, *extra)
+
+    def is_output_current(self, manifest):
+        """Whether generated_pdf was made from the same settings and rows and is still there"""
+        if not self.generated_pdf or not self.output_manifest:
+            return False
         
-        try:
-            font = ImageFont.load_default()
-        except:
-            font = None
-            
-        draw.text((10, 10), f"Error: {code_text}"[:20], fill='red', font=font)
-        draw.text((10, 30), "Invalid code", fill='red', font=font)
-        return img
+        previous = json.loads(self.output_manifest)
+        return (
+            is_same_output(manifest, previous)
+            and previous.get("file_url") == self.generated_pdf
+            and bool(frappe.db.exists("File", {"file_url": self.generated_pdf}))
+        )
+
+    def get_fingerprint_path(self):
+        """Row fingerprints of the last generated output"""
+        return get_work_path("barcode_fingerprints", f"{self.name}.json.gz")
+
+    def write_single_pdf(self, config, layout, labels, on_progress, metrics):
+        """Write all labels into one PDF attachment"""
+        file_name = f"barcodes_{self.name}.pdf"
+        with temp_output_file(file_name, self.private_output) as pdf_path:
+            # Written to the files folder directly; invariant mode gives the same bytes for the same labels
+            with metrics.stage("draw"):
+                c = canvas.Canvas(pdf_path, pagesize=layout.pagesize, invariant=1)
+                placed = place_labels(
+                    c, config, layout, labels,
+                    on_error=self.report_error, on_progress=on_progress, template=self.get_label_template()
+                )
+                c.save()
+
+            self.report_progress(percent=99, title="Saving PDF...")
+            file_doc = self.store_output(pdf_path, file_name, metrics)
+        return file_doc, placed
+
+    def store_output(self, path, file_name, metrics):
+        """Register a finished output file, reusing a stored file with the same content"""
+        metrics.count("bytes_written", os.path.getsize(path))
+        with metrics.stage("save"):
+            return store_output_file(self, path, file_name, self.private_output)
+
+    def get_previous_volumes(self, output_manifest):
+        """Path and volumes of the last bundle when it was made with the same settings, else (None, [])"""
+        if not self.generated_pdf or not self.output_manifest:
+            return None, []
+
+        previous = json.loads(self.output_manifest)
+        if previous.get("settings") != output_manifest["settings"] or previous.get("file_url") != self.generated_pdf:
+            return None, []
+
+        path = get_file_url_path(self.generated_pdf)
+        volumes = read_bundle_volumes(path)
+        return (path, volumes) if volumes else (None, [])
+
+    def write_volume_bundle(self, config, layout, codes, fingerprints, output_manifest, on_progress, metrics, render_stats):
+        """Write labels as size-capped PDF volumes streamed into a ZIP with a manifest.
+
+        Volumes of the last bundle whose labels are unchanged and in the same
+        place are copied from it; only the labels between them are rendered.
+        """
+        previous_bundle, previous_volumes = self.get_previous_volumes(output_manifest)
+        steps = plan_volume_reuse(codes, fingerprints, previous_volumes, layout.codes_per_page)
+        reused = [volume for action, volume in steps if action == "reuse"]
+        metrics.count("reused_volumes", len(reused))
+        metrics.count("reused_labels", sum(volume["labels"] for volume in reused))
+
+        # Render steps stay lazy: each one is rendered while it is drawn
+        steps = [
+            (action, metrics.timed("render", self.iter_labels(config, part, render_stats)) if action == "render" else part)
+            for action, part in steps
+        ]
+
+        file_name = f"barcodes_{self.name}.zip"
+        with temp_output_file(file_name, self.private_output) as zip_path:
+            with metrics.stage("draw"):
+                manifest = write_volume_bundle(
+                    zip_path,
+                    f"barcodes_{self.name}",
+                    config,
+                    layout,
+                    None,
+                    max_pages=cint(self.max_pages_per_volume) or 500,
+                    max_bytes=int(flt(self.max_volume_size_mb) * 1024 * 1024),
+                    on_error=self.report_error,
+                    on_progress=on_progress,
+                    manifest_extra={
+                        "document": self.name,
+                        "barcode_type": self.barcode_type,
+                        "page_size": self.page_size,
+                        "total_codes": self.total_codes,
+                    },
+                    template=self.get_label_template(),
+                    fingerprint=lambda item_name, code_text: row_fingerprint(config, code_text, item_name),
+                    steps=steps,
+                    previous_bundle=previous_bundle
+                )
+
+            self.report_progress(percent=99, title="Saving bundle...")
+            file_doc = self.store_output(zip_path, file_name, metrics)
+        return file_doc, manifest["total_labels"]
+
+    def get_printer_dots_per_mm(self):
+        """Printhead resolution ZPL/EPL labels are laid out for: 8 for 203 dpi, 12 for 300 dpi"""
+        return cint(frappe.conf.get("barcode_printer_dots_per_mm")) or DEFAULT_DOTS_PER_MM
+
+    def write_printer_file(self, config, layout, codes, on_progress, metrics):
+        """Write every row as a ZPL/EPL label program into one command file, with its copies as a print quantity"""
+        file_name = f"barcodes_{self.name}.{self.output_format.lower()}"
+        with temp_output_file(file_name, self.private_output) as output_path:
+            with metrics.stage("draw"):
+                placed = write_printer_file(
+                    output_path,
+                    self.output_format,
+                    config,
+                    LabelArea.from_points(layout.pagesize, self.get_printer_dots_per_mm()),
+                    codes,
+                    on_error=self.report_error,
+                    on_progress=on_progress,
+                )
+
+            self.report_progress(percent=99, title=f"Saving {self.output_format} file...")
+            file_doc = self.store_output(output_path, file_name, metrics)
+        return file_doc, placed
+
+    def write_svg_archive(self, config, layout, codes, on_progress, metrics):
+        """Write every row as an SVG file into one ZIP archive"""
+        file_name = f"barcodes_{self.name}_svg.zip"
+        with temp_output_file(file_name, self.private_output) as zip_path:
+            with metrics.stage("draw"):
+                placed = write_svg_archive(
+                    zip_path, config, layout, codes, on_error=self.report_error, on_progress=on_progress
+                )
+
+            self.report_progress(percent=99, title="Saving SVG archive...")
+            file_doc = self.store_output(zip_path, file_name, metrics)
+        return file_doc, placed
+
+    def report_progress(self, percent, title, description=""):
+        """Publish progress to the browser and to the background job record, if any"""
+        frappe.publish_progress(percent=percent, title=title, description=description)
+
+        job = self.flags.generation_job
+        if job:
+            job.update_progress(title.rstrip('.!'), percent)
 
     def create_pdf(self):
         """Generate PDF with all barcodes including item names"""
+        # Stage timings and counters end up on the run's Barcode Generation Job
+        metrics = RunMetrics()
+        render_stats = {}
+        # Invalid rows and generation errors are logged together once the run ends
+        report = ValidationReport()
+        self.flags.validation_report = report
         try:
-            self.generation_status = "In Progress"
-            self.save()
-            frappe.db.commit()
-            
-            codes = self.parse_input_data()
+            with metrics.stage("parse"):
+                codes = self.parse_input_data()
             if not codes:
                 frappe.throw("No codes to generate")
+
+            with metrics.stage("validate"):
+                codes = self.check_input_codes(codes, report)
+            metrics.count("invalid", report.invalid_count)
+            metrics.count("check_digits_added", report.fixed)
+            if not codes:
+                frappe.throw("None of the codes are valid, see the Error Log for the list")
             
-            # Generate all barcode images first
-            barcode_images = []
-            for i, (item_name, barcode_num) in enumerate(codes):
-                img = self.generate_barcode_image(barcode_num, item_name)
-                if img:
-                    barcode_images.append((item_name, barcode_num, img))
-                
-                # Update progress for long operations
-                if i % 50 == 0:
-                    frappe.publish_progress(
-                        percent=(i / len(codes)) * 50,  # 50% for image generation
-                        title="Generating barcodes...",
-                        description=f"Processing {i+1} of {len(codes)} codes"
-                    )
-            
-            # Create PDF
-            buffer = io.BytesIO()
-            page_size = self.get_page_size()
-            c = canvas.Canvas(buffer, pagesize=page_size)
-            
-            page_width, page_height = page_size
-            
-            # Handle thermal labels differently
-            if self.page_size == '50x25mm Label':
-                # For 50x25mm thermal labels - one barcode per label
-                margin = 1 * mm  # Minimal margin for thermal labels
-                codes_per_row = 1
-                codes_per_page = 1
-                
-                # Use user-specified dimensions for thermal labels
-                barcode_width = (self.barcode_width or 40) * mm   # Use form value or default 40mm
-                barcode_height = (self.barcode_height or 8) * mm  # Use form value or default 8mm
-                
-                # Calculate space needed for text based on font size
-                font_size = self.item_name_font_size or 12
-                text_space = max(6 * mm, font_size * 0.5 * mm)  # Ensure enough space for text
-                item_height = barcode_height + text_space + (2 * mm)  # Add padding
-                
-                x_spacing = page_width
-                y_spacing = page_height
-                
-            else:
-                # Standard paper sizes (A4, A5, Letter, Legal) - optimized for maximum density
-                margin = 15 * mm  # Reduced margin
-                codes_per_row = self.codes_per_row or 3
-                
-                # Optimized barcode dimensions for standard papers
-                standard_barcode_width = 35 * mm   # Slightly smaller width for better fit
-                standard_barcode_height = 15 * mm  # Optimized height for density
-                
-                # Use custom dimensions if specified, otherwise use optimized standards
-                barcode_width = (self.barcode_width * mm) if self.barcode_width else standard_barcode_width
-                barcode_height = (self.barcode_height * mm) if self.barcode_height else standard_barcode_height
-                
-                # Minimal padding for maximum density - just enough for text
-                font_size = self.item_name_font_size or 24
-                text_space = max(8 * mm, font_size * 0.4 * mm)  # Minimal text space
-                item_height = barcode_height + text_space + (3 * mm)  # Minimal total height
-                
-                # Calculate positions with minimal spacing
-                available_width = page_width - (2 * margin)
-                available_height = page_height - (2 * margin)
-                
-                # Minimal spacing for maximum density
-                x_spacing = available_width / codes_per_row
-                y_spacing = item_height + (5 * mm)  # Minimal vertical spacing between rows
-                
-                codes_per_page = int(available_height / y_spacing) * codes_per_row
+            config = self.get_render_config()
+            layout = self.get_layout()
+            metrics.count("codes", len(codes))
             
-            for i, (item_name, barcode_num, img) in enumerate(barcode_images):
-                # Check if we need a new page
-                if self.page_size == '50x25mm Label':
-                    # For thermal labels - each label gets its own page
-                    if i > 0:  # Start new page for every label after the first
-                        c.showPage()
-                else:
-                    # For standard paper - use grid layout
-                    if i > 0 and i % codes_per_page == 0:
-                        c.showPage()
-                
-                if self.page_size == '50x25mm Label':
-                    # For thermal labels - position barcode with space for text below
-                    x = (page_width - barcode_width) / 2  # Center horizontally
-                    
-                    # Position barcode in upper portion to leave space for text
-                    available_height = page_height - (2 * mm)  # Leave margins
-                    barcode_space = barcode_height
-                    text_space = max(6 * mm, (self.item_name_font_size or 12) * 0.5 * mm)
-                    
-                    # Position barcode from top, leaving space for text below
-                    y = page_height - margin - barcode_height - (2 * mm)  # From top with margin
-                else:
-                    # Standard paper positioning
-                    # Calculate position in grid with better centering
-                    row = (i % codes_per_page) // codes_per_row
-                    col = (i % codes_per_page) % codes_per_row
-                    
-                    # Center barcodes within their allocated space
-                    x = margin + (col * x_spacing) + ((x_spacing - barcode_width) / 2)
-                    y = page_height - margin - ((row + 1) * y_spacing) + ((y_spacing - item_height) / 2)
-                
-                # Draw barcode image with item name and barcode number
-                try:
-                    # Convert to RGB if needed
-                    if img.mode == 'RGBA':
-                        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                        rgb_img.paste(img, mask=img.split()[-1])
-                        img = rgb_img
-                    elif img.mode != 'RGB':
-                        img = img.convert('RGB')
-                    
-                    # Draw image with optimized dimensions
-                    c.drawInlineImage(
-                        img,  # Pass PIL Image directly
-                        x, y, 
-                        width=barcode_width, 
-                        height=barcode_height,  # Use actual barcode height, not item_height
-                        preserveAspectRatio=True
-                    )
-                except Exception as img_error:
-                    # Fallback: draw a rectangle with text
-                    c.setStrokeColor('red')
-                    c.rect(x, y, barcode_width, item_height)
-                    c.drawString(x + 5, y + (item_height/2), f"Error: {barcode_num}")
-                    frappe.log_error(f"Image drawing error for {barcode_num}: {str(img_error)}")
-                
-                # Update progress
-                if i % 20 == 0:
-                    frappe.publish_progress(
-                        percent=50 + ((i / len(barcode_images)) * 50),  # 50-100% for PDF generation
-                        title="Creating PDF...",
-                        description=f"Adding {i+1} of {len(barcode_images)} barcodes to PDF"
-                    )
+            # Same settings and rows as the file we already have: nothing to do
+            with metrics.stage("fingerprint"):
+                manifest = self.build_output_manifest(config, layout, codes)
+                is_current = self.is_output_current(manifest)
+            if is_current:
+                metrics.count("reused")
+                self.generation_status = "Completed"
+                with metrics.stage("save"):
+                    self.save()
+                self.record_run_metrics(metrics, render_stats)
+                self.report_progress(
+                    percent=100,
+                    title="Complete!",
+                    description="Nothing changed since the last run, kept the existing file"
+                )
+                return self.generated_pdf
             
-            c.save()
-            buffer.seek(0)
+            self.generation_status = "In Progress"
+            with metrics.stage("save"):
+                self.save()
+                frappe.db.commit()
             
-            # Save as attachment
-            file_name = f"barcodes_{self.name}.pdf"
+            # Besides the volumes a large batch reuses, every page is drawn again. Raster and Bilevel
+            # rows still in the render cache are not rendered again; Vector rows are always re-encoded
+            with metrics.stage("fingerprint"):
+                fingerprints = row_fingerprints(config, codes)
+                previous = set(read_json_gz(self.get_fingerprint_path(), default=[]))
+                changed = sum(1 for fingerprint in fingerprints if fingerprint not in previous)
+            metrics.count("changed", changed)
+            self.report_progress(
+                percent=0,
+                title="Generating barcodes...",
+                description=f"{changed} of {len(codes)} rows changed since the last run"
+            )
             
-            # Create file record
-            file_doc = frappe.get_doc({
-                "doctype": "File",
-                "file_name": file_name,
-                "content": buffer.getvalue(),
-                "attached_to_doctype": self.doctype,
-                "attached_to_name": self.name,
-                "is_private": 0
-            })
-            file_doc.save()
+            total = sum(qty for _, _, qty in codes)
+            output_name = "PDF" if self.is_pdf_output() else self.output_format
+
+            def on_progress(placed):
+                self.report_progress(
+                    percent=(placed / total) * 98,
+                    title="Generating barcodes...",
+                    description=f"Added {placed} of {total} barcodes to {output_name}"
+                )
+
+            if self.is_printer_output():
+                # The printer draws the barcodes itself; nothing is rendered
+                file_doc, placed = self.write_printer_file(config, layout, codes, on_progress, metrics)
+            elif self.output_format == "SVG":
+                # Bars are written as SVG paths straight from the encoded symbols; nothing is rendered
+                file_doc, placed = self.write_svg_archive(config, layout, codes, on_progress, metrics)
+            elif cint(self.large_batch_mode):
+                # Unchanged volumes of the last bundle are copied, only the labels between them are drawn
+                file_doc, placed = self.write_volume_bundle(
+                    config, layout, codes, fingerprints, manifest, on_progress, metrics, render_stats
+                )
+            else:
+                # Parse -> render -> place -> flush: each page is written as soon as it is full.
+                # Pulling the next label is timed as render, everything else the writer does as draw
+                labels = metrics.timed("render", self.iter_labels(config, codes, render_stats))
+                file_doc, placed = self.write_single_pdf(config, layout, labels, on_progress, metrics)
+            metrics.count("labels", placed)
+            metrics.count("pages", -(-placed // layout.codes_per_page))
             
             # Update document
-            self.generated_pdf = file_doc.file_url
-            self.generation_status = "Completed"
-            self.generated_on = now_datetime()
-            self.save()
+            with metrics.stage("save"):
+                manifest["file_url"] = file_doc.file_url
+                write_json_gz(self.get_fingerprint_path(), fingerprints)
+                self.output_manifest = json.dumps(manifest)
+                self.generated_pdf = file_doc.file_url
+                self.generation_status = "Completed"
+                self.generated_on = now_datetime()
+                self.save()
+            self.record_run_metrics(metrics, render_stats)
+            self.log_validation_report(report)
             
-            frappe.publish_progress(
-                percent=100,
-                title="Complete!",
-                description=f"Successfully generated PDF with {len(barcode_images)} barcodes"
-            )
+            description = f"Successfully generated {output_name} with {placed} barcodes"
+            if report.invalid_count:
+                description += f", skipped {report.invalid_count} invalid codes (see Error Log)"
+            self.report_progress(percent=100, title="Complete!", description=description)
             
             return file_doc.file_url
             
         except Exception as e:
             self.generation_status = "Failed"
             self.save()
+            self.record_run_metrics(metrics, render_stats)
+            self.log_validation_report(report)
             frappe.log_error(f"PDF generation failed: {str(e)}")
             frappe.throw(f"Failed to generate PDF: {str(e)}")
 
+    def record_run_metrics(self, metrics, render_stats):
+        """Store the run's timings and counters on its Barcode Generation Job, if it has one"""
+        for name in ("rendered", "cache_hits", "errors"):
+            metrics.count(name, render_stats.get(name, 0))
+        for step in ("barcode", "overlay"):
+            if f"{step}_seconds" in render_stats:
+                metrics.add_worker_time(step, render_stats[f"{step}_seconds"])
+
+        self.flags.run_metrics = metrics.as_dict()
+        job = self.flags.generation_job
+        if job:
+            try:
+                job.record_metrics(self.flags.run_metrics)
+            except Exception:
+                # The output file is already saved; missing metrics must not fail the run
+                frappe.log_error(title=f"Could not record run metrics for {self.name}")
+
+_render_caches = {}
+
+def get_render_cache():
+    """Process-wide render cache for the current site"""
+    site = frappe.local.site
+    cache = _render_caches.get(site)
+    if cache is None:
+        cache = RenderCache(
+            max_bytes=cint(frappe.conf.get("barcode_render_cache_mb") or 64) * 1024 * 1024,
+            disk_path=os.path.abspath(get_site_path("private", "files", "barcode_render_cache")),
+            disk_max_bytes=cint(frappe.conf.get("barcode_render_disk_cache_mb", 256)) * 1024 * 1024
+        )
+        _render_caches[site] = cache
+    return cache
+
 # API Methods remain the same...
 @frappe.whitelist()
-def generate_pdf(doc_name):
-    """API method to generate PDF"""
+def generate_pdf(doc_name, queued=0):
+    """API method to generate PDF, optionally as a background job on the long queue"""
     try:
         doc = frappe.get_doc("Bulk Barcode Generator", doc_name)
         if not doc.has_permission("write"):
             frappe.throw("Insufficient permissions")
-        
-        file_url = doc.create_pdf()
+        if doc.session_state == "Open":
+            frappe.throw("Seal the session before generating labels")
+
+        if cint(queued):
+            job = enqueue_pdf_generation(doc)
+            return {
+                "success": True,
+                "queued": True,
+                "job_id": job.name,
+                "message": "PDF generation queued"
+            }
+
+        # Runs in the request are logged as jobs too, so their metrics are kept
+        job = create_generation_job(doc, status="Running")
+        doc.flags.generation_job = job
+        try:
+            file_url = doc.create_pdf()
+        except Exception as e:
+            job.mark_failed(e)
+            raise
+        job.mark_completed(file_url)
         return {
             "success": True,
             "file_url": file_url,
+            "job_id": job.name,
             "message": "PDF generated successfully"
         }
     except Exception as e:
@@ -680,90 +830,249 @@ def generate_pdf(doc_name):
             "message": str(e)
         }
 
+def enqueue_pdf_generation(doc):
+    """Create a job record and queue PDF generation for it, reusing a pending job if one exists"""
+    pending = frappe.get_all(
+        "Barcode Generation Job",
+        filters={"generator": doc.name, "status": ["in", ["Queued", "Running"]]},
+        fields=["name", "status", "started_on"],
+        order_by="creation desc"
+    )
+    # The timeout only counts once a worker starts the job, however long it waited in the queue.
+    # A job Running past it has lost its worker (killed for memory or time) before recording a result
+    cutoff = add_to_date(now_datetime(), seconds=-(get_job_timeout() + STALE_JOB_GRACE))
+    for pending_job in pending:
+        job = frappe.get_doc("Barcode Generation Job", pending_job.name)
+        if pending_job.status == "Queued" or (pending_job.started_on and pending_job.started_on > cutoff):
+            return job
+        job.mark_failed("The worker stopped without reporting a result")
+
+    job = create_generation_job(doc, status="Queued")
+    doc.db_set("generation_status", "Queued")
+
+    frappe.enqueue(
+        "barcode_generator.barcode_generator.doctype.bulk_barcode_generator.bulk_barcode_generator.run_generation_job",
+        queue="long",
+        timeout=get_job_timeout(),
+        job_name=f"barcode_pdf_{doc.name}",
+        enqueue_after_commit=True,
+        generation_job=job.name
+    )
+    return job
+
+def get_job_timeout():
+    """Seconds a queued generation job may run before the worker stops it"""
+    return cint(frappe.conf.get("barcode_job_timeout")) or 3600
+
+def create_generation_job(doc, status):
+    """Insert the job record of a generation run, either Queued or Running"""
+    job = frappe.get_doc({
+        "doctype": "Barcode Generation Job",
+        "generator": doc.name,
+        "status": status,
+        "stage": status,
+        "total_codes": doc.total_codes,
+        "queued_on": now_datetime(),
+        "started_on": now_datetime() if status == "Running" else None
+    })
+    job.insert(ignore_permissions=True)
+    return job
+
+def run_generation_job(generation_job):
+    """Background worker entry point for a queued generation job"""
+    job = frappe.get_doc("Barcode Generation Job", generation_job)
+    if job.status != "Queued":
+        # Already run, or failed while it waited; running it now would write the output twice
+        return
+    job.mark_running()
+
+    try:
+        doc = frappe.get_doc("Bulk Barcode Generator", job.generator)
+        doc.flags.generation_job = job
+        file_url = doc.create_pdf()
+        job.mark_completed(file_url)
+    except Exception as e:
+        # create_pdf has already logged the failure and marked the document as Failed
+        job.mark_failed(e)
+
 @frappe.whitelist()
-def preview_codes(input_data):
-    """Preview first few codes from input data with improved parsing"""
+def get_generation_status(job_id):
+    """Report stage, percent and result URL of a queued generation job"""
     try:
-        codes = []
-        for line in input_data.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
-            # More flexible parsing to handle different formats
-            if ',' in line:
-                # CSV format: Item Name,Barcode
-                parts = line.split(',', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    if item_name and barcode_num:
-                        codes.append(f"{item_name} → {barcode_num}")
-                    elif barcode_num:
-                        codes.append(f"(No Item Name) → {barcode_num}")
-                    else:
-                        codes.append(f"(Invalid Entry) → {line}")
-                else:
-                    # Single value in CSV format line
-                    clean_line = line.replace(',', '').strip()
-                    if clean_line:
-                        codes.append(f"(No Item Name) → {clean_line}")
-                        
-            elif '\t' in line:
-                # Tab-separated: Item Name\tBarcode
-                parts = line.split('\t', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    if item_name and barcode_num:
-                        codes.append(f"{item_name} → {barcode_num}")
-                    elif barcode_num:
-                        codes.append(f"(No Item Name) → {barcode_num}")
-                    else:
-                        codes.append(f"(Invalid Entry) → {line}")
-                else:
-                    clean_line = line.replace('\t', '').strip()
-                    if clean_line:
-                        codes.append(f"(No Item Name) → {clean_line}")
-                        
-            elif '|' in line:
-                # Pipe-separated: Item Name | Barcode
-                parts = line.split('|', 1)
-                if len(parts) == 2:
-                    item_name = parts[0].strip()
-                    barcode_num = parts[1].strip()
-                    if item_name and barcode_num:
-                        codes.append(f"{item_name} → {barcode_num}")
-                    elif barcode_num:
-                        codes.append(f"(No Item Name) → {barcode_num}")
-                    else:
-                        codes.append(f"(Invalid Entry) → {line}")
+        job = frappe.get_doc("Barcode Generation Job", job_id)
+        if not frappe.has_permission("Bulk Barcode Generator", "read", job.generator):
+            frappe.throw("Insufficient permissions")
+
+        status = job.as_status()
+        status["success"] = True
+        return status
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+@frappe.whitelist()
+def get_generation_metrics(doc_name=None, job_id=None, limit=20):
+    """Stage timings and counters of one run, or of a generator's most recent runs"""
+    try:
+        if job_id:
+            jobs = [frappe.get_doc("Barcode Generation Job", job_id)]
+            doc_name = jobs[0].generator
+        if not doc_name:
+            frappe.throw("Pass a generator or a job id")
+        if not frappe.has_permission("Bulk Barcode Generator", "read", doc_name):
+            frappe.throw("Insufficient permissions")
+
+        if not job_id:
+            names = frappe.get_all(
+                "Barcode Generation Job",
+                filters={"generator": doc_name},
+                pluck="name",
+                order_by="creation desc",
+                limit=min(cint(limit) or 20, 200)
+            )
+            jobs = [frappe.get_doc("Barcode Generation Job", name) for name in names]
+
+        return {
+            "success": True,
+            "runs": [job.as_metrics() for job in jobs]
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+@frappe.whitelist()
+def open_session(title, settings=None):
+    """Create a generator that codes are appended to in chunks; returns its name"""
+    settings = json.loads(settings) if isinstance(settings, str) else dict(settings or {})
+    for fieldname in SESSION_MANAGED_FIELDS:
+        settings.pop(fieldname, None)
+    
+    doc = frappe.get_doc({
+        **settings,
+        "doctype": "Bulk Barcode Generator",
+        "title": title,
+        "session_state": "Open",
+        "codes_hash": frappe.generate_hash(length=16),
+        "total_codes": 0
+    })
+    doc.insert()
+    write_codes(doc.get_codes_path(), [])
+    
+    return {
+        "success": True,
+        "session": doc.name
+    }
+
+@frappe.whitelist()
+def append_to_session(session, rows):
+    """Validate a chunk of rows and add the ones not already in the session.
+
+    rows is a list of {"item_name", "code", "qty"} objects (or [item_name, code, qty]
+    lists). Rejected rows are reported with their position in the chunk.
+    """
+    rows = json.loads(rows) if isinstance(rows, str) else rows
+    if len(rows) > SESSION_CHUNK_LIMIT:
+        frappe.throw(f"At most {SESSION_CHUNK_LIMIT} rows can be appended at a time")
+    
+    # Lock the document so concurrent appends to one session are applied in turn
+    doc = frappe.get_doc("Bulk Barcode Generator", session, for_update=True)
+    doc.check_permission("write")
+    if doc.session_state != "Open":
+        frappe.throw("Codes can only be appended to an open session")
+    
+    codes = []
+    positions = []
+    rejected = []
+    for index, row in enumerate(rows):
+        if isinstance(row, dict):
+            item_name, code_text, qty = row.get("item_name"), row.get("code"), row.get("qty")
+        else:
+            item_name, code_text, qty = (list(row) + [None] * 3)[:3]
+        parsed = parse_fields(item_name, code_text, qty, index)
+        if parsed.error:
+            rejected.append({"row": index, "error": parsed.error})
+        else:
+            codes.append((parsed.item_name, parsed.code, parsed.qty))
+            positions.append(index)
+    
+    # Same symbology checks as a generation run, with every invalid row listed
+    report = ValidationReport(max_rows=len(codes))
+    codes, _ = validate_codes(doc.barcode_type, codes, add_check_digits=cint(doc.add_check_digits), report=report)
+    rejected += [{"row": positions[row_no - 1], "error": reason} for row_no, _, reason in report.rows]
+    rejected.sort(key=lambda reject: reject["row"])
+    
+    path = doc.get_codes_path()
+    fresh = new_codes(path, codes)
+    total_codes = cint(doc.total_codes) + sum(qty for _, _, qty in fresh)
+    if total_codes > 1000 and not cint(doc.large_batch_mode):
+        frappe.throw("Maximum 1000 codes allowed per batch. Enable Large Batch Mode for bigger runs.")
+    
+    append_codes(path, fresh)
+    sample = doc.codes_sample.split("\n") if doc.codes_sample else []
+    sample += [format_input_line(*code) for code in fresh[:CODES_SAMPLE_SIZE - len(sample)]]
+    doc.db_set({
+        "total_codes": total_codes,
+        "codes_sample": "\n".join(sample)
+    })
+    
+    return {
+        "success": True,
+        "accepted": len(fresh),
+        "duplicates": len(codes) - len(fresh),
+        "rejected": rejected,
+        "total_codes": total_codes
+    }
+
+@frappe.whitelist()
+def seal_session(session, generate=0):
+    """Close a session to further appends, optionally queueing its PDF"""
+    doc = frappe.get_doc("Bulk Barcode Generator", session, for_update=True)
+    doc.check_permission("write")
+    if doc.session_state != "Open":
+        frappe.throw("Session is already sealed")
+    
+    doc.session_state = "Sealed"
+    doc.save()
+    
+    result = {
+        "success": True,
+        "total_codes": doc.total_codes
+    }
+    if cint(generate):
+        result["job_id"] = enqueue_pdf_generation(doc).name
+    return result
+
+@frappe.whitelist()
+def preview_codes(input_data=None, doc_name=None):
+    """Preview first few codes from input data, or from a saved document's parsed codes"""
+    try:
+        if input_data is None and doc_name:
+            doc = frappe.get_doc("Bulk Barcode Generator", doc_name)
+            doc.check_permission("read")
+            rows = islice(doc.iter_input_codes(), PREVIEW_SIZE)
+            codes = [_preview_entry(item_name, barcode_num, qty) for item_name, barcode_num, qty in rows]
+            total_count = doc.total_codes
+        else:
+            codes = []
+            # Only the first page is parsed; the rest of the input is just counted
+            for row in islice(iter_rows(input_data), PREVIEW_SIZE):
+                if row.error:
+                    codes.append(f"(Invalid Entry: {row.error}) → line {row.line_no}")
                 else:
-                    clean_line = line.replace('|', '').strip()
-                    if clean_line:
-                        codes.append(f"(No Item Name) → {clean_line}")
-            else:
-                # Plain barcode number or unrecognized format
-                clean_line = line.strip()
-                if clean_line:
-                    # Check if it looks like a valid barcode (numbers, letters, some special chars)
-                    if re.match(r'^[A-Za-z0-9\-_\.]+$', clean_line):
-                        codes.append(f"(No Item Name) → {clean_line}")
-                    else:
-                        # If it contains spaces, treat first part as item name, rest as barcode
-                        parts = clean_line.split(' ', 1)
-                        if len(parts) == 2 and re.match(r'^[A-Za-z0-9\-_\.]+$', parts[1].replace(' ', '')):
-                            codes.append(f"{parts[0]} → {parts[1]}")
-                        else:
-                            codes.append(f"(No Item Name) → {clean_line}")
+                    codes.append(_preview_entry(row.item_name, row.code, row.qty))
+            total_count = count_rows(input_data)
         
         # Return first 10 codes for preview
         return {
             "success": True,
-            "codes": codes[:10],
-            "total_count": len(codes),
-            "has_more": len(codes) > 10,
-            "format_info": "Supported formats: 'Item Name,Barcode' or 'Item Name | Barcode' or just 'Barcode'"
+            "codes": codes,
+            "total_count": total_count,
+            "has_more": total_count > PREVIEW_SIZE,
+            "format_info": "Supported formats: 'Item Name,Barcode' or 'Item Name | Barcode' or just 'Barcode', optionally followed by ',Qty'"
         }
     except Exception as e:
         return {
@@ -771,18 +1080,51 @@ def preview_codes(input_data):
             "message": str(e)
         }
 
+def _preview_entry(item_name, barcode_num, qty):
+    entry = f"{item_name} → {barcode_num}" if item_name else f"(No Item Name) → {barcode_num}"
+    if qty > 1:
+        entry += f" × {qty}"
+    return entry
+
+@frappe.whitelist()
+def preview_labels(doc_name, settings=None):
+    """Render the first page of a saved generator's labels as thumbnails, with the form's unsaved layout settings"""
+    try:
+        doc = frappe.get_doc("Bulk Barcode Generator", doc_name)
+        doc.check_permission("read")
+        
+        # The rows always come from the saved document; only layout and symbology fields are taken from the client
+        apply_render_settings(doc, settings)
+        if not doc.input_data and not doc.upload_file and not doc.session_state:
+            return {
+                "success": False,
+                "message": "Please upload a file or enter some codes manually first"
+            }
+        
+        return {
+            "success": True,
+            **doc.get_preview()
+        }
+    except frappe.PermissionError:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
 @frappe.whitelist()
 def download_template():
     """Generate and download a sample CSV template"""
     try:
         # Create sample data
         sample_data = [
-            ["Item Name", "Barcode Number"],
-            ["1/2 PIPE CPVC NIPRO", "01192202500024"],
-            ["3/4 ELBOW CPVC", "01192202500025"],
-            ["TEE JOINT CPVC", "01192202500026"],
-            ["COUPLING CPVC", "01192202500027"],
-            ["VALVE BALL 1/2", "01192202500028"]
+            ["Item Name", "Barcode Number", "Qty"],
+            ["1/2 PIPE CPVC NIPRO", "01192202500024", 1],
+            ["3/4 ELBOW CPVC", "01192202500025", 1],
+            ["TEE JOINT CPVC", "01192202500026", 5],
+            ["COUPLING CPVC", "01192202500027", 1],
+            ["VALVE BALL 1/2", "01192202500028", 2]
         ]
         
         # Create CSV in memory
@@ -804,4 +1146,131 @@ def download_template():
         }
         
     except Exception as e:
-        frappe.throw(f"Error generating template: {str(e)}")
\ No newline at end of file
+        frappe.throw(f"Error generating template: {str(e)}")
+
+@frappe.whitelist()
+def render_barcodes(codes, output="png", settings=None):
+    """Stream PNG, SVG or PDF bytes for codes without saving a document or a file.
+
+    Responses carry an ETag derived from the codes and settings, so a client
+    repeating a request gets a 304 without anything being rendered.
+    """
+    frappe.has_permission("Bulk Barcode Generator", "read", throw=True)
+    doc, rows, output = prepare_render(codes, output, settings)
+
+    etag = get_render_etag(doc, rows, output)
+    response = Response(content_type=RENDER_CONTENT_TYPES[output])
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = cint(frappe.conf.get("barcode_render_max_age")) or RENDER_MAX_AGE
+    if frappe.request and frappe.request.if_none_match.contains(etag):
+        response.status_code = 304
+        return response
+
+    response.set_data(render_output(doc, rows, output))
+    if output == "pdf":
+        response.headers["Content-Disposition"] = 'inline; filename="barcodes.pdf"'
+    return response
+
+def render_codes(codes, output="png", settings=None):
+    """Rendered bytes and content type for codes, using the render cache but no document or file"""
+    doc, rows, output = prepare_render(codes, output, settings)
+    return render_output(doc, rows, output), RENDER_CONTENT_TYPES[output]
+
+def prepare_render(codes, output, settings):
+    """Unsaved generator holding the render settings, the validated rows and the output type"""
+    output = (output or "png").lower()
+    if output not in RENDER_CONTENT_TYPES:
+        frappe.throw(f"Output must be one of: {', '.join(RENDER_CONTENT_TYPES)}")
+
+    doc = frappe.new_doc("Bulk Barcode Generator")
+    apply_render_settings(doc, settings)
+
+    rows = parse_render_codes(codes)
+    if not rows:
+        frappe.throw("No codes to render")
+    if len(rows) > RENDER_CODE_LIMIT:
+        frappe.throw(f"At most {RENDER_CODE_LIMIT} codes can be rendered per request")
+    if output != "pdf" and (len(rows) > 1 or rows[0][2] > 1):
+        frappe.throw(f"{output.upper()} output holds a single label; use pdf for several")
+
+    # Fail the request up front instead of logging an error per bad code
+    rows, report = validate_codes(doc.barcode_type, rows, add_check_digits=cint(doc.add_check_digits))
+    if report.invalid_count:
+        frappe.throw("Invalid codes: " + "; ".join(f"{code_text}: {reason}" for _, code_text, reason in report.rows[:10]))
+    return doc, rows, output
+
+def apply_render_settings(doc, settings):
+    """Set the RENDER_SETTINGS fields found in settings on doc, any other key being ignored, and check the layout they give"""
+    settings = json.loads(settings) if isinstance(settings, str) else dict(settings or {})
+    for fieldname in RENDER_SETTINGS:
+        if fieldname in settings:
+            # The document is not saved with these, so values are cast here the way saving would
+            doc.set(fieldname, doc.cast(settings[fieldname], doc.meta.get_field(fieldname)))
+    doc.validate_layout()
+
+def parse_render_codes(codes):
+    """(item_name, code, qty) rows from a code, a list of codes, or [item_name, code, qty] / {"item_name", "code", "qty"} entries"""
+    if isinstance(codes, str):
+        try:
+            codes = json.loads(codes)
+        except ValueError:
+            pass
+    if not isinstance(codes, list):
+        codes = [codes]
+
+    rows = []
+    for index, entry in enumerate(codes):
+        if isinstance(entry, dict):
+            parsed = parse_fields(entry.get("item_name"), entry.get("code"), entry.get("qty"), index)
+        elif isinstance(entry, (list, tuple)):
+            parsed = parse_fields(*(list(entry) + [None] * 3)[:3], index)
+        else:
+            parsed = parse_fields("", entry, 1, index)
+        if parsed.error:
+            frappe.throw(f"Code {index + 1}: {parsed.error}")
+        rows.append((parsed.item_name, parsed.code, parsed.qty))
+    return rows
+
+def get_render_etag(doc, rows, output):
+    """Entity tag of a render: the same codes, settings and renderer give the same bytes"""
+    layout = doc.get_layout()
+    template = doc.get_label_template()
+    payload = repr((
+        CACHE_VERSION, output, astuple(doc.get_render_config()), astuple(layout),
+        astuple(template) if template else None, rows
+    ))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def render_output(doc, rows, output):
+    """Bytes of a single PNG or SVG label, or of a PDF with every row"""
+    config = doc.get_render_config()
+    layout = doc.get_layout()
+
+    if output == "png":
+        item_name, code_text, _ = rows[0]
+        img = doc.generate_barcode_image(code_text, item_name)
+        if img is None:
+            frappe.throw(f"Could not render {code_text}")
+        return encode_image(img)
+
+    if output == "svg":
+        item_name, code_text, _ = rows[0]
+        symbol = encode_symbol(config.barcode_type, code_text)
+        return symbol_svg(config, symbol, item_name, layout.barcode_width, layout.barcode_height).encode('utf-8')
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=layout.pagesize)
+    # Rendered in the web worker itself: a process pool per request would cost more than the labels
+    place_labels(
+        c, config, layout, doc.iter_labels(config, rows, workers=1),
+        on_error=frappe.log_error, template=doc.get_label_template()
+    )
+    c.save()
+    return buffer.getvalue()
+
+@frappe.whitelist()
+def get_render_cache_stats():
+    """Hit/miss counters of this worker's render cache"""
+    frappe.only_for("System Manager")
+    return get_render_cache().stats()
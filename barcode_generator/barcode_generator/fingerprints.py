@@ -0,0 +1,56 @@
+# Fingerprints of a generated output, used to tell whether a run can reuse it.
+#
+# The settings and the parsed rows each get one digest, so an unchanged
+# document is recognised without touching any label. Row fingerprints are the
+# (shortened) render cache keys. Comparing them with the last run's counts
+# the changed rows, and large-batch bundles record a digest of each volume's
+# row fingerprints so unchanged volumes can be copied into the next bundle
+# (see volumes.plan_volume_reuse).
+
+import hashlib
+from dataclasses import astuple
+
+from barcode_generator.barcode_generator.render_cache import render_key
+
+MANIFEST_VERSION = 1
+
+# Hex digits kept per row fingerprint
+ROW_FINGERPRINT_LENGTH = 16
+
+
+def settings_fingerprint(config, layout, *extra):
+    """Digest of everything besides the rows that shapes the output file"""
+    return hashlib.sha1(repr((MANIFEST_VERSION, astuple(config), astuple(layout), extra)).encode()).hexdigest()
+
+
+def rows_fingerprint(codes):
+    """Digest of the parsed (item_name, code, qty) rows, in order"""
+    digest = hashlib.sha1()
+    for item_name, code_text, qty in codes:
+        digest.update(f"{item_name}\x1f{code_text}\x1f{qty}\n".encode())
+    return digest.hexdigest()
+
+
+def row_fingerprint(config, code_text, item_name):
+    """A row's fingerprint: its render cache key, shortened"""
+    return render_key(config, code_text, item_name)[:ROW_FINGERPRINT_LENGTH]
+
+
+def row_fingerprints(config, codes):
+    return [row_fingerprint(config, code_text, item_name) for item_name, code_text, _ in codes]
+
+
+def build_manifest(config, layout, codes, *extra):
+    return {
+        "version": MANIFEST_VERSION,
+        "settings": settings_fingerprint(config, layout, *extra),
+        "rows": rows_fingerprint(codes),
+        "total_rows": len(codes),
+    }
+
+
+def is_same_output(manifest, previous):
+    """Whether previous was produced from the same settings and rows as manifest"""
+    if not previous or previous.get("version") != MANIFEST_VERSION:
+        return False
+    return previous.get("settings") == manifest["settings"] and previous.get("rows") == manifest["rows"]
@@ -0,0 +1,54 @@
+# Process-wide font registry.
+#
+# Fonts are resolved and parsed once per (font path, size) and reused for every
+# label rendered by this process, instead of probing the file system per image.
+
+import os
+from functools import cache, lru_cache
+
+from PIL import ImageFont
+
+# Tried in order when no font path is configured
+FONT_SEARCH_PATHS = (
+    "/System/Library/Fonts/Arial.ttf",  # macOS
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux
+    "arial.ttf",  # Windows
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",  # Alternative Linux fonts
+)
+
+
+@cache
+def resolve_font_path(font_path=""):
+    """First loadable TrueType font, preferring the configured one; None if there is none"""
+    candidates = (font_path, *FONT_SEARCH_PATHS) if font_path else FONT_SEARCH_PATHS
+    for path in candidates:
+        # Bare file names are looked up in the system font directories by FreeType
+        if os.path.isabs(path) and not os.path.exists(path):
+            continue
+        try:
+            ImageFont.truetype(path, 10)
+            return path
+        except OSError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=128)
+def get_font(size, font_path=""):
+    """TrueType font at size, falling back to PIL's default font"""
+    path = resolve_font_path(font_path)
+    if path:
+        return ImageFont.truetype(path, size)
+    return get_default_font()
+
+
+@lru_cache(maxsize=1)
+def get_default_font():
+    return ImageFont.load_default()
+
+
+def warm_up(sizes=(), font_path=""):
+    """Load fonts ahead of the first label; used as the render pool initializer"""
+    get_default_font()
+    for size in sizes:
+        get_font(size, font_path)
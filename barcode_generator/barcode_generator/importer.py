@@ -0,0 +1,247 @@
+# Streaming import of uploaded CSV/Excel files into (item_name, barcode, qty) rows.
+#
+# Files are read in chunks (the csv module's reader for CSV, openpyxl's
+# read-only row iterator for .xlsx) and every chunk is normalised with column
+# operations, so memory stays flat however long the sheet is. CSV rows are
+# fixed to the width of the header row; rows with more fields than the header
+# are left out and reported, never dropped silently. Rows keep their columns all the
+# way to the code store; they are never joined back into text, so item names
+# and barcodes may contain commas.
+
+import csv
+from itertools import islice
+
+from barcode_generator.barcode_generator.tokenizer import MAX_QUANTITY, QUANTITY_HEADERS
+
+# Try to import pandas, fall back to row-by-row normalisation if not available
+try:
+    import pandas as pd
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+try:
+    from openpyxl import load_workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+# Rows read and normalised at a time
+CHUNK_SIZE = 20000
+
+
+def format_input_line(item_name, barcode_num, qty=1):
+    """Display line for one row, as shown in the codes sample"""
+    qty = max(qty, 0)
+    if qty != 1:
+        return f"{item_name},{barcode_num},{qty}"
+    return f"{item_name},{barcode_num}" if item_name else barcode_num
+
+
+def iter_upload_rows(file_path, item_column=None, barcode_column=None, chunk_size=CHUNK_SIZE, on_bad_line=None):
+    """Yield lists of (item_name, barcode, qty) rows for an uploaded CSV/Excel file, one list per chunk.
+
+    The first row is the header. item_column and barcode_column pick columns by
+    header name (case-insensitive); by default the first column is the item
+    name and the second the barcode, or the only column is the barcode. A
+    Qty/Quantity/Copies column is picked up automatically. Rows without a
+    barcode, with no copies, or repeating an earlier item/barcode pair are
+    dropped. CSV rows with more fields than the header are left out and
+    reported through on_bad_line(line_no).
+    """
+    lower = file_path.lower()
+    if lower.endswith('.csv'):
+        header, chunks = _read_csv(file_path, chunk_size, on_bad_line)
+    elif lower.endswith('.xlsx'):
+        header, chunks = _read_xlsx(file_path, chunk_size)
+    elif lower.endswith('.xls'):
+        header, chunks = _read_xls(file_path)
+    else:
+        raise ValueError("Supported file formats: CSV, Excel (.xlsx, .xls)")
+
+    columns = resolve_columns(header, item_column, barcode_column)
+    seen = set()
+    for chunk in chunks:
+        if HAS_PANDAS:
+            rows = _frame_rows(chunk, columns, seen)
+        else:
+            rows = _row_rows(chunk, columns, seen)
+        if rows:
+            yield rows
+
+
+def resolve_columns(header, item_column=None, barcode_column=None):
+    """Positions of the item name, barcode and quantity columns; item and quantity may be None"""
+    names = [str(name).strip().lower() if name is not None else "" for name in header]
+    if not names:
+        raise ValueError("File must contain at least one column")
+
+    def find(name):
+        try:
+            return names.index(name.strip().lower())
+        except ValueError:
+            raise ValueError(f"Column '{name}' not found. Columns in file: {', '.join(map(str, header))}")
+
+    barcode = find(barcode_column) if barcode_column else (1 if len(names) >= 2 else 0)
+    if item_column:
+        item = find(item_column)
+    else:
+        item = 0 if len(names) >= 2 and barcode != 0 else None
+
+    if item == barcode:
+        raise ValueError("Item name and barcode must be different columns")
+
+    qty = next(
+        (i for i, name in enumerate(names) if name in QUANTITY_HEADERS and i not in (item, barcode)),
+        None
+    )
+    return item, barcode, qty
+
+
+def _read_csv(file_path, chunk_size, on_bad_line=None):
+    # utf-8-sig to handle BOM
+    with open(file_path, encoding='utf-8-sig', newline='') as csvfile:
+        sample = csvfile.read(1024)
+        csvfile.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+        except csv.Error:
+            delimiter = ','
+        header = next(csv.reader(csvfile, delimiter=delimiter), [])
+
+    def chunks():
+        for batch in _csv_row_chunks(file_path, delimiter, len(header), chunk_size, on_bad_line):
+            yield pd.DataFrame.from_records(batch, columns=range(len(header))) if HAS_PANDAS else batch
+
+    return header, chunks()
+
+
+def _csv_row_chunks(file_path, delimiter, width, chunk_size, on_bad_line=None):
+    """Batches of data rows padded to the header width; wider rows are reported instead"""
+    # pandas' C parser takes the width from the first data row and can only skip
+    # wider rows silently, so rows are split here and only normalised by pandas
+    with open(file_path, encoding='utf-8-sig', newline='') as csvfile:
+        reader = csv.reader(csvfile, delimiter=delimiter)
+        next(reader, None)
+
+        def rows():
+            for row in reader:
+                if len(row) > width:
+                    if on_bad_line:
+                        on_bad_line(reader.line_num)
+                    continue
+                yield row + [""] * (width - len(row))
+
+        yield from _batched(rows(), chunk_size)
+
+
+def _read_xlsx(file_path, chunk_size):
+    if not HAS_OPENPYXL:
+        raise ValueError("Excel file support requires openpyxl. Please use CSV format or install openpyxl.")
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = list(next(rows, None) or [])
+
+    def chunks():
+        try:
+            for batch in _batched(rows, chunk_size):
+                # Cells become text here: a numeric column with a blank cell would
+                # otherwise turn into floats and 123456 into "123456.0"
+                batch = [tuple(_xlsx_text(value) for value in row) for row in batch]
+                yield pd.DataFrame.from_records(batch) if HAS_PANDAS else batch
+        finally:
+            # Read-only workbooks keep the file open until closed
+            workbook.close()
+
+    return header, chunks()
+
+
+def _read_xls(file_path):
+    if not HAS_PANDAS:
+        raise ValueError("Excel file support requires pandas. Please use CSV format or install pandas.")
+
+    # Legacy .xls has no streaming reader; these files are capped at 65536 rows anyway
+    frame = pd.read_excel(file_path, header=None, dtype=str)
+    header = frame.iloc[0].tolist() if len(frame) else []
+    return header, [frame.iloc[1:]]
+
+
+def _batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _xlsx_text(value):
+    """Text of an .xlsx cell value, with whole numbers written without a decimal point"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _frame_rows(frame, columns, seen):
+    """Normalise one chunk with column operations and return its new rows"""
+    item, barcode, qty = columns
+
+    codes = _clean(frame, barcode)
+    items = _clean(frame, item)
+    keep = codes != ""
+
+    if qty is not None and qty in frame.columns:
+        quantities = pd.to_numeric(frame[qty], errors='coerce').fillna(1).clip(0, MAX_QUANTITY).astype(int)
+        keep &= quantities > 0
+    else:
+        quantities = pd.Series(1, index=frame.index)
+
+    # First occurrence of an item/barcode pair wins, across chunks too. One set
+    # lookup per row is far cheaper than Series.isin against a growing set
+    keep = keep.to_numpy(dtype=bool, copy=True)
+    keys = (items + "\x1f" + codes).to_numpy(dtype=object)
+    for row in keep.nonzero()[0]:
+        if keys[row] in seen:
+            keep[row] = False
+        else:
+            seen.add(keys[row])
+
+    return list(zip(items[keep].tolist(), codes[keep].tolist(), quantities[keep].tolist(), strict=True))
+
+
+def _clean(frame, column):
+    if column is None or column not in frame.columns:
+        return pd.Series("", index=frame.index, dtype=object)
+    return frame[column].fillna("").astype(str).str.strip()
+
+
+def _row_rows(rows, columns, seen):
+    """Row-by-row equivalent of _frame_rows when pandas is not installed"""
+    item, barcode, qty = columns
+    codes = []
+    for row in rows:
+        barcode_num = _cell(row, barcode)
+        item_name = _cell(row, item)
+        copies = _quantity(_cell(row, qty)) if qty is not None else 1
+        key = (item_name, barcode_num)
+        if not barcode_num or not copies or key in seen:
+            continue
+        seen.add(key)
+        codes.append((item_name, barcode_num, copies))
+    return codes
+
+
+def _cell(row, index):
+    if index is None or index >= len(row) or row[index] is None:
+        return ""
+    return str(row[index]).strip()
+
+
+def _quantity(value):
+    try:
+        return min(max(int(float(value)), 0), MAX_QUANTITY)
+    except ValueError:
+        return 1
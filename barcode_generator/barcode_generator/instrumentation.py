@@ -0,0 +1,76 @@
+# Per-stage timers and counters for one generation run.
+#
+# Stages are timed exclusively: while a nested stage runs, the clock of the
+# stage around it is paused, so the stage times of a run add up to its wall
+# time. Streaming stages (rendering interleaved with PDF drawing) are timed by
+# wrapping the label iterator, charging each next() to the producing stage.
+# Time spent inside render worker processes is kept apart as worker time,
+# since it overlaps the wall time of the run.
+
+import time
+from contextlib import contextmanager
+
+
+class RunMetrics:
+    """Stage times in seconds and named counters collected while a run executes"""
+
+    def __init__(self):
+        self.stages = {}
+        self.worker_seconds = {}
+        self.counters = {}
+        self._stack = []
+        self._started = time.perf_counter()
+        self._mark = self._started
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name"""
+        self._switch(name)
+        try:
+            yield
+        finally:
+            self._switch(None)
+
+    def timed(self, name, iterable):
+        """Yield from iterable, charging the time spent producing each item to stage name"""
+        iterator = iter(iterable)
+        while True:
+            self._switch(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._switch(None)
+            yield item
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_worker_time(self, name, seconds):
+        """Record time measured inside worker processes"""
+        self.worker_seconds[name] = self.worker_seconds.get(name, 0.0) + seconds
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self._started
+
+    def as_dict(self):
+        return {
+            "total_seconds": round(self.total_seconds, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "worker_seconds": {name: round(seconds, 4) for name, seconds in self.worker_seconds.items()},
+            "counters": dict(self.counters),
+        }
+
+    def _switch(self, name):
+        """Charge the time since the last switch to the running stage, then enter name (or leave it if None)"""
+        now = time.perf_counter()
+        if self._stack:
+            running = self._stack[-1]
+            self.stages[running] = self.stages.get(running, 0.0) + now - self._mark
+        self._mark = now
+        if name is None:
+            self._stack.pop()
+        else:
+            self._stack.append(name)
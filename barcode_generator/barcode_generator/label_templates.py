@@ -0,0 +1,80 @@
+# Static parts of a label: the ones that are the same on every label of a run.
+#
+# The border, fixed header text and logo are drawn once per PDF document into
+# a Form XObject sized to a layout cell; each slot then references that form
+# and only the barcode and its text are drawn per label.
+
+from dataclasses import dataclass
+
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+HEADER_FONT = "Helvetica-Bold"
+
+# Header band at the top of the cell, in mm
+HEADER_PADDING = 1.0
+MAX_HEADER_HEIGHT = 7.0
+
+# Widest logo, as a multiple of the header band height
+MAX_LOGO_ASPECT = 3
+
+BORDER_LINE_WIDTH = 0.5
+
+
+@dataclass(frozen=True)
+class LabelTemplate:
+    """Fixed content drawn on every label cell"""
+    border: bool = False
+    header: str = ""
+    logo_path: str = ""
+
+    @property
+    def is_empty(self):
+        return not (self.border or self.header or self.logo_path)
+
+    def draw(self, c, layout):
+        """Draw the static content of one cell with its bottom-left corner at the origin"""
+        c.saveState()
+        if self.border:
+            inset = BORDER_LINE_WIDTH / 2
+            c.setLineWidth(BORDER_LINE_WIDTH)
+            c.setStrokeColorRGB(0, 0, 0)
+            c.rect(inset, inset, layout.cell_width - 2 * inset, layout.cell_height - 2 * inset, stroke=1, fill=0)
+
+        band = header_band(layout)
+        if band and (self.header or self.logo_path):
+            self._draw_header(c, layout, band)
+        c.restoreState()
+
+    def _draw_header(self, c, layout, band):
+        padding = HEADER_PADDING * mm
+        bottom = layout.cell_height - padding - band
+        left = padding
+        right = layout.cell_width - padding
+
+        if self.logo_path:
+            logo_width = band * MAX_LOGO_ASPECT
+            c.drawImage(
+                self.logo_path, left, bottom, width=logo_width, height=band,
+                preserveAspectRatio=True, anchor='w', mask='auto'
+            )
+            left += logo_width
+
+        if self.header:
+            width = right - left
+            font_size = band * 0.8
+            text_width = stringWidth(self.header, HEADER_FONT, font_size)
+            if text_width > width:
+                font_size *= width / text_width
+                text_width = width
+            # Centred on the label, moved right only as far as the logo needs
+            centre = min(max(layout.cell_width / 2, left + text_width / 2), right - text_width / 2)
+            c.setFillColorRGB(0, 0, 0)
+            c.setFont(HEADER_FONT, font_size)
+            c.drawCentredString(centre, bottom + (band - font_size) / 2 + font_size * 0.15, self.header)
+
+
+def header_band(layout):
+    """Height of the header band between the top of the cell and the barcode box, 0 if there is no room"""
+    space = layout.cell_height - layout.label_y - layout.barcode_height - 2 * HEADER_PADDING * mm
+    return max(0, min(space, MAX_HEADER_HEIGHT * mm))
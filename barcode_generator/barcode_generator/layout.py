@@ -0,0 +1,247 @@
+# Page geometry for label sheets: page sizes and where each label goes on a page.
+#
+# A layout carries its slot table: the corner of every label cell on a page is
+# worked out once when the layout is computed, and layouts are cached per page
+# size and dimension settings, so placing a label is a table lookup.
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A3, A4, A5, legal, letter
+from reportlab.lib.units import mm
+
+from barcode_generator.barcode_generator.render import THERMAL_PAGE_SIZE
+
+PAGE_SIZES = {
+    'A4': A4,
+    'Letter': letter,
+    'A3': A3,
+    'A5': A5,
+    'Legal': legal,
+    THERMAL_PAGE_SIZE: (50 * mm, 25 * mm)  # Thermal label size
+}
+
+
+@dataclass(frozen=True)
+class SheetTemplate:
+    """Pre-cut label sheet, in mm from the top left corner of the page"""
+    page_size: str
+    columns: int
+    rows: int
+    label_width: float
+    label_height: float
+    left: float
+    top: float
+    column_pitch: float
+    row_pitch: float
+
+
+# Avery-style sheets offered as page sizes
+SHEET_TEMPLATES = {
+    'Avery L7160': SheetTemplate('A4', 3, 7, 63.5, 38.1, 7.25, 15.15, 66.0, 38.1),
+    'Avery L7163': SheetTemplate('A4', 2, 7, 99.1, 38.1, 4.65, 15.15, 101.6, 38.1),
+    'Avery 5160': SheetTemplate('Letter', 3, 10, 66.675, 25.4, 4.7625, 12.7, 69.85, 25.4),
+}
+
+# Space kept clear inside each cut label on sheets, in mm
+SHEET_LABEL_PADDING = 2
+
+# Narrowest label column on standard pages, in mm; it also bounds the slot table
+MIN_COLUMN_WIDTH = 10
+
+
+def get_page_size(page_size):
+    """Get page size in points"""
+    if page_size in SHEET_TEMPLATES:
+        page_size = SHEET_TEMPLATES[page_size].page_size
+    return PAGE_SIZES.get(page_size, A4)
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    """Label grid for one page size, in points.
+
+    Each slot is a label cell of cell_width x cell_height; the barcode box sits
+    at (label_x, label_y) inside it, the same offset in every cell.
+    """
+    page_width: float
+    page_height: float
+    margin: float
+    codes_per_row: int
+    codes_per_page: int
+    barcode_width: float
+    barcode_height: float
+    item_height: float
+    x_spacing: float
+    y_spacing: float
+    thermal: bool
+    cell_width: float
+    cell_height: float
+    label_x: float
+    label_y: float
+    slots: tuple
+
+    @property
+    def pagesize(self):
+        return (self.page_width, self.page_height)
+
+    def cell(self, slot):
+        """Bottom-left corner of the label cell in the given slot of a page"""
+        return self.slots[slot]
+
+    def position(self, slot):
+        """Bottom-left corner of the label in the given slot of a page"""
+        x, y = self.slots[slot]
+        return x + self.label_x, y + self.label_y
+
+
+@lru_cache(maxsize=64)
+def compute_layout(page_size, barcode_width=None, barcode_height=None, codes_per_row=None, item_name_font_size=None):
+    """Work out the label grid for a page size and the document's dimension settings (mm).
+
+    Raises ValueError for negative dimensions or more columns than fit across the page.
+    """
+    page_width, page_height = get_page_size(page_size)
+    for name, value in (("Barcode width", barcode_width), ("Barcode height", barcode_height),
+                        ("Codes per row", codes_per_row), ("Item name font size", item_name_font_size)):
+        if value is not None and value < 0:
+            raise ValueError(f"{name} cannot be negative")
+
+    if page_size in SHEET_TEMPLATES:
+        return compute_sheet_layout(SHEET_TEMPLATES[page_size], page_width, page_height, barcode_width, barcode_height)
+
+    # Handle thermal labels differently
+    if page_size == THERMAL_PAGE_SIZE:
+        # For 50x25mm thermal labels - one barcode per label
+        margin = 1 * mm  # Minimal margin for thermal labels
+
+        # Use user-specified dimensions for thermal labels
+        label_width = (barcode_width or 40) * mm   # Use form value or default 40mm
+        label_height = (barcode_height or 8) * mm  # Use form value or default 8mm
+
+        # Calculate space needed for text based on font size
+        font_size = item_name_font_size or 12
+        text_space = max(6 * mm, font_size * 0.5 * mm)  # Ensure enough space for text
+        item_height = label_height + text_space + (2 * mm)  # Add padding
+
+        # Barcode centred horizontally and placed from the top, leaving space for text below
+        label_x = (page_width - label_width) / 2
+        label_y = page_height - margin - label_height - (2 * mm)
+
+        return PageLayout(
+            page_width=page_width,
+            page_height=page_height,
+            margin=margin,
+            codes_per_row=1,
+            codes_per_page=1,
+            barcode_width=label_width,
+            barcode_height=label_height,
+            item_height=item_height,
+            x_spacing=page_width,
+            y_spacing=page_height,
+            thermal=True,
+            cell_width=page_width,
+            cell_height=page_height,
+            label_x=label_x,
+            label_y=label_y,
+            slots=((0, 0),),
+        )
+
+    # Standard paper sizes (A4, A5, Letter, Legal) - optimized for maximum density
+    margin = 15 * mm  # Reduced margin
+    codes_per_row = codes_per_row or 3
+
+    # Optimized barcode dimensions for standard papers
+    standard_barcode_width = 35 * mm   # Slightly smaller width for better fit
+    standard_barcode_height = 15 * mm  # Optimized height for density
+
+    # Use custom dimensions if specified, otherwise use optimized standards
+    label_width = (barcode_width * mm) if barcode_width else standard_barcode_width
+    label_height = (barcode_height * mm) if barcode_height else standard_barcode_height
+
+    # Minimal padding for maximum density - just enough for text
+    font_size = item_name_font_size or 24
+    text_space = max(8 * mm, font_size * 0.4 * mm)  # Minimal text space
+    item_height = label_height + text_space + (3 * mm)  # Minimal total height
+
+    # Calculate positions with minimal spacing
+    available_width = page_width - (2 * margin)
+    available_height = page_height - (2 * margin)
+
+    if available_width / codes_per_row < MIN_COLUMN_WIDTH * mm:
+        raise ValueError(
+            f"{codes_per_row} codes per row do not fit across the page; "
+            f"at most {int(available_width / (MIN_COLUMN_WIDTH * mm))} fit"
+        )
+
+    # Minimal spacing for maximum density
+    x_spacing = available_width / codes_per_row
+    y_spacing = item_height + (5 * mm)  # Minimal vertical spacing between rows
+
+    # At least one row per page, even when a label is taller than the page
+    rows = max(1, int(available_height / y_spacing))
+    codes_per_page = rows * codes_per_row
+
+    # Cells fill the grid; barcodes are centred within their cell
+    slots = tuple(
+        (margin + col * x_spacing, page_height - margin - (row + 1) * y_spacing)
+        for row in range(rows)
+        for col in range(codes_per_row)
+    )
+
+    return PageLayout(
+        page_width=page_width,
+        page_height=page_height,
+        margin=margin,
+        codes_per_row=codes_per_row,
+        codes_per_page=codes_per_page,
+        barcode_width=label_width,
+        barcode_height=label_height,
+        item_height=item_height,
+        x_spacing=x_spacing,
+        y_spacing=y_spacing,
+        thermal=False,
+        cell_width=x_spacing,
+        cell_height=y_spacing,
+        label_x=(x_spacing - label_width) / 2,
+        label_y=(y_spacing - item_height) / 2,
+        slots=slots,
+    )
+
+
+def compute_sheet_layout(sheet, page_width, page_height, barcode_width=None, barcode_height=None):
+    """One label per cut label of a sheet; barcode dimensions are capped to the label"""
+    padding = SHEET_LABEL_PADDING * mm
+    item_width = sheet.label_width * mm - 2 * padding
+    item_height = sheet.label_height * mm - 2 * padding
+    label_width = min(barcode_width * mm, item_width) if barcode_width else item_width
+    label_height = min(barcode_height * mm, item_height) if barcode_height else item_height
+
+    slots = tuple(
+        (
+            (sheet.left + col * sheet.column_pitch) * mm,
+            page_height - (sheet.top + row * sheet.row_pitch + sheet.label_height) * mm,
+        )
+        for row in range(sheet.rows)
+        for col in range(sheet.columns)
+    )
+
+    return PageLayout(
+        page_width=page_width,
+        page_height=page_height,
+        margin=sheet.left * mm,
+        codes_per_row=sheet.columns,
+        codes_per_page=sheet.columns * sheet.rows,
+        barcode_width=label_width,
+        barcode_height=label_height,
+        item_height=item_height,
+        x_spacing=sheet.column_pitch * mm,
+        y_spacing=sheet.row_pitch * mm,
+        thermal=False,
+        cell_width=sheet.label_width * mm,
+        cell_height=sheet.label_height * mm,
+        # Barcode centred across the label, at the bottom so a header fits above it
+        label_x=(sheet.label_width * mm - label_width) / 2,
+        label_y=padding,
+        slots=slots,
+    )
@@ -0,0 +1,215 @@
+# Places rendered labels onto a ReportLab canvas, one page at a time.
+#
+# Labels arrive as a stream and are grouped into pages; a page is emitted as
+# soon as its last slot is filled, so only one page of labels is held here.
+# A label printed more than once is drawn a single time as a Form XObject and
+# each copy only references it, and so is the label template holding what
+# every label shares (border, header, logo). Bilevel (mode "1") labels are embedded as
+# 1-bit Flate image XObjects, without the RGB expansion and ASCII85 text
+# encoding ReportLab applies to inline images.
+
+import hashlib
+import zlib
+
+from PIL import Image
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.pdfbase.pdfdoc import PDFImageXObject
+
+from barcode_generator.barcode_generator.vector import draw_vector_error, draw_vector_label
+
+# How often (in labels) on_progress is called
+PROGRESS_INTERVAL = 20
+
+
+def place_labels(c, config, layout, labels, on_error=None, on_progress=None, template=None):
+    """Draw (item_name, code, label, copies) tuples in layout order and return the count placed.
+
+    label is a PIL image for raster output, a Symbol for vector output, or None
+    for a code that could not be encoded. Each label takes copies slots. The
+    static content of template, if given, is drawn in every filled slot.
+    """
+    forms = LabelForms()
+    placed = 0
+    for page_number, page_labels in enumerate(iter_pages(iter_copies(labels), layout.codes_per_page)):
+        # Previous page is full - flush it before starting the next one
+        if page_number:
+            c.showPage()
+
+        draw_page(c, config, layout, page_labels, on_error, forms, template)
+
+        previous = placed
+        placed += len(page_labels)
+        if on_progress and placed // PROGRESS_INTERVAL != previous // PROGRESS_INTERVAL:
+            on_progress(placed)
+
+    return placed
+
+
+class LabelForms:
+    """Form XObjects of the labels printed more than once in one PDF document"""
+
+    def __init__(self):
+        self.names = {}
+        # Estimated size of forms defined since the last take_new_bytes()
+        self.new_bytes = 0
+
+    def place(self, c, key, width, height, draw, x, y):
+        """Reference the form for key at (x, y), defining it with draw(c) first if needed"""
+        name = self.names.get(key)
+        if name is None:
+            name = f"label{len(self.names)}"
+            c.beginForm(name, lowerx=0, lowery=0, upperx=width, uppery=height)
+            try:
+                draw(c)
+                self.new_bytes += estimate_stream_bytes(c) + take_image_bytes(c)
+            finally:
+                c.endForm()
+            self.names[key] = name
+
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def take_new_bytes(self):
+        new_bytes, self.new_bytes = self.new_bytes, 0
+        return new_bytes
+
+
+def estimate_stream_bytes(c):
+    """Deflated size of the page or form being drawn on c"""
+    # Streams are only serialised on save; the operator list, deflated the way
+    # ReportLab will, is a close estimate of what they add to the file
+    content = "\n".join(getattr(c, '_code', ()))
+    return len(zlib.compress(content.encode('latin-1', 'replace'), 1))
+
+
+def take_image_bytes(c):
+    """Size of the bilevel image streams added to c since the last call"""
+    image_bytes = getattr(c, '_bilevel_bytes', 0)
+    c._bilevel_bytes = 0
+    return image_bytes
+
+
+def iter_copies(labels):
+    """Repeat each label tuple once per copy; rows asking for no copies are dropped"""
+    for label in labels:
+        for _ in range(label[3]):
+            yield label
+
+
+def iter_pages(labels, per_page):
+    """Group a label stream into lists of one page each"""
+    page = []
+    for label in labels:
+        page.append(label)
+        if len(page) == per_page:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def draw_page(c, config, layout, page_labels, on_error=None, forms=None, template=None):
+    """Draw one page worth of labels into their slots"""
+    if template is not None and template.is_empty:
+        template = None
+
+    for slot, (item_name, barcode_num, label, copies) in enumerate(page_labels):
+        x, y = layout.position(slot)
+        try:
+            if template is not None:
+                draw_template(c, layout, template, forms, *layout.cell(slot))
+            if copies > 1 and forms is not None:
+                forms.place(
+                    c, (item_name, barcode_num), layout.barcode_width, layout.barcode_height,
+                    lambda form: draw_label(form, config, layout, item_name, barcode_num, label, 0, 0),
+                    x, y
+                )
+            else:
+                draw_label(c, config, layout, item_name, barcode_num, label, x, y)
+        except Exception as img_error:
+            # Fallback: draw a rectangle with text
+            c.setStrokeColor('red')
+            c.rect(x, y, layout.barcode_width, layout.item_height)
+            c.drawString(x + 5, y + (layout.item_height / 2), f"Error: {barcode_num}")
+            if on_error:
+                on_error(f"Image drawing error for {barcode_num}: {img_error}")
+
+
+def draw_template(c, layout, template, forms, x, y):
+    """Draw the static content of a label cell at (x, y), as a form shared by every cell when forms is given"""
+    if forms is None:
+        c.saveState()
+        c.translate(x, y)
+        template.draw(c, layout)
+        c.restoreState()
+        return
+    forms.place(c, template, layout.cell_width, layout.cell_height, lambda form: template.draw(form, layout), x, y)
+
+
+def draw_label(c, config, layout, item_name, barcode_num, label, x, y):
+    """Draw barcode with item name and barcode number at (x, y)"""
+    if config.is_vector:
+        # Bars and text as vector shapes, exact at any printer DPI
+        if label:
+            draw_vector_label(c, config, label, item_name, x, y, layout.barcode_width, layout.barcode_height)
+        else:
+            draw_vector_error(c, barcode_num, x, y, layout.barcode_width, layout.barcode_height)
+    else:
+        draw_label_image(c, label, x, y, layout.barcode_width, layout.barcode_height)
+
+
+def draw_label_image(c, img, x, y, width, height):
+    """Draw a raster label image scaled into its slot"""
+    if img.mode == '1':
+        draw_bilevel_image(c, img, x, y, width, height)
+        return
+
+    # Convert to RGB if needed
+    if img.mode == 'RGBA':
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1])
+        img = rgb_img
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Draw image with optimized dimensions
+    c.drawInlineImage(
+        img,  # Pass PIL Image directly
+        x, y,
+        width=width,
+        height=height,  # Use actual barcode height, not item_height
+        preserveAspectRatio=True
+    )
+
+
+def draw_bilevel_image(c, img, x, y, width, height):
+    """Draw a mode "1" image as a 1-bit Flate XObject, shared by identical images in the document"""
+    # Canvas.drawImage converts mode "1" to RGB, so this registers the XObject through Canvas
+    # internals instead; the ReportLab versions are pinned in pyproject.toml and test_pdf_writer checks the output
+    # PIL packs "1" rows MSB first with 1 = white, which is DeviceGray at one bit per component
+    data = img.tobytes()
+    name = "bilevel" + hashlib.sha1(data + repr(img.size).encode()).hexdigest()[:20]
+    reg_name = c._doc.getXObjectName(name)
+    image = c._doc.idToObject.get(reg_name)
+    if image is None:
+        # Same registration steps as Canvas.drawImage, with our own stream
+        image = PDFImageXObject(name)
+        image.width, image.height = img.size
+        image.bitsPerComponent = 1
+        image.colorSpace = 'DeviceGray'
+        image.streamContent = zlib.compress(data, 6)
+        image._filters = ('FlateDecode',)
+        c._setXObjects(image)
+        c._doc.Reference(image, reg_name)
+        c._doc.addForm(name, image)
+        c._bilevel_bytes = getattr(c, '_bilevel_bytes', 0) + len(image.streamContent)
+
+    x, y, width, height, _ = aspectRatioFix(True, 'c', x, y, width, height, image.width, image.height)
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append(f"/{reg_name} Do")
+    c.restoreState()
+    c._formsinuse.append(name)
@@ -0,0 +1,261 @@
+# Printer-native label programs for thermal printers.
+#
+# Instead of a PDF page with a bitmap per label, each label becomes a short
+# ZPL (Zebra) or EPL2 (Eltron/Zebra desktop) program that uses the printer's
+# own barcode and text commands, with the copy count sent as a print quantity.
+# Symbols are still encoded here first, so invalid codes are reported the same
+# way as for PDF output and the printed barcode can be centred on the label.
+
+from dataclasses import dataclass
+
+from barcode_generator.barcode_generator.datamatrix import QUIET_ZONE as DATAMATRIX_QUIET_ZONE
+from barcode_generator.barcode_generator.symbology import (
+    LINEAR,
+    PDF417_QUIET_ZONE,
+    PDF417_ROW_HEIGHT,
+    PDF417_SECURITY_LEVEL,
+    encode_symbol,
+    pdf417_columns,
+)
+
+PRINTER_FORMATS = ('ZPL', 'EPL')
+
+# 203 dpi printheads; 300 dpi ones have 12
+DEFAULT_DOTS_PER_MM = 8
+
+# Label layout, in mm
+MARGIN_MM = 1.5
+TEXT_BAND_MM = 3.0
+GAP_MM = 1.0
+EPL_LABEL_GAP_MM = 3.0
+
+# Widest bar module used, in dots
+MAX_MODULE_DOTS = 4
+
+# Characters of the item name printed, as on raster thermal labels
+MAX_ITEM_NAME_CHARS = 25
+
+# Rows written between progress callbacks
+PROGRESS_INTERVAL = 100
+
+# Field data expected by the printer's linear barcode commands; check digits are added by the printer
+ZPL_LINEAR = {
+    'Code128': "^BCN,{height},{text},N,N,A",
+    'Code39': "^B3N,Y,{height},{text},N",
+    'EAN13': "^BEN,{height},{text},N",
+    'EAN8': "^B8N,{height},{text},N",
+    'UPC-A': "^BUN,{height},{text},N,Y",
+    'ITF': "^B2N,{height},{text},N,N",
+}
+
+EPL_LINEAR = {
+    'Code128': "1",
+    'Code39': "3C",
+    'EAN13': "E30",
+    'EAN8': "E80",
+    'UPC-A': "UA0",
+    'ITF': "2",
+}
+
+# Digits sent for codes whose printer command computes the check digit itself
+CHECK_DIGIT_LENGTHS = {'EAN13': 12, 'EAN8': 7, 'UPC-A': 11}
+
+# EPL2 resident fonts 2 and 3 at 203 dpi: (font, character width, character height) in dots
+EPL_SMALL_FONT = (2, 10, 16)
+EPL_LARGE_FONT = (3, 12, 20)
+
+
+@dataclass(frozen=True)
+class LabelArea:
+    """Printable label size in dots"""
+    width: int
+    height: int
+    dots_per_mm: int
+
+    @classmethod
+    def from_points(cls, pagesize, dots_per_mm=DEFAULT_DOTS_PER_MM):
+        width, height = pagesize
+        return cls(round(width / 72 * 25.4 * dots_per_mm), round(height / 72 * 25.4 * dots_per_mm), dots_per_mm)
+
+    def dots(self, mm):
+        return round(mm * self.dots_per_mm)
+
+
+@dataclass(frozen=True)
+class Placement:
+    """Where the parts of one label go, in dots"""
+    name_y: int
+    name_height: int
+    symbol_x: int
+    symbol_y: int
+    symbol_height: int
+    module: int
+    text_y: int
+
+
+def write_printer_file(path, output_format, config, area, codes, on_error=None, on_progress=None):
+    """Write a label program per (item_name, code, qty) row to path; returns the labels it prints.
+
+    Rows that cannot be encoded are left out and reported through on_error.
+    """
+    build = zpl_label if output_format == 'ZPL' else epl_label
+    # ZPL fields are sent as UTF-8 (^CI28); EPL2 printers only know single byte code pages
+    encoding = 'utf-8' if output_format == 'ZPL' else 'latin-1'
+
+    labels = 0
+    with open(path, 'w', encoding=encoding, errors='replace', newline='\n') as f:
+        for row_no, (item_name, code_text, qty) in enumerate(codes, 1):
+            try:
+                f.write(build(config, area, item_name, code_text, qty))
+                labels += qty
+            except Exception as e:
+                if on_error:
+                    on_error(f"Error generating barcode for {code_text}: {e}")
+            if on_progress and row_no % PROGRESS_INTERVAL == 0:
+                on_progress(labels)
+    if on_progress:
+        on_progress(labels)
+    return labels
+
+
+def zpl_label(config, area, item_name, code_text, qty=1):
+    """ZPL program printing qty copies of one label"""
+    symbol = encode_symbol(config.barcode_type, code_text)
+    place = plan_label(config, area, symbol, item_name)
+    commands = ["^XA", "^CI28", f"^PW{area.width}", f"^LL{area.height}", "^LH0,0"]
+
+    if item_name and item_name.strip():
+        commands.append(
+            f"^FO0,{place.name_y}^FB{area.width},1,0,C,0^A0N,{place.name_height},{place.name_height}"
+            f"{_zpl_field(display_name(item_name))}"
+        )
+
+    if symbol.kind == LINEAR:
+        commands.append(f"^BY{place.module},3")
+        barcode = ZPL_LINEAR[config.barcode_type].format(
+            height=place.symbol_height, text="Y" if config.include_text else "N"
+        )
+        commands.append(f"^FO{place.symbol_x},{place.symbol_y}{barcode}{_zpl_field(printer_data(config, symbol, code_text))}")
+    else:
+        if config.barcode_type == 'DataMatrix':
+            barcode = f"^BXN,{place.module},200"
+        else:
+            commands.append(f"^BY{place.module}")
+            barcode = (
+                f"^B7N,{place.module * PDF417_ROW_HEIGHT},{PDF417_SECURITY_LEVEL},"
+                f"{pdf417_columns(len(symbol.text))},,N"
+            )
+        commands.append(f"^FO{place.symbol_x},{place.symbol_y}{barcode}{_zpl_field(symbol.text)}")
+        if config.include_text:
+            text_height = area.dots(TEXT_BAND_MM)
+            commands.append(
+                f"^FO0,{place.text_y}^FB{area.width},1,0,C,0^A0N,{text_height},{text_height}{_zpl_field(symbol.text)}"
+            )
+
+    commands.append(f"^PQ{int(qty)},0,1,Y")
+    commands.append("^XZ")
+    return "\n".join(commands) + "\n"
+
+
+def epl_label(config, area, item_name, code_text, qty=1):
+    """EPL2 program printing qty copies of one label"""
+    symbol = encode_symbol(config.barcode_type, code_text)
+    place = plan_label(config, area, symbol, item_name)
+    commands = ["", "N", f"q{area.width}", f"Q{area.height},{area.dots(EPL_LABEL_GAP_MM)}"]
+
+    if item_name and item_name.strip():
+        commands.append(_epl_text(area, place.name_y, display_name(item_name), EPL_LARGE_FONT))
+
+    if symbol.kind == LINEAR:
+        commands.append(
+            f"B{place.symbol_x},{place.symbol_y},0,{EPL_LINEAR[config.barcode_type]},{place.module},"
+            f"{place.module * 3},{place.symbol_height},{'B' if config.include_text else 'N'},"
+            f"{_epl_string(printer_data(config, symbol, code_text))}"
+        )
+    else:
+        if config.barcode_type == 'DataMatrix':
+            barcode = f"D,h{place.module}"
+        else:
+            # EPL2 PDF417 modules are at least 2 dots wide
+            module = max(2, place.module)
+            barcode = (
+                f"P,{area.width},{place.symbol_height},x{module},y{module * PDF417_ROW_HEIGHT},"
+                f"s{PDF417_SECURITY_LEVEL},c{pdf417_columns(len(symbol.text))}"
+            )
+        commands.append(f"b{place.symbol_x},{place.symbol_y},{barcode},{_epl_string(symbol.text)}")
+        if config.include_text:
+            commands.append(_epl_text(area, place.text_y, symbol.text, EPL_SMALL_FONT))
+
+    commands.append(f"P{int(qty)}")
+    return "\n".join(commands) + "\n"
+
+
+def plan_label(config, area, symbol, item_name):
+    """Item name at the top, the symbol centred below it and room for the code text at the bottom"""
+    margin = area.dots(MARGIN_MM)
+    gap = area.dots(GAP_MM)
+    name_height = area.dots(TEXT_BAND_MM) if item_name and item_name.strip() else 0
+    text_height = area.dots(TEXT_BAND_MM) if config.include_text else 0
+
+    symbol_y = margin + (name_height + gap if name_height else 0)
+    symbol_height = area.height - symbol_y - margin - (text_height + gap if text_height else 0)
+    usable_width = area.width - 2 * margin
+
+    if symbol.kind == LINEAR:
+        columns = symbol.columns
+        module = max(1, min(MAX_MODULE_DOTS, usable_width // columns))
+        drawn_width, drawn_height = columns * module, symbol_height
+    elif config.barcode_type == 'DataMatrix':
+        # Square modules, sized to the height left for the symbol
+        columns = symbol.columns - 2 * DATAMATRIX_QUIET_ZONE
+        module = max(1, min(usable_width, symbol_height) // columns)
+        drawn_width = drawn_height = columns * module
+    else:
+        columns = symbol.columns - 2 * PDF417_QUIET_ZONE
+        module_rows = len(symbol.rows) - 2 * PDF417_QUIET_ZONE
+        module = max(1, min(usable_width // columns, symbol_height // module_rows))
+        drawn_width, drawn_height = columns * module, module_rows * module
+
+    return Placement(
+        name_y=margin,
+        name_height=name_height,
+        symbol_x=max(0, (area.width - drawn_width) // 2),
+        symbol_y=symbol_y + max(0, (symbol_height - drawn_height) // 2),
+        symbol_height=max(1, drawn_height),
+        module=module,
+        text_y=area.height - margin - text_height,
+    )
+
+
+def printer_data(config, symbol, code_text):
+    """Field data for the printer's barcode command"""
+    if config.barcode_type in CHECK_DIGIT_LENGTHS:
+        return symbol.text[:CHECK_DIGIT_LENGTHS[config.barcode_type]]
+    if config.barcode_type == 'Code39':
+        # The printer appends the check character python-barcode puts in the full code
+        return str(code_text).upper()
+    return symbol.text
+
+
+def display_name(item_name):
+    if len(item_name) > MAX_ITEM_NAME_CHARS:
+        return item_name[:MAX_ITEM_NAME_CHARS] + "..."
+    return item_name
+
+
+def _zpl_field(text):
+    """^FD field with ^, ~ and the _ escape character itself sent as hex escapes"""
+    escaped = text.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+    return f"^FH_^FD{escaped}^FS"
+
+
+def _epl_string(text):
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _epl_text(area, y, text, font):
+    """Text centred across the label in a resident monospaced font"""
+    font_number, char_width, _ = font
+    x = max(0, (area.width - len(text) * char_width) // 2)
+    return f"A{x},{y},0,{font_number},1,1,N,{_epl_string(text)}"
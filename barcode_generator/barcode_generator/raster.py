@@ -0,0 +1,167 @@
+# Direct rasterisation of module patterns with NumPy.
+#
+# Each module of a symbol is repeated a whole number of pixels wide, so every
+# bar edge falls on a pixel boundary, and the label is produced as an array
+# and handed to PIL without any drawing primitives or PNG encode/decode step.
+# Linear symbols with patterns of the same length are stacked and expanded in
+# a single array operation. The geometry mirrors python-barcode's ImageWriter
+# at 300 dpi, with module widths snapped to whole pixels.
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import barcode
+from PIL import Image, ImageDraw
+
+from barcode_generator.barcode_generator.fonts import get_font
+
+# Try to import numpy, fall back to python-barcode's ImageWriter if not available
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+DPI = 300
+
+# python-barcode's monospaced font, so the code text matches ImageWriter output
+CODE_TEXT_FONT = os.path.join(os.path.dirname(barcode.__file__), "fonts", "DejaVuSansMono.ttf")
+
+# Space above the bars and below the label, as in ImageWriter (mm)
+MARGIN_MM = 1.0
+
+WHITE = 255
+BLACK = 0
+
+# Labels painted per array operation; bounds the array size for long batches
+RASTER_BATCH = 16
+
+
+def mm_to_px(mm, dpi=DPI):
+    return mm * dpi / 25.4
+
+
+@dataclass(frozen=True)
+class LinearGeometry:
+    """Pixel sizes of a linear label, from ImageWriter options given in mm and points"""
+    module: int
+    bar_height: int
+    quiet_zone: int
+    margin: int
+    font_size: int
+    text_distance: int
+
+    @classmethod
+    def from_writer_options(cls, options):
+        font_mm = options['font_size'] * 0.352777778 if options.get('write_text') else 0
+        return cls(
+            module=max(1, round(mm_to_px(options['module_width']))),
+            bar_height=max(1, round(mm_to_px(options['module_height']))),
+            quiet_zone=round(mm_to_px(options['quiet_zone'])),
+            margin=round(mm_to_px(MARGIN_MM)),
+            font_size=int(mm_to_px(font_mm)),
+            text_distance=round(mm_to_px(options['text_distance'])) if font_mm else 0,
+        )
+
+    @property
+    def text_height(self):
+        # ImageWriter reserves half the font height plus the text distance
+        return self.font_size // 2 + self.text_distance if self.font_size else 0
+
+    def size(self, columns):
+        """(width, height) of a label with columns modules"""
+        width = 2 * self.quiet_zone + columns * self.module
+        height = 2 * self.margin + self.bar_height + self.text_height
+        return width, height
+
+
+def rasterize_linear(patterns, geometry):
+    """Paint equal-length '1'/'0' patterns as a (count, height, width) uint8 array of labels"""
+    columns = len(patterns[0])
+    width, height = geometry.size(columns)
+
+    modules = np.frombuffer("".join(patterns).encode('ascii'), dtype=np.uint8).reshape(len(patterns), columns)
+    bars = np.where(modules == ord('1'), BLACK, WHITE).astype(np.uint8)
+
+    pixels = np.full((len(patterns), height, width), WHITE, dtype=np.uint8)
+    left = geometry.quiet_zone
+    top = geometry.margin
+    pixels[:, top:top + geometry.bar_height, left:left + columns * geometry.module] = (
+        np.repeat(bars, geometry.module, axis=1)[:, np.newaxis, :]
+    )
+    return pixels
+
+
+def rasterize_matrix(rows, box_size):
+    """Paint '1'/'0' module rows as a uint8 array with box_size pixel square modules"""
+    modules = np.frombuffer("".join(rows).encode('ascii'), dtype=np.uint8).reshape(len(rows), len(rows[0]))
+    cells = np.where(modules == ord('1'), BLACK, WHITE).astype(np.uint8)
+    return np.repeat(np.repeat(cells, box_size, axis=0), box_size, axis=1)
+
+
+def paint_code_text(pixels, text, geometry, columns):
+    """Write the human readable code centred below the bars of one label array, as ImageWriter does.
+
+    The font is monospaced, so the text is assembled from cached glyph cells
+    instead of being laid out and rasterised by FreeType for every label.
+    """
+    if not (text and geometry.font_size):
+        return
+    strip = np.concatenate([_glyph(char, geometry.font_size) for char in text], axis=1)
+
+    # ImageWriter anchors the text at its descender line, text_distance below the bars
+    bottom = geometry.margin + geometry.bar_height + geometry.text_distance
+    top = bottom - strip.shape[0]
+    left = round(geometry.quiet_zone + columns * geometry.module / 2 - strip.shape[1] / 2)
+
+    # Clip the strip to the label
+    height, width = pixels.shape
+    src_top, src_left = max(0, -top), max(0, -left)
+    top, left = max(0, top), max(0, left)
+    bottom, right = min(height, bottom), min(width, left + strip.shape[1] - src_left)
+    if bottom <= top or right <= left:
+        return
+    region = pixels[top:bottom, left:right]
+    np.minimum(region, strip[src_top:src_top + bottom - top, src_left:src_left + right - left], out=region)
+
+
+@lru_cache(maxsize=512)
+def _glyph(char, font_size):
+    """Greyscale cell of one character, one advance wide and ascent plus descent high"""
+    font = get_font(font_size, CODE_TEXT_FONT)
+    ascent, descent = font.getmetrics()
+    cell = Image.new('L', (max(1, round(font.getlength(char))), ascent + descent), WHITE)
+    ImageDraw.Draw(cell).text((0, ascent), char, font=font, fill=BLACK, anchor="ls")
+    return np.asarray(cell)
+
+
+def to_images(pixels, mode):
+    """PIL images in mode from a (count, height, width) greyscale uint8 array"""
+    _, height, width = pixels.shape
+    if mode == '1':
+        # Pack 8 pixels per byte, 1 being white, with rows padded to whole bytes as PIL expects
+        packed = np.packbits(pixels >= 128, axis=2)
+        return [Image.frombytes('1', (width, height), label.tobytes()) for label in packed]
+    if mode == 'RGB':
+        channels = np.empty((*pixels.shape, 3), dtype=np.uint8)
+        channels[...] = pixels[..., np.newaxis]
+        return [Image.fromarray(label, 'RGB') for label in channels]
+    return [Image.fromarray(label, 'L').convert(mode) for label in pixels]
+
+
+def to_image(pixels, mode):
+    """PIL image in mode from a (height, width) greyscale uint8 array"""
+    return to_images(pixels[np.newaxis], mode)[0]
+
+
+def group_by_length(patterns, batch_size=RASTER_BATCH):
+    """Indices of patterns, grouped by pattern length in batches of at most batch_size"""
+    groups = {}
+    for index, pattern in enumerate(patterns):
+        groups.setdefault(len(pattern), []).append(index)
+    return [
+        indices[start:start + batch_size]
+        for indices in groups.values()
+        for start in range(0, len(indices), batch_size)
+    ]
@@ -0,0 +1,411 @@
+# Barcode image rendering shared by the Bulk Barcode Generator and its worker processes.
+#
+# Nothing in this module touches frappe, so it can run inside a process pool.
+# Errors are returned to the caller instead of being logged here.
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+
+from barcode.writer import ImageWriter
+from PIL import Image, ImageDraw
+
+from barcode_generator.barcode_generator.fonts import get_default_font, get_font, warm_up
+from barcode_generator.barcode_generator.raster import (
+    HAS_NUMPY,
+    LinearGeometry,
+    group_by_length,
+    paint_code_text,
+    rasterize_linear,
+    rasterize_matrix,
+    to_image,
+    to_images,
+)
+from barcode_generator.barcode_generator.render_cache import render_key
+from barcode_generator.barcode_generator.symbology import LINEAR_CLASSES as BARCODE_CLASSES
+from barcode_generator.barcode_generator.symbology import MATRIX_TYPES, encode_symbol
+
+THERMAL_PAGE_SIZE = '50x25mm Label'
+
+# Target width of a 2D symbol image; modules are snapped to whole pixels
+MATRIX_WIDTH_PX = 300
+
+
+@dataclass(frozen=True)
+class RenderConfig:
+    """Picklable snapshot of the document settings that affect a rendered label"""
+    barcode_type: str = 'Code128'
+    page_size: str = 'A4'
+    include_text: int = 1
+    item_name_font_size: int = 0
+    render_mode: str = 'Raster'
+    font_path: str = ''
+
+    @property
+    def is_thermal(self):
+        return self.page_size == THERMAL_PAGE_SIZE
+
+    @property
+    def is_vector(self):
+        return self.render_mode == 'Vector'
+
+    @property
+    def image_mode(self):
+        # Bilevel labels are rendered, cached and embedded as 1-bit images
+        return '1' if self.render_mode == 'Bilevel' else 'RGB'
+
+    @property
+    def item_name_font_size_px(self):
+        # Larger default on thermal for better visibility, 24pt for A4
+        return self.item_name_font_size or (14 if self.is_thermal else 24)
+
+
+def get_writer_options(config):
+    """ImageWriter options for thermal vs standard printing"""
+    if config.is_thermal:
+        # Thermal label optimized settings
+        return {
+            'module_width': 0.25,   # Even smaller modules for thermal labels
+            'module_height': 6.0,   # Compact height for thermal
+            'quiet_zone': 1.5,     # Minimal quiet zone for thermal
+            'font_size': 8,         # Smaller font for thermal labels
+            'text_distance': 4.0,   # More space between bars and text to prevent overlap
+            'background': 'white',
+            'foreground': 'black',
+            'write_text': config.include_text,  # Control text display
+        }
+
+    # Standard paper optimized settings (A4, Letter, etc.)
+    return {
+        'module_width': 0.5,    # Increased module width for A4 (0.5mm)
+        'module_height': 15.0,  # Increased height for better visibility
+        'quiet_zone': 6.0,      # Increased quiet zone for better scanning
+        'font_size': 18,        # Much larger font size for A4 readability
+        'text_distance': 8.0,   # More space between bars and text
+        'background': 'white',
+        'foreground': 'black',
+        'write_text': config.include_text,  # Control text display
+    }
+
+
+def render_label(config, code_text, item_name="", timings=None):
+    """Render a single barcode image with item name.
+
+    Returns an (image, error) tuple. On failure the image is an error placeholder
+    and error holds the message the caller should log. Seconds spent on the
+    symbol and on the text overlay are added to the timings dict, if given.
+    """
+    return render_labels(config, [(item_name, code_text)], timings)[0]
+
+
+def render_labels(config, rows, timings=None):
+    """Render (item_name, code) rows into (image, error) tuples, as render_label does for one.
+
+    Symbols are encoded and rasterised for the whole batch before the text
+    overlays are added, so codes of the same length share one array operation.
+    """
+    start = time.perf_counter()
+    barcodes = render_barcodes(config, [code_text for _, code_text in rows])
+    encoded = time.perf_counter()
+    if timings is not None:
+        timings["barcode"] = timings.get("barcode", 0.0) + encoded - start
+
+    results = []
+    for (item_name, code_text), (img, error) in zip(rows, barcodes, strict=True):
+        if error:
+            # Return a placeholder image
+            results.append((create_error_image(code_text, error), f"Error generating barcode for {code_text}: {error}"))
+        elif img is None:
+            results.append((None, None))
+        else:
+            results.append(add_label_text(config, img, item_name, code_text))
+
+    if timings is not None:
+        timings["overlay"] = timings.get("overlay", 0.0) + time.perf_counter() - encoded
+    return results
+
+
+def render_barcodes(config, code_texts):
+    """Bare barcode images for code_texts as (image, error message) tuples; (None, None) for unknown types"""
+    if config.barcode_type in BARCODE_CLASSES:
+        if HAS_NUMPY:
+            return rasterize_linear_codes(config, code_texts)
+        return [_guarded(write_linear_barcode, config, code_text) for code_text in code_texts]
+
+    if config.barcode_type in MATRIX_TYPES:
+        return [_guarded(make_matrix_barcode, config, code_text) for code_text in code_texts]
+
+    return [(None, None)] * len(code_texts)
+
+
+def _guarded(render, config, code_text):
+    try:
+        return render(config, code_text), None
+    except Exception as e:
+        return None, str(e)
+
+
+def rasterize_linear_codes(config, code_texts):
+    """Encode linear codes and paint each group of equal-length patterns in one pass"""
+    geometry = LinearGeometry.from_writer_options(get_writer_options(config))
+    results = [None] * len(code_texts)
+    symbols = []
+    for index, code_text in enumerate(code_texts):
+        try:
+            symbols.append((index, encode_symbol(config.barcode_type, code_text)))
+        except Exception as e:
+            results[index] = None, str(e)
+
+    for group in group_by_length([symbol.rows[0] for _, symbol in symbols]):
+        batch = [symbols[i] for i in group]
+        pixels = rasterize_linear([symbol.rows[0] for _, symbol in batch], geometry)
+        if config.include_text:
+            for label, (_, symbol) in zip(pixels, batch, strict=True):
+                paint_code_text(label, symbol.text, geometry, symbol.columns)
+        for (index, _), img in zip(batch, to_images(pixels, config.image_mode), strict=True):
+            results[index] = img, None
+    return results
+
+
+def write_linear_barcode(config, code_text):
+    """Linear barcode drawn by python-barcode's ImageWriter; used when NumPy is missing"""
+    barcode_class = BARCODE_CLASSES[config.barcode_type]
+    code_obj = barcode_class(str(code_text), writer=ImageWriter(mode=config.image_mode))
+    # render() hands back the PIL image itself, with no PNG encode/decode
+    return code_obj.render(get_writer_options(config))
+
+
+def make_matrix_barcode(config, code_text):
+    """2D barcode image, scaled by whole pixels per module to about MATRIX_WIDTH_PX wide"""
+    symbol = encode_symbol(config.barcode_type, code_text)
+    box_size = max(1, MATRIX_WIDTH_PX // symbol.columns)
+    if HAS_NUMPY:
+        return to_image(rasterize_matrix(symbol.rows, box_size), config.image_mode)
+
+    img = Image.new('L', (symbol.columns, len(symbol.rows)))
+    img.putdata([0 if module == '1' else 255 for row in symbol.rows for module in row])
+    img = img.resize((img.width * box_size, img.height * box_size), Image.NEAREST)
+    return img.convert(config.image_mode)
+
+
+def add_label_text(config, img, item_name, code_text):
+    """Add the item name, or the code text under 2D symbols; returns (image, error)"""
+    try:
+        # Add item name above the barcode if provided
+        if item_name and item_name.strip():
+            img = add_item_name_to_image(config, img, item_name, code_text)
+        elif config.barcode_type in MATRIX_TYPES and config.include_text:
+            img = add_text_to_image(config, img, code_text)
+    except Exception as e:
+        return img, f"Error adding text to image: {e}"
+    return img, None
+
+
+def add_item_name_to_image(config, img, item_name, barcode_text):
+    """Add item name above the barcode with appropriate font size for paper type"""
+    # Only add space for item name if it exists
+    if not (item_name and item_name.strip()):
+        return img
+
+    # Different settings for thermal vs standard labels
+    if config.is_thermal:
+        # Thermal label settings - more space for text
+        extra_height = 35  # More space for thermal labels to show item name clearly
+        barcode_y = 30    # Position barcode lower to make room for text above
+    else:
+        # Standard paper settings - large text
+        extra_height = 60  # Increased space for much larger font (24pt)
+        barcode_y = 60
+    font_size = config.item_name_font_size_px
+
+    new_height = img.height + extra_height
+    new_img = Image.new(config.image_mode, (img.width, new_height), 'white')
+
+    # Position the barcode image (leave space at top for item name)
+    new_img.paste(img, (0, barcode_y))
+
+    # Add item name text
+    draw = ImageDraw.Draw(new_img)
+
+    # Fonts are loaded once per process by the font registry
+    item_font = get_font(font_size, config.font_path)
+
+    # Truncate long item names to fit width
+    max_chars = 25 if config.is_thermal else 35
+    display_name = item_name[:max_chars] + "..." if len(item_name) > max_chars else item_name
+
+    # Calculate text position (centered)
+    text_bbox = draw.textbbox((0, 0), display_name, font=item_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_x = max(0, (img.width - text_width) // 2)
+
+    # Position text differently for thermal vs standard
+    if config.is_thermal:
+        # For thermal labels - text at top with more margin
+        text_y = 5  # Close to top
+    else:
+        # For standard labels
+        text_y = 12
+
+    # Draw item name with larger font and more top margin
+    draw.text((text_x, text_y), display_name, fill='black', font=item_font)
+
+    return new_img
+
+
+def add_text_to_image(config, img, text):
+    """Add text below barcode image (fallback method)"""
+    try:
+        # Create new image with extra space for text
+        new_height = img.height + 30
+        new_img = Image.new(config.image_mode, (img.width, new_height), 'white')
+
+        # Paste original image
+        new_img.paste(img, (0, 0))
+
+        # Add text
+        draw = ImageDraw.Draw(new_img)
+
+        font = get_default_font()
+
+        # Calculate text position (centered)
+        text_bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_x = (img.width - text_width) // 2
+
+        # More spacing for thermal labels to prevent overlap
+        if config.is_thermal:
+            text_y = img.height + 8  # More space for thermal labels
+        else:
+            text_y = img.height + 5  # Standard spacing
+
+        draw.text((text_x, text_y), text, fill='black', font=font)
+
+        return new_img
+    except Exception:
+        return img
+
+
+def create_error_image(code_text, error_msg):
+    """Create an error placeholder image"""
+    img = Image.new('RGB', (200, 100), 'white')
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, 199, 99], outline='red', width=2)
+
+    font = get_default_font()
+
+    draw.text((10, 10), f"Error: {code_text}"[:20], fill='red', font=font)
+    draw.text((10, 30), "Invalid code", fill='red', font=font)
+    return img
+
+
+def make_thumbnail(img, max_width):
+    """Downscaled RGB copy of a label image, at most max_width pixels wide"""
+    thumb = img.convert('RGB')
+    thumb.thumbnail((max_width, thumb.height), Image.LANCZOS)
+    return thumb
+
+
+def render_chunk(config, rows):
+    """Render a list of (item_name, code) rows; runs inside a pool worker.
+
+    Returns the (image, error) results and the seconds spent per render step.
+    """
+    timings = {}
+    return render_labels(config, rows, timings), timings
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def render_stream(config, rows, cache=None, workers=1, chunk_size=50, stats=None):
+    """Render (item_name, code) rows, spreading chunks across a process pool.
+
+    Yields (item_name, code, image, error) per row in input order, whatever the
+    pool size. rows may be any iterable; at most two chunks per worker are in
+    flight, so memory depends on the chunk size and not on the batch size.
+    Rows found in cache are not rendered again and fresh renders are stored.
+    If a stats dict is passed, cache hits, renders, errors and the seconds
+    workers spent per render step are added to it as they happen.
+    """
+    chunks = _iter_chunks(rows, max(1, int(chunk_size or 1)))
+    workers = max(1, int(workers or 1))
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _collect(_submit(None, config, chunk, cache), cache, stats)
+        return
+
+    # Spawned workers never inherit the parent's database or redis connections
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=warm_up,
+        initargs=((config.item_name_font_size_px,), config.font_path)
+    ) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(_submit(executor, config, chunk, cache))
+            if len(in_flight) >= workers * 2:
+                yield from _collect(in_flight.popleft(), cache, stats)
+
+        while in_flight:
+            yield from _collect(in_flight.popleft(), cache, stats)
+
+
+def _iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _submit(executor, config, chunk, cache):
+    """Look a chunk up in the cache and start rendering whatever is missing"""
+    keys = [render_key(config, code_text, item_name) for item_name, code_text in chunk] if cache else None
+    images = [cache.get(key) for key in keys] if cache else [None] * len(chunk)
+    missing = [i for i, img in enumerate(images) if img is None]
+    todo = [chunk[i] for i in missing]
+
+    if not todo:
+        result = [], {}
+    elif executor:
+        result = executor.submit(render_chunk, config, todo)
+    else:
+        result = render_chunk(config, todo)
+
+    return chunk, keys, images, missing, result
+
+
+def _collect(submitted, cache, stats=None):
+    chunk, keys, images, missing, result = submitted
+    if isinstance(result, Future):
+        result = result.result()
+    result, timings = result
+
+    if stats is not None:
+        stats["cache_hits"] = stats.get("cache_hits", 0) + len(chunk) - len(missing)
+        stats["rendered"] = stats.get("rendered", 0) + len(missing)
+        stats["errors"] = stats.get("errors", 0) + sum(1 for _, error in result if error)
+        for step, seconds in timings.items():
+            stats[f"{step}_seconds"] = stats.get(f"{step}_seconds", 0.0) + seconds
+
+    errors = [None] * len(chunk)
+    for i, (img, error) in zip(missing, result, strict=True):
+        if error:
+            errors[i] = error
+        elif img and cache:
+            cache.put(keys[i], img)
+        images[i] = img
+
+    for (item_name, code_text), img, error in zip(chunk, images, errors, strict=True):
+        yield item_name, code_text, img, error
@@ -0,0 +1,196 @@
+# Content-addressed cache for rendered label images.
+#
+# Entries are keyed on a hash of everything that affects the pixels (the
+# RenderConfig plus code and item name) and stored as PNG bytes: an in-process
+# LRU bounded by total bytes, backed by an optional on-disk tier with its own
+# size quota.
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+
+from PIL import Image
+
+# Bump when rendering output changes so stale disk entries are never served
+CACHE_VERSION = 3
+
+
+def render_key(config, code_text, item_name=""):
+    """Hash of the render settings, code and item name"""
+    payload = repr((CACHE_VERSION, astuple(config), str(code_text), item_name or ""))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def encode_image(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+def decode_image(data):
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    return img
+
+
+class RenderCache:
+    """Two-tier LRU cache of rendered images with hit/miss counters"""
+
+    def __init__(self, max_bytes, disk_path=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path if disk_max_bytes else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached image for key, or None"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if data is None:
+            data = self._read_disk(key)
+            if data is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, data)
+
+        return decode_image(data)
+
+    def put(self, key, img):
+        """Store a rendered image under key in both tiers"""
+        data = encode_image(img)
+        self._remember(key, data)
+        self._write_disk(key, data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remember(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = data
+            self._bytes += len(data)
+
+            # Evict least recently used entries until we are back under budget
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _disk_file(self, key):
+        return os.path.join(self.disk_path, key[:2], f"{key}.png")
+
+    def _read_disk(self, key):
+        if not self.disk_path:
+            return None
+
+        path = self._disk_file(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Refresh the timestamp so quota eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.disk_path:
+            return
+
+        path = self._disk_file(key)
+        if os.path.exists(path):
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        # Atomic so concurrent workers never read a partial file
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data)
+            over_quota = self._disk_bytes > self.disk_max_bytes
+
+        if over_quota:
+            self.evict_disk()
+
+    def _scan_disk_bytes(self):
+        return sum(size for _, size, _ in self._iter_disk_files())
+
+    def _iter_disk_files(self):
+        for root, _, files in os.walk(self.disk_path):
+            for name in files:
+                if not name.endswith('.png'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict_disk(self):
+        """Delete the least recently used disk entries until the tier is at 90% of its quota"""
+        if not self.disk_path:
+            return
+
+        files = sorted(self._iter_disk_files(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in files)
+        target = self.disk_max_bytes * 0.9
+
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,149 @@
+# Generated output files written straight into the site's files folder, and
+# internal working files kept next to them.
+#
+# Outputs are written to a temporary file in the folder they end up in, then
+# hashed: when a File with the same content already exists, that file is
+# reused and the new copy removed, otherwise the file is renamed into place.
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import cint, get_site_path
+
+
+def get_files_folder(is_private=0):
+    """The site's public or private files folder"""
+    folder = os.path.abspath(get_site_path("private" if cint(is_private) else "public", "files"))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def get_file_url_path(file_url):
+    """Path on disk of a /files/ or /private/files/ URL"""
+    if file_url.startswith("/private/"):
+        return os.path.abspath(get_site_path(file_url.lstrip("/")))
+    return os.path.abspath(get_site_path("public", file_url.lstrip("/")))
+
+
+def get_output_path(file_name, is_private=0):
+    """Absolute path and file URL for a new output file, never overwriting an existing one"""
+    is_private = cint(is_private)
+    folder = get_files_folder(is_private)
+
+    base, ext = os.path.splitext(file_name)
+    candidate = file_name
+    while os.path.exists(os.path.join(folder, candidate)):
+        candidate = f"{base}_{frappe.generate_hash(length=6)}{ext}"
+
+    file_url = f"/private/files/{candidate}" if is_private else f"/files/{candidate}"
+    return os.path.join(folder, candidate), file_url
+
+
+def attach_output_file(doc, file_url, is_private=0, content_hash=None):
+    """Register a file already written to disk as a File attached to doc"""
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": os.path.basename(file_url),
+        "file_url": file_url,
+        "attached_to_doctype": doc.doctype,
+        "attached_to_name": doc.name,
+        "is_private": cint(is_private),
+        # Saves File from reading the whole file back to hash it
+        "content_hash": content_hash
+    })
+    file_doc.insert(ignore_permissions=True)
+    return file_doc
+
+
+def get_temp_output_path(file_name, is_private=0):
+    """New temporary file in the folder file_name will be stored in, for store_output_file"""
+    fd, path = tempfile.mkstemp(dir=get_files_folder(is_private), prefix=".barcodes_", suffix=os.path.splitext(file_name)[1] + ".tmp")
+    os.close(fd)
+    return path
+
+
+@contextmanager
+def temp_output_file(file_name, is_private=0):
+    """Temporary output path that is removed again if writing it fails"""
+    path = get_temp_output_path(file_name, is_private)
+    try:
+        yield path
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+
+def store_output_file(doc, temp_path, file_name, is_private=0):
+    """File attached to doc for the finished output at temp_path, reusing a stored file with the same content.
+
+    temp_path is renamed to a free name based on file_name, or removed when
+    an earlier output of this DocType has the same bytes.
+    """
+    is_private = cint(is_private)
+    content_hash = get_file_hash(temp_path)
+
+    existing = find_output_file(doc, content_hash, is_private)
+    if existing:
+        os.remove(temp_path)
+        if existing.attached_to_name == doc.name:
+            return frappe.get_doc("File", existing.name)
+        # Another document's identical output: share its file on disk
+        return attach_output_file(doc, existing.file_url, is_private, content_hash)
+
+    path, file_url = get_output_path(file_name, is_private)
+    os.replace(temp_path, path)
+    return attach_output_file(doc, file_url, is_private, content_hash)
+
+
+def find_output_file(doc, content_hash, is_private):
+    """Stored output of doc's DocType with the given content hash whose file still exists, preferring doc's own"""
+    files = frappe.get_all(
+        "File",
+        filters={"content_hash": content_hash, "is_private": is_private, "attached_to_doctype": doc.doctype},
+        fields=["name", "file_url", "attached_to_name"],
+        order_by="creation desc"
+    )
+    files.sort(key=lambda f: f.attached_to_name != doc.name)
+    for file in files:
+        if os.path.exists(get_file_url_path(file.file_url)):
+            return file
+    return None
+
+
+def get_file_hash(path):
+    """MD5 of a file's content, the hash File keeps in content_hash"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_work_path(folder, file_name):
+    """Path of an internal working file under private/files/<folder>; not registered as a File"""
+    directory = os.path.abspath(get_site_path("private", "files", folder))
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, file_name)
+
+
+def write_json_gz(path, data):
+    """Write data as gzipped JSON, replacing path atomically"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def read_json_gz(path, default=None):
+    """Read gzipped JSON written by write_json_gz; default when missing or unreadable"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
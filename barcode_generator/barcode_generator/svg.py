@@ -0,0 +1,160 @@
+# SVG labels built from encoded module patterns.
+#
+# The layout matches vector.py: item name band on top, code text band at the
+# bottom and the symbol in between. All bars of a symbol go into a single
+# path in module units, one "M x y h w v 1 h -w z" segment per run of adjacent
+# dark modules, scaled into place by a transform, so a linear label is about a
+# kilobyte and needs no rasterising. Identical consecutive module rows (PDF417
+# rows are several modules high) share one taller segment.
+#
+# A batch is written as a ZIP streamed to disk, one SVG per row plus a
+# manifest, without holding more than one label in memory.
+
+import json
+import re
+import zipfile
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from barcode_generator.barcode_generator.symbology import LINEAR, LINEAR_QUIET_ZONE, encode_symbol, iter_runs
+from barcode_generator.barcode_generator.vector import (
+    CODE_TEXT_BAND,
+    ITEM_NAME_BAND,
+    ITEM_NAME_FONT,
+    TEXT_FONT,
+)
+from barcode_generator.barcode_generator.volumes import MANIFEST_NAME, zip_entry
+
+SVG_CONTENT_TYPE = "image/svg+xml"
+
+# Rows written between progress callbacks
+PROGRESS_INTERVAL = 100
+
+# Characters kept from a code in its file name
+_FILE_NAME_UNSAFE = re.compile(r'[^A-Za-z0-9._-]+')
+MAX_FILE_NAME_CODE = 40
+
+# Generic fallbacks for the PDF base fonts the bands are measured with
+FONT_FAMILIES = {
+    "Helvetica": "Helvetica, Arial, sans-serif",
+    "Helvetica-Bold": "Helvetica, Arial, sans-serif",
+}
+
+
+def write_svg_archive(path, config, layout, codes, on_error=None, on_progress=None):
+    """Write one SVG per (item_name, code, qty) row into a ZIP at path; returns the labels it holds.
+
+    Rows that cannot be encoded are left out and reported through on_error.
+    The manifest lists each file with its item name, code and copies.
+    """
+    files = []
+    labels = 0
+    with zipfile.ZipFile(path, 'w', allowZip64=True) as archive:
+        for row_no, (item_name, code_text, qty) in enumerate(codes, 1):
+            try:
+                symbol = encode_symbol(config.barcode_type, code_text)
+            except Exception as e:
+                if on_error:
+                    on_error(f"Error generating barcode for {code_text}: {e}")
+            else:
+                file_name = svg_file_name(row_no, code_text)
+                svg = symbol_svg(config, symbol, item_name, layout.barcode_width, layout.barcode_height)
+                archive.writestr(zip_entry(file_name, zipfile.ZIP_DEFLATED), svg)
+                files.append({"file": file_name, "item_name": item_name, "code": code_text, "qty": qty})
+                labels += qty
+            if on_progress and row_no % PROGRESS_INTERVAL == 0:
+                on_progress(labels)
+
+        manifest = {"barcode_type": config.barcode_type, "total_labels": labels, "files": files}
+        archive.writestr(zip_entry(MANIFEST_NAME, zipfile.ZIP_DEFLATED), json.dumps(manifest, indent=1))
+    if on_progress:
+        on_progress(labels)
+    return labels
+
+
+def svg_file_name(row_no, code_text):
+    """Archive member name for a row: its position, so names stay unique, and the code"""
+    code = _FILE_NAME_UNSAFE.sub('_', str(code_text))[:MAX_FILE_NAME_CODE]
+    return f"{row_no:06d}_{code}.svg"
+
+
+def symbol_svg(config, symbol, item_name, width, height):
+    """SVG document for symbol with its item name and code text, in a width x height point box"""
+    parts = []
+    top = 0
+    bottom = height
+
+    if item_name and item_name.strip():
+        band = height * ITEM_NAME_BAND
+        max_chars = 25 if config.is_thermal else 35
+        display_name = item_name[:max_chars] + "..." if len(item_name) > max_chars else item_name
+        parts.append(_text(display_name, ITEM_NAME_FONT, width, top, band))
+        top += band
+
+    if config.include_text:
+        band = height * CODE_TEXT_BAND
+        parts.append(_text(symbol.text, TEXT_FONT, width, bottom - band, band))
+        bottom -= band
+
+    if symbol.kind == LINEAR:
+        parts.append(_linear_path(symbol.rows[0], width, top, bottom - top))
+    else:
+        parts.append(_matrix_path(symbol.rows, width, top, bottom - top))
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}pt" height="{_num(height)}pt" '
+        f'viewBox="0 0 {_num(width)} {_num(height)}">'
+        f'<rect width="100%" height="100%" fill="#fff"/>{"".join(parts)}</svg>'
+    )
+
+
+def _linear_path(modules, width, y, height):
+    """All bars as one path, one module wide and one unit high per step before scaling"""
+    module_width = width / (len(modules) + 2 * LINEAR_QUIET_ZONE)
+    segments = "".join(f"M{start} 0h{length}v1h-{length}z" for start, length in iter_runs(modules))
+    return (
+        f'<path transform="translate({_num(LINEAR_QUIET_ZONE * module_width)} {_num(y)}) '
+        f'scale({_num(module_width, 4)} {_num(height)})" d="{segments}" shape-rendering="crispEdges"/>'
+    )
+
+
+def _matrix_path(rows, width, y, height):
+    """Square modules, centred in the box, one segment per horizontal run of each band of equal rows"""
+    module_size = min(width / len(rows[0]), height / len(rows))
+    left = (width - module_size * len(rows[0])) / 2
+    top = y + (height - module_size * len(rows)) / 2
+
+    segments = []
+    row_index = 0
+    for row, band in groupby(rows):
+        band_height = sum(1 for _ in band)
+        segments.extend(
+            f"M{start} {row_index}h{length}v{band_height}h-{length}z" for start, length in iter_runs(row)
+        )
+        row_index += band_height
+    segments = "".join(segments)
+    return (
+        f'<path transform="translate({_num(left)} {_num(top)}) scale({_num(module_size, 4)})" '
+        f'd="{segments}" shape-rendering="crispEdges"/>'
+    )
+
+
+def _text(text, font, width, y, band):
+    """Text centred in a band, shrunk until it fits the width"""
+    font_size = band * 0.8
+    text_width = stringWidth(text, font, font_size)
+    if text_width > width:
+        font_size *= width / text_width
+    baseline = y + band - (band - font_size) / 2 - font_size * 0.15
+    weight = ' font-weight="bold"' if font.endswith("-Bold") else ""
+    return (
+        f'<text x="{_num(width / 2)}" y="{_num(baseline)}" font-family="{FONT_FAMILIES[font]}"{weight} '
+        f'font-size="{_num(font_size)}" text-anchor="middle">{escape(text)}</text>'
+    )
+
+
+def _num(value, places=2):
+    """Shortest decimal form of value to the given places"""
+    return f"{value:.{places}f}".rstrip("0").rstrip(".")
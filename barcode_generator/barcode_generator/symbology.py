@@ -0,0 +1,120 @@
+# Module patterns for each supported symbology.
+#
+# A symbol is the bare bar/module layout of a code, independent of how it is
+# drawn, so the same encoding can feed the vector (ReportLab) and raster paths.
+
+import math
+import re
+from dataclasses import dataclass
+from functools import cache
+
+import barcode
+
+from barcode_generator.barcode_generator.datamatrix import encode_datamatrix
+
+# Try to import pdf417gen, PDF417 codes report an error without it
+try:
+    import pdf417gen
+    HAS_PDF417 = True
+except ImportError:
+    HAS_PDF417 = False
+
+LINEAR = 'linear'
+MATRIX = 'matrix'
+
+# Map barcode types
+LINEAR_CLASSES = {
+    'Code128': barcode.Code128,
+    'Code39': barcode.Code39,
+    'EAN13': barcode.EAN13,
+    'EAN8': barcode.EAN8,
+    'UPC-A': barcode.UPCA,
+    'ITF': barcode.ITF,
+}
+
+MATRIX_TYPES = ('DataMatrix', 'PDF417')
+
+_NON_SPACE = re.compile(r'[^0]')
+_BAR_RUN = re.compile(r'1+')
+
+# Quiet zone on each side of a linear symbol, in modules
+LINEAR_QUIET_ZONE = 10
+
+# PDF417 rows are drawn three modules high, the usual row height
+PDF417_ROW_HEIGHT = 3
+PDF417_QUIET_ZONE = 2
+PDF417_SECURITY_LEVEL = 2
+PDF417_MAX_COLUMNS = 30
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """Encoded barcode.
+
+    For linear symbols rows holds a single string of '1' (bar) and '0' (space)
+    modules; for matrix symbols it holds one such string per module row.
+    """
+    kind: str
+    rows: tuple
+    text: str
+
+    @property
+    def columns(self):
+        return len(self.rows[0]) if self.rows else 0
+
+
+def encode_symbol(barcode_type, code_text):
+    """Encode code_text into a Symbol, raising on invalid input"""
+    code_text = str(code_text)
+
+    if barcode_type in LINEAR_CLASSES:
+        code_obj = LINEAR_CLASSES[barcode_type](code_text)
+        # Guard bars may be marked with 'G'; any non-zero module is a bar
+        modules = _NON_SPACE.sub('1', code_obj.build()[0])
+        return Symbol(LINEAR, (modules,), code_obj.get_fullcode())
+
+    if barcode_type == 'DataMatrix':
+        return Symbol(MATRIX, encode_datamatrix(code_text), code_text)
+
+    if barcode_type == 'PDF417':
+        return Symbol(MATRIX, encode_pdf417(code_text), code_text)
+
+    raise ValueError(f"Unsupported barcode type: {barcode_type}")
+
+
+def encode_pdf417(code_text):
+    """Module rows of a PDF417 symbol, each row repeated to its drawn height, quiet zone included"""
+    if not HAS_PDF417:
+        raise ValueError("PDF417 needs the pdf417gen package")
+
+    codes = pdf417gen.encode(
+        code_text,
+        columns=pdf417_columns(len(code_text)),
+        security_level=PDF417_SECURITY_LEVEL,
+    )
+    quiet = '0' * PDF417_QUIET_ZONE
+    rows = []
+    for row in codes:
+        # Each codeword value spells out its bars and spaces in binary
+        modules = quiet + "".join(format(value, 'b') for value in row) + quiet
+        rows.extend([modules] * PDF417_ROW_HEIGHT)
+
+    blank = ('0' * len(rows[0]),) * PDF417_QUIET_ZONE
+    return blank + tuple(rows) + blank
+
+
+@cache
+def pdf417_columns(length):
+    """Data columns that keep the symbol for a length character payload about twice as wide as tall"""
+    # Roughly two characters per codeword, plus the error correction and length codewords
+    codewords = length / 2 + 2 ** (PDF417_SECURITY_LEVEL + 1) + 1
+    # A symbol is 17 modules per column plus 73 wide, and PDF417_ROW_HEIGHT modules per row tall
+    overhead = 69 + 2 * PDF417_QUIET_ZONE
+    columns = (-overhead + math.sqrt(overhead ** 2 + 8 * 17 * PDF417_ROW_HEIGHT * codewords)) / (2 * 17)
+    return max(1, min(PDF417_MAX_COLUMNS, round(columns)))
+
+
+def iter_runs(modules):
+    """Yield (start, length) for each run of consecutive bar modules"""
+    for match in _BAR_RUN.finditer(modules):
+        yield match.start(), match.end() - match.start()
@@ -0,0 +1,71 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import os
+from unittest import mock
+
+from barcode_generator.barcode_generator import code_store
+from barcode_generator.barcode_generator.code_store import (
+    append_codes,
+    get_keys_path,
+    iter_codes,
+    new_codes,
+    read_keys,
+    read_sample,
+    row_key,
+    write_codes,
+)
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+
+ROWS = [("Widget", "111", 2), ("Pipe, 1/2 in", "0119", 1), ("", "Ünïcode", 3)]
+
+
+class TestCodeStore(TempFolderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.temp_path("codes.jsonl.gz")
+
+    def test_round_trip(self):
+        self.assertEqual(write_codes(self.path, ROWS), (3, 6))
+        self.assertEqual(list(iter_codes(self.path)), ROWS)
+        self.assertEqual(read_sample(self.path, 2), ROWS[:2])
+        self.assertEqual(sorted(os.listdir(self.folder)), ["codes.jsonl.gz", "codes.jsonl.gz.keys"])
+
+    def test_rows_span_blocks(self):
+        rows = [("Item", str(n), 1) for n in range(7)]
+        with mock.patch.object(code_store, "BLOCK_SIZE", 3):
+            self.assertEqual(write_codes(self.path, iter(rows)), (7, 7))
+        self.assertEqual(list(iter_codes(self.path)), rows)
+
+    def test_write_replaces_the_store(self):
+        write_codes(self.path, ROWS)
+        self.assertEqual(write_codes(self.path, ROWS[:1]), (1, 2))
+        self.assertEqual(list(iter_codes(self.path)), ROWS[:1])
+        self.assertEqual(read_keys(self.path), {row_key("Widget", "111")})
+
+    def test_empty_store(self):
+        self.assertEqual(write_codes(self.path, []), (0, 0))
+        self.assertEqual(list(iter_codes(self.path)), [])
+        self.assertEqual(read_keys(self.path), set())
+
+    def test_append(self):
+        write_codes(self.path, ROWS[:2])
+        self.assertEqual(append_codes(self.path, ROWS[2:]), (1, 3))
+        self.assertEqual(list(iter_codes(self.path)), ROWS)
+        self.assertEqual(read_keys(self.path), {row_key(item, code) for item, code, _ in ROWS})
+
+    def test_new_codes(self):
+        write_codes(self.path, ROWS[:2])
+        incoming = [("Widget", "111", 5), ("Widget", "112", 1), ("Gadget", "111", 1), ("Widget", "112", 4)]
+        # Quantity does not make a row new; repeats within the batch are dropped too
+        self.assertEqual(new_codes(self.path, incoming), [("Widget", "112", 1), ("Gadget", "111", 1)])
+
+    def test_keys_without_a_store(self):
+        self.assertEqual(read_keys(self.path), set())
+        self.assertEqual(new_codes(self.path, ROWS), ROWS)
+        self.assertEqual(get_keys_path(self.path), f"{self.path}.keys")
+
+    def test_row_key_separates_fields(self):
+        self.assertNotEqual(row_key("AB", "C"), row_key("A", "BC"))
+        self.assertEqual(row_key("A", "1"), row_key("A", "1"))
+        self.assertLess(row_key("A", "1"), 2 ** 64)
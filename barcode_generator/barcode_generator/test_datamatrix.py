@@ -0,0 +1,87 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+
+from barcode_generator.barcode_generator.datamatrix import (
+    QUIET_ZONE,
+    SYMBOL_SIZES,
+    add_error_correction,
+    encode_ascii,
+    encode_datamatrix,
+    pad_codewords,
+    symbol_size_for,
+)
+
+# ISO/IEC 16022 worked example: "123456" in a 10x10 symbol
+REFERENCE_DATA = [142, 164, 186]
+REFERENCE_CODEWORDS = [142, 164, 186, 114, 25, 5, 88, 102]
+REFERENCE_SYMBOL = (
+    "1010101010",
+    "1100101101",
+    "1100000100",
+    "1100011101",
+    "1100001000",
+    "1000001111",
+    "1110110000",
+    "1111011001",
+    "1001110100",
+    "1111111111",
+)
+
+
+class TestDataMatrix(unittest.TestCase):
+    def test_reference_codewords(self):
+        self.assertEqual(encode_ascii("123456"), REFERENCE_DATA)
+        size = symbol_size_for(len(REFERENCE_DATA))
+        self.assertEqual(size.size, 10)
+        self.assertEqual(add_error_correction(pad_codewords(REFERENCE_DATA, size.data_codewords), size), REFERENCE_CODEWORDS)
+
+    def test_reference_symbol(self):
+        rows = encode_datamatrix("123456")
+        blank = "0" * (10 + 2 * QUIET_ZONE)
+        self.assertEqual(rows[:QUIET_ZONE], (blank,) * QUIET_ZONE)
+        self.assertEqual(rows[-QUIET_ZONE:], (blank,) * QUIET_ZONE)
+        self.assertEqual(tuple(row[QUIET_ZONE:-QUIET_ZONE] for row in rows[QUIET_ZONE:-QUIET_ZONE]), REFERENCE_SYMBOL)
+
+    def test_ascii_encodation(self):
+        # Digit pairs share a codeword; an odd digit out and other characters are value + 1
+        self.assertEqual(encode_ascii("A1B"), [66, 50, 67])
+        self.assertEqual(encode_ascii("12345"), [142, 164, 54])
+        # Latin-1 characters above 127 go through Upper Shift
+        self.assertEqual(encode_ascii("é"), [235, 106])
+        with self.assertRaises(ValueError):
+            encode_ascii("€")
+
+    def test_pad_codewords(self):
+        # First pad is 129, the rest follow the 253-state randomising algorithm
+        self.assertEqual(pad_codewords([66], 3), [66, 129, 70])
+        self.assertEqual(pad_codewords([66, 67, 68], 3), [66, 67, 68])
+
+    def test_symbol_sizes(self):
+        self.assertEqual(symbol_size_for(3).size, 10)
+        self.assertEqual(symbol_size_for(4).size, 12)
+        self.assertEqual(symbol_size_for(1558).size, 144)
+        with self.assertRaises(ValueError):
+            symbol_size_for(1559)
+
+        for size in SYMBOL_SIZES:
+            # Data and error correction fill the mapping area, give or take the unused corner bits
+            capacity = (size.data_codewords + size.ecc_codewords) * 8
+            self.assertLessEqual(capacity, size.mapping_size ** 2)
+            self.assertLess(size.mapping_size ** 2 - capacity, 8)
+
+    def test_finder_pattern(self):
+        for text in ("1", "Hello, World!", "x" * 300):
+            rows = [row[QUIET_ZONE:-QUIET_ZONE] for row in encode_datamatrix(text)[QUIET_ZONE:-QUIET_ZONE]]
+            size = len(rows)
+            self.assertEqual(size, symbol_size_for(len(encode_ascii(text))).size)
+            # Solid L on the left and bottom, alternating modules on the top and right
+            self.assertEqual(rows[-1], "1" * size)
+            self.assertTrue(all(row[0] == "1" for row in rows))
+            self.assertEqual(rows[0], "10" * (size // 2))
+            self.assertEqual("".join(row[-1] for row in rows), "01" * (size // 2))
+
+    def test_long_text(self):
+        with self.assertRaises(ValueError):
+            encode_datamatrix("x" * 1600)
@@ -0,0 +1,93 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+from unittest import mock
+
+from barcode_generator.barcode_generator import importer
+from barcode_generator.barcode_generator.importer import iter_upload_rows, resolve_columns
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+
+
+class TestImporter(TempFolderTestCase):
+    def write_csv(self, text):
+        path = self.temp_path("codes.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def write_xlsx(self, rows):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        path = self.temp_path("codes.xlsx")
+        workbook.save(path)
+        return path
+
+    def read(self, path, **kwargs):
+        """Rows with and without pandas, which must agree"""
+        rows = [row for chunk in iter_upload_rows(path, **kwargs) for row in chunk]
+        with mock.patch.object(importer, "HAS_PANDAS", False):
+            plain = [row for chunk in iter_upload_rows(path, **kwargs) for row in chunk]
+        self.assertEqual(rows, plain)
+        return rows
+
+    def test_commas_stay_inside_columns(self):
+        path = self.write_csv('Item Name,Barcode,Qty\n"Pipe, 1/2 in",0119,\n"Bolt, M8","10,55",2\n')
+        self.assertEqual(self.read(path), [("Pipe, 1/2 in", "0119", 1), ("Bolt, M8", "10,55", 2)])
+
+    def test_quantity_column(self):
+        path = self.write_csv("Item Name,Barcode,Copies\nA,111,3\nB,222,0\nC,333,x\nD,444,20000\n")
+        self.assertEqual(self.read(path), [("A", "111", 3), ("C", "333", 1), ("D", "444", 9999)])
+
+    def test_ragged_rows(self):
+        # A short first row must not narrow the columns of the rows after it
+        path = self.write_csv("Item,Barcode,Qty\nA,111\nB,222,3\nC,333,2\n")
+        self.assertEqual(self.read(path), [("A", "111", 1), ("B", "222", 3), ("C", "333", 2)])
+
+    def test_wide_rows_are_reported(self):
+        path = self.write_csv('Item,Barcode\nA,111\nB,222,extra\n"C\nD",333\nE,444,x,y\n')
+        for has_pandas in {importer.HAS_PANDAS, False}:
+            bad_lines = []
+            with mock.patch.object(importer, "HAS_PANDAS", has_pandas):
+                rows = [row for chunk in iter_upload_rows(path, on_bad_line=bad_lines.append) for row in chunk]
+            self.assertEqual(rows, [("A", "111", 1), ("C\nD", "333", 1)])
+            # Physical line numbers, counting the quoted line break
+            self.assertEqual(bad_lines, [3, 6])
+
+    def test_drops_blank_and_repeated_rows(self):
+        path = self.write_csv("Item Name,Barcode\nA,111\nB,\nA,111\nB,111\n")
+        self.assertEqual(self.read(path, chunk_size=2), [("A", "111", 1), ("B", "111", 1)])
+
+    def test_columns_by_name(self):
+        path = self.write_csv("Code;SKU;Name\n111;S1;Widget\n222;S2;Gadget\n")
+        rows = self.read(path, item_column="name", barcode_column="Code")
+        self.assertEqual(rows, [("Widget", "111", 1), ("Gadget", "222", 1)])
+
+    def test_single_column_is_the_barcode(self):
+        path = self.write_csv("Barcode\n111\n222\n")
+        self.assertEqual(self.read(path), [("", "111", 1), ("", "222", 1)])
+
+    def test_resolve_columns(self):
+        self.assertEqual(resolve_columns(["Item", "Barcode", "Qty"]), (0, 1, 2))
+        self.assertEqual(resolve_columns(["Barcode"]), (None, 0, None))
+        with self.assertRaises(ValueError):
+            resolve_columns(["Item", "Barcode"], barcode_column="EAN")
+        with self.assertRaises(ValueError):
+            resolve_columns(["Item", "Barcode"], item_column="Item", barcode_column="item")
+
+    @unittest.skipUnless(importer.HAS_OPENPYXL, "openpyxl is not installed")
+    def test_xlsx_numbers_with_blank_cells(self):
+        path = self.write_xlsx([
+            ["Item Name", "Barcode", "Qty"],
+            ["Pipe, 1/2 in", 123456, None],
+            ["Nut", 789012.0, 3],
+            ["Bolt", None, 2],
+            ["Price tag", 12.5, None],
+        ])
+        self.assertEqual(
+            self.read(path),
+            [("Pipe, 1/2 in", "123456", 1), ("Nut", "789012", 3), ("Price tag", "12.5", 1)]
+        )
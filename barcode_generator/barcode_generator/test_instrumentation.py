@@ -0,0 +1,97 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+from unittest import mock
+
+from barcode_generator.barcode_generator import instrumentation
+from barcode_generator.barcode_generator.instrumentation import RunMetrics
+
+
+class FakeClock:
+    """Stand-in for the time module whose perf_counter only moves when told to"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestRunMetrics(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(instrumentation, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.metrics = RunMetrics()
+
+    def test_stages(self):
+        with self.metrics.stage("parse"):
+            self.clock.advance(2)
+        with self.metrics.stage("save"):
+            self.clock.advance(0.5)
+        with self.metrics.stage("parse"):
+            self.clock.advance(1)
+        self.clock.advance(0.25)
+
+        self.assertEqual(self.metrics.stages, {"parse": 3, "save": 0.5})
+        self.assertEqual(self.metrics.total_seconds, 3.75)
+
+    def test_nested_stages_are_exclusive(self):
+        with self.metrics.stage("draw"):
+            self.clock.advance(1)
+            with self.metrics.stage("save"):
+                self.clock.advance(4)
+            self.clock.advance(2)
+
+        # The outer stage's clock pauses while the inner one runs
+        self.assertEqual(self.metrics.stages, {"draw": 3, "save": 4})
+        self.assertEqual(sum(self.metrics.stages.values()), self.metrics.total_seconds)
+
+    def test_stage_ends_on_error(self):
+        with self.assertRaises(ValueError), self.metrics.stage("validate"):
+            self.clock.advance(1)
+            raise ValueError
+        with self.metrics.stage("save"):
+            self.clock.advance(1)
+        self.assertEqual(self.metrics.stages, {"validate": 1, "save": 1})
+
+    def test_timed_iterator(self):
+        def labels():
+            for label in range(3):
+                self.clock.advance(1)
+                yield label
+
+        with self.metrics.stage("draw"):
+            for _ in self.metrics.timed("render", labels()):
+                self.clock.advance(0.5)
+
+        # Producing each label is charged to render, the loop body to draw
+        self.assertEqual(self.metrics.stages, {"render": 3, "draw": 1.5})
+
+    def test_counters_and_worker_time(self):
+        self.metrics.count("codes", 10)
+        self.metrics.count("reused")
+        self.metrics.count("codes", 5)
+        self.metrics.add_worker_time("render", 1.5)
+        self.metrics.add_worker_time("render", 2.25)
+
+        self.assertEqual(self.metrics.counters, {"codes": 15, "reused": 1})
+        self.assertEqual(self.metrics.worker_seconds, {"render": 3.75})
+
+    def test_as_dict(self):
+        with self.metrics.stage("parse"):
+            self.clock.advance(1 / 3)
+        self.metrics.count("codes", 2)
+        self.metrics.add_worker_time("render", 0.123456)
+
+        self.assertEqual(self.metrics.as_dict(), {
+            "total_seconds": 0.3333,
+            "stages": {"parse": 0.3333},
+            "worker_seconds": {"render": 0.1235},
+            "counters": {"codes": 2},
+        })
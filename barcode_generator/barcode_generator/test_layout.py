@@ -0,0 +1,39 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+
+from reportlab.lib.units import mm
+
+from barcode_generator.barcode_generator.layout import MIN_COLUMN_WIDTH, SHEET_TEMPLATES, compute_layout
+
+
+class TestLayout(unittest.TestCase):
+    def test_slots(self):
+        layout = compute_layout("A4", 50, 15, 3, 24)
+        self.assertEqual(len(layout.slots), layout.codes_per_page)
+        self.assertEqual(layout.codes_per_row, 3)
+        # Slots run left to right, then down the page
+        (x0, y0), (x1, y1), (x3, y3) = layout.slots[0], layout.slots[1], layout.slots[3]
+        self.assertAlmostEqual(x1 - x0, layout.x_spacing)
+        self.assertEqual((y0, x3), (y1, x0))
+        self.assertLess(y3, y0)
+
+    def test_sheet_and_thermal(self):
+        sheet = SHEET_TEMPLATES["Avery L7160"]
+        self.assertEqual(compute_layout("Avery L7160").codes_per_page, sheet.columns * sheet.rows)
+        self.assertEqual(compute_layout("50x25mm Label", codes_per_row=5).slots, ((0, 0),))
+
+    def test_columns_must_fit_the_page(self):
+        # 180 mm between the A4 margins
+        self.assertEqual(compute_layout("A4", codes_per_row=18).codes_per_row, 18)
+        self.assertGreaterEqual(compute_layout("A4", codes_per_row=18).x_spacing, MIN_COLUMN_WIDTH * mm)
+        with self.assertRaises(ValueError):
+            compute_layout("A4", codes_per_row=19)
+        with self.assertRaises(ValueError):
+            compute_layout("A4", codes_per_row=10 ** 7)
+
+    def test_negative_dimensions(self):
+        for kwargs in ({"barcode_width": -1}, {"barcode_height": -5}, {"codes_per_row": -2}, {"item_name_font_size": -1}):
+            with self.assertRaises(ValueError):
+                compute_layout("A4", **kwargs)
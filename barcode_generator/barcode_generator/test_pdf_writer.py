@@ -0,0 +1,83 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import io
+import re
+import unittest
+import zlib
+
+from PIL import Image, ImageDraw
+from reportlab.pdfgen import canvas
+
+from barcode_generator.barcode_generator.layout import compute_layout
+from barcode_generator.barcode_generator.pdf_writer import draw_bilevel_image, place_labels, take_image_bytes
+from barcode_generator.barcode_generator.render import RenderConfig
+
+# Image XObject dictionary followed by the start of its stream, in an uncompressed PDF
+IMAGE_OBJECT = re.compile(rb"<<([^>]*?/Subtype /Image[^>]*?)>>\s*stream\r?\n")
+
+
+def bilevel_image(width, height, bars):
+    img = Image.new("1", (width, height), 1)
+    draw = ImageDraw.Draw(img)
+    for x in bars:
+        draw.rectangle((x, 0, x + 1, height - 1), fill=0)
+    return img
+
+
+def pdf_images(data):
+    """(dictionary, decoded stream) of every image XObject in data"""
+    images = []
+    for match in IMAGE_OBJECT.finditer(data):
+        entry = match.group(1)
+        length = int(re.search(rb"/Length (\d+)", entry).group(1))
+        images.append((entry, zlib.decompress(data[match.end():match.end() + length])))
+    return images
+
+
+class TestBilevelImages(unittest.TestCase):
+    """draw_bilevel_image registers its XObjects through ReportLab internals; these pin the output down"""
+
+    def test_embedded_as_shared_one_bit_flate_images(self):
+        first = bilevel_image(61, 20, range(2, 60, 6))
+        second = bilevel_image(61, 20, range(4, 60, 8))
+
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pageCompression=0, invariant=1)
+        draw_bilevel_image(c, first, 10, 10, 120, 40)
+        draw_bilevel_image(c, first, 10, 60, 120, 40)
+        draw_bilevel_image(c, second, 10, 110, 120, 40)
+        image_bytes = take_image_bytes(c)
+        c.save()
+        data = buffer.getvalue()
+
+        images = pdf_images(data)
+        self.assertEqual(len(images), 2)
+        for entry, _ in images:
+            self.assertIn(b"/BitsPerComponent 1", entry)
+            self.assertIn(b"/ColorSpace /DeviceGray", entry)
+            self.assertIn(b"/Filter [ /FlateDecode ]", entry)
+            self.assertIn(b"/Width 61", entry)
+            self.assertIn(b"/Height 20", entry)
+        self.assertEqual({stream for _, stream in images}, {first.tobytes(), second.tobytes()})
+
+        # Three placements of two images, and the byte count reported for size-capped volumes
+        self.assertEqual(len(re.findall(rb"/FormXob\.\w+ Do", data)), 3)
+        self.assertEqual(image_bytes, sum(len(zlib.compress(img.tobytes(), 6)) for img in (first, second)))
+        self.assertEqual(take_image_bytes(c), 0)
+
+    def test_bilevel_page(self):
+        config = RenderConfig(render_mode="Bilevel")
+        layout = compute_layout("A4", 50, 15, 3, 24)
+        label = bilevel_image(400, 120, range(10, 390, 7))
+        labels = [("Item", "111", label, 2), ("Other", "222", None, 1), ("Item", "333", label, 1)]
+
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=layout.pagesize, pageCompression=0, invariant=1)
+        placed = place_labels(c, config, layout, iter(labels))
+        c.save()
+
+        # The label that failed to encode still takes its slot
+        self.assertEqual(placed, 4)
+        images = pdf_images(buffer.getvalue())
+        self.assertEqual([stream for _, stream in images], [label.tobytes()])
@@ -0,0 +1,104 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+from barcode_generator.barcode_generator.printer_commands import (
+    LabelArea,
+    Placement,
+    _zpl_field,
+    display_name,
+    epl_label,
+    plan_label,
+    printer_data,
+    write_printer_file,
+    zpl_label,
+)
+from barcode_generator.barcode_generator.render import RenderConfig
+from barcode_generator.barcode_generator.symbology import encode_symbol
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+
+# 50 x 30 mm at 203 dpi
+AREA = LabelArea(400, 240, 8)
+
+
+class TestPrinterCommands(TempFolderTestCase):
+    def test_label_area(self):
+        self.assertEqual(LabelArea.from_points((50 / 25.4 * 72, 30 / 25.4 * 72)), AREA)
+        self.assertEqual(LabelArea.from_points((72, 72), dots_per_mm=12).width, 305)
+
+    def test_plan_label(self):
+        config = RenderConfig(barcode_type="EAN13")
+        symbol = encode_symbol("EAN13", "400638133393")
+        self.assertEqual(plan_label(config, AREA, symbol, "Widget"), Placement(12, 24, 57, 44, 152, 3, 204))
+
+        # Without the item name and code text the symbol takes the whole height
+        config = RenderConfig(barcode_type="EAN13", include_text=0)
+        place = plan_label(config, AREA, symbol, " ")
+        self.assertEqual((place.name_height, place.symbol_y, place.symbol_height), (0, 12, 216))
+
+    def test_zpl_label(self):
+        config = RenderConfig(barcode_type="EAN13")
+        lines = zpl_label(config, AREA, "Widget", "400638133393", 3).splitlines()
+        self.assertEqual(lines[:5], ["^XA", "^CI28", "^PW400", "^LL240", "^LH0,0"])
+        self.assertEqual(lines[5], "^FO0,12^FB400,1,0,C,0^A0N,24,24^FH_^FDWidget^FS")
+        self.assertEqual(lines[6], "^BY3,3")
+        # The printer adds the check digit
+        self.assertEqual(lines[7], "^FO57,44^BEN,152,Y,N^FH_^FD400638133393^FS")
+        self.assertEqual(lines[-2:], ["^PQ3,0,1,Y", "^XZ"])
+
+    def test_zpl_matrix_label(self):
+        config = RenderConfig(barcode_type="DataMatrix", include_text=0)
+        label = zpl_label(config, AREA, "", "Hello")
+        self.assertIn("^BXN,", label)
+        self.assertIn("^FH_^FDHello^FS", label)
+        self.assertNotIn("^A0N", label)
+        self.assertTrue(label.endswith("^PQ1,0,1,Y\n^XZ\n"))
+
+    def test_epl_label(self):
+        config = RenderConfig(barcode_type="Code39")
+        lines = epl_label(config, AREA, 'Say "hi"', "abc", 2).splitlines()
+        self.assertEqual(lines[:4], ["", "N", "q400", "Q240,24"])
+        self.assertEqual(lines[4], 'A152,12,0,3,1,1,N,"Say \\"hi\\""')
+        # Narrow bars of 3 dots, wide bars three times that
+        self.assertEqual(lines[5], 'B57,44,0,3C,3,9,152,B,"ABC"')
+        self.assertEqual(lines[-1], "P2")
+
+    def test_zpl_field_escaping(self):
+        self.assertEqual(_zpl_field("A^B~C_D"), "^FH_^FDA_5EB_7EC_5FD^FS")
+        config = RenderConfig(barcode_type="Code128")
+        self.assertIn("^FH_^FDA_5EB^FS", zpl_label(config, AREA, "", "A^B"))
+
+    def test_printer_data(self):
+        self.assertEqual(printer_data(RenderConfig(barcode_type="EAN13"), encode_symbol("EAN13", "4006381333931"), "4006381333931"), "400638133393")
+        # Code 39 is sent without the check character python-barcode adds
+        self.assertEqual(printer_data(RenderConfig(barcode_type="Code39"), encode_symbol("Code39", "abc"), "abc"), "ABC")
+        self.assertEqual(printer_data(RenderConfig(), encode_symbol("Code128", "abc"), "abc"), "abc")
+
+    def test_display_name(self):
+        self.assertEqual(display_name("Widget"), "Widget")
+        self.assertEqual(display_name("x" * 30), "x" * 25 + "...")
+
+    def test_write_printer_file(self):
+        path = self.temp_path("labels.zpl")
+        errors, progress = [], []
+
+        codes = [("A", "400638133393", 2), ("B", "not digits", 1), ("Ünïcode", "4006381333931", 1)]
+        labels = write_printer_file(
+            path, "ZPL", RenderConfig(barcode_type="EAN13"), AREA, codes, on_error=errors.append, on_progress=progress.append
+        )
+
+        self.assertEqual(labels, 3)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("Error generating barcode for not digits"))
+        self.assertEqual(progress, [3])
+        with open(path, encoding="utf-8") as f:
+            data = f.read()
+        self.assertEqual(data.count("^XA"), 2)
+        self.assertIn("^FDÜnïcode^FS", data)
+
+    def test_epl_file_is_latin1(self):
+        path = self.temp_path("labels.epl")
+
+        write_printer_file(path, "EPL", RenderConfig(), AREA, [("Café €", "111", 1)])
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertIn('"Caf\xe9 ?"'.encode("latin-1"), data)
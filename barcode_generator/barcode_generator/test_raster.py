@@ -0,0 +1,143 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from barcode_generator.barcode_generator import render
+from barcode_generator.barcode_generator.raster import (
+    LinearGeometry,
+    _glyph,
+    group_by_length,
+    mm_to_px,
+    paint_code_text,
+    rasterize_linear,
+    rasterize_matrix,
+    to_images,
+)
+from barcode_generator.barcode_generator.render import (
+    THERMAL_PAGE_SIZE,
+    RenderConfig,
+    get_writer_options,
+    make_matrix_barcode,
+    rasterize_linear_codes,
+    render_barcodes,
+    write_linear_barcode,
+)
+from barcode_generator.barcode_generator.symbology import encode_symbol
+
+CODES = ["ABC123", "01192202500026"]
+
+
+def bar_edges(img):
+    """Pixel columns where the middle row of img switches between bars and spaces"""
+    pixels = np.asarray(img.convert("L"))
+    row = pixels[pixels.shape[0] // 2] < 128
+    return np.flatnonzero(np.diff(row.astype(int))) + 1
+
+
+class TestRaster(unittest.TestCase):
+    def test_geometry(self):
+        geometry = LinearGeometry.from_writer_options(get_writer_options(RenderConfig()))
+        # 0.5 mm modules and 6 mm quiet zones at 300 dpi, snapped to whole pixels
+        self.assertEqual((geometry.module, geometry.quiet_zone, geometry.bar_height), (6, 71, 177))
+        self.assertEqual(geometry.size(101), (2 * 71 + 101 * 6, 2 * 12 + 177 + geometry.text_height))
+
+        thermal = LinearGeometry.from_writer_options(get_writer_options(RenderConfig(page_size=THERMAL_PAGE_SIZE)))
+        self.assertEqual(thermal.module, 3)
+
+    def test_rasterize_linear(self):
+        geometry = LinearGeometry(module=2, bar_height=3, quiet_zone=1, margin=1, font_size=0, text_distance=0)
+        pixels = rasterize_linear(["101", "011"], geometry)
+
+        self.assertEqual(pixels.shape, (2, 5, 8))
+        self.assertEqual(pixels[0, 1].tolist(), [255, 0, 0, 255, 255, 0, 0, 255])
+        self.assertEqual(pixels[1, 3].tolist(), [255, 255, 255, 0, 0, 0, 0, 255])
+        # Margins above and below the bars stay white
+        self.assertTrue((pixels[:, 0] == 255).all() and (pixels[:, 4] == 255).all())
+
+    def test_bars_match_image_writer(self):
+        # The same bars as python-barcode's ImageWriter, with every edge moved onto a whole pixel
+        for config in (RenderConfig(include_text=0), RenderConfig(include_text=0, page_size=THERMAL_PAGE_SIZE)):
+            options = get_writer_options(config)
+            geometry = LinearGeometry.from_writer_options(options)
+            for code_text in CODES:
+                img, error = rasterize_linear_codes(config, [code_text])[0]
+                self.assertIsNone(error)
+                reference = write_linear_barcode(config, code_text)
+
+                edges, reference_edges = bar_edges(img), bar_edges(reference)
+                self.assertEqual(len(edges), len(reference_edges))
+                modules, offsets = np.divmod(edges - geometry.quiet_zone, geometry.module)
+                self.assertFalse(offsets.any())
+                reference_modules = (reference_edges - mm_to_px(options["quiet_zone"])) / mm_to_px(options["module_width"])
+                self.assertEqual(modules.tolist(), np.round(reference_modules).astype(int).tolist())
+
+                # Snapping widens the label by at most a pixel per few modules
+                self.assertLess(abs(img.width - reference.width), reference.width * 0.02)
+                self.assertLessEqual(abs(img.height - reference.height), 2)
+
+    def test_code_text_glyph_cache(self):
+        config = RenderConfig()
+        geometry = LinearGeometry.from_writer_options(get_writer_options(config))
+        symbol = encode_symbol("Code128", "1111")
+        pixels = rasterize_linear([symbol.rows[0]], geometry)[0]
+        bars = pixels.copy()
+
+        _glyph.cache_clear()
+        paint_code_text(pixels, "1111", geometry, symbol.columns)
+        # One glyph rasterised, then reused for the other characters
+        self.assertEqual((_glyph.cache_info().misses, _glyph.cache_info().hits), (1, 3))
+
+        # Only the band below the bars is painted, centred under them
+        text_top = geometry.margin + geometry.bar_height
+        self.assertTrue((pixels[:text_top] == bars[:text_top]).all())
+        dark = np.flatnonzero((pixels[text_top:] < 128).any(axis=0))
+        self.assertGreater(len(dark), 0)
+        centre = geometry.quiet_zone + symbol.columns * geometry.module / 2
+        self.assertLess(abs((dark[0] + dark[-1]) / 2 - centre), geometry.font_size / 4)
+
+    def test_to_images(self):
+        pixels = np.full((2, 3, 10), 255, dtype=np.uint8)
+        pixels[:, :, 4] = 0
+        for mode in ("1", "RGB", "L"):
+            images = to_images(pixels, mode)
+            self.assertEqual([(img.mode, img.size) for img in images], [(mode, (10, 3))] * 2)
+            self.assertEqual(images[1].convert("L").getpixel((4, 1)), 0)
+            self.assertEqual(images[1].convert("L").getpixel((5, 1)), 255)
+
+    def test_rasterize_matrix(self):
+        cells = rasterize_matrix(["10", "01"], 3)
+        self.assertEqual(cells.shape, (6, 6))
+        self.assertEqual(cells[0].tolist(), [0, 0, 0, 255, 255, 255])
+        self.assertEqual(cells[5].tolist(), [255, 255, 255, 0, 0, 0])
+
+    def test_group_by_length(self):
+        patterns = ["11", "101", "00", "111", "01"]
+        self.assertEqual(group_by_length(patterns), [[0, 2, 4], [1, 3]])
+        self.assertEqual(group_by_length(patterns, batch_size=2), [[0, 2], [4], [1, 3]])
+
+
+class TestWithoutNumpy(unittest.TestCase):
+    def test_linear_codes_use_image_writer(self):
+        config = RenderConfig(include_text=0)
+        with mock.patch.object(render, "HAS_NUMPY", False), \
+                mock.patch.object(render, "rasterize_linear_codes", side_effect=AssertionError):
+            results = render_barcodes(config, [CODES[0], "\x80 not ascii"])
+
+        img, error = results[0]
+        self.assertIsNone(error)
+        self.assertEqual(img.size, write_linear_barcode(config, CODES[0]).size)
+        self.assertEqual(img.mode, "RGB")
+        self.assertIsNone(results[1][0])
+        self.assertTrue(results[1][1])
+
+    def test_matrix_codes_match_numpy(self):
+        for mode in ("Raster", "Bilevel"):
+            config = RenderConfig(barcode_type="DataMatrix", render_mode=mode)
+            with mock.patch.object(render, "HAS_NUMPY", False):
+                fallback = make_matrix_barcode(config, "Hello")
+            self.assertEqual(fallback.mode, config.image_mode)
+            self.assertEqual(fallback.tobytes(), make_matrix_barcode(config, "Hello").tobytes())
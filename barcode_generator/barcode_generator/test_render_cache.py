@@ -0,0 +1,94 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import os
+
+from PIL import Image
+
+from barcode_generator.barcode_generator.render import RenderConfig
+from barcode_generator.barcode_generator.render_cache import RenderCache, encode_image, render_key
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+
+
+def image(shade):
+    # Flat grey images all encode to the same number of bytes
+    return Image.new("L", (40, 20), 100 + shade)
+
+
+class TestRenderCache(TempFolderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.entry_bytes = len(encode_image(image(0)))
+
+    def test_render_key(self):
+        config = RenderConfig()
+        self.assertEqual(render_key(config, "111", "A"), render_key(RenderConfig(), 111, "A"))
+        self.assertEqual(render_key(config, "111"), render_key(config, "111", None))
+        self.assertNotEqual(render_key(config, "111", "A"), render_key(config, "111", "B"))
+        self.assertNotEqual(render_key(config, "111"), render_key(RenderConfig(render_mode="Bilevel"), "111"))
+
+    def test_round_trip(self):
+        cache = RenderCache(max_bytes=1024 * 1024)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", image(7))
+        self.assertEqual(cache.get("a").tobytes(), image(7).tobytes())
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(max_bytes=self.entry_bytes * 2)
+        cache.put("a", image(1))
+        cache.put("b", image(2))
+        cache.get("a")
+        cache.put("c", image(3))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.stats()["bytes"], self.entry_bytes * 2)
+
+    def test_replacing_an_entry_keeps_the_byte_count(self):
+        cache = RenderCache(max_bytes=self.entry_bytes * 2)
+        cache.put("a", image(1))
+        cache.put("a", image(2))
+        self.assertEqual(cache.stats()["bytes"], self.entry_bytes)
+
+    def test_oversized_entry_is_not_kept_in_memory(self):
+        cache = RenderCache(max_bytes=self.entry_bytes - 1)
+        cache.put("a", image(1))
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_is_shared(self):
+        RenderCache(max_bytes=1024 * 1024, disk_path=self.folder, disk_max_bytes=1024 * 1024).put("ab12", image(5))
+
+        # A second process starts with an empty memory tier
+        cache = RenderCache(max_bytes=1024 * 1024, disk_path=self.folder, disk_max_bytes=1024 * 1024)
+        self.assertEqual(cache.get("ab12").tobytes(), image(5).tobytes())
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+        cache.get("ab12")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_disk_tier_off_without_quota(self):
+        cache = RenderCache(max_bytes=1024 * 1024, disk_path=self.folder, disk_max_bytes=0)
+        cache.put("ab12", image(5))
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_disk_eviction_removes_oldest_first(self):
+        cache = RenderCache(max_bytes=0, disk_path=self.folder, disk_max_bytes=self.entry_bytes * 10)
+        keys = [f"{i:02d}key" for i in range(10)]
+        for age, key in enumerate(keys):
+            cache.put(key, image(age))
+            path = cache._disk_file(key)
+            os.utime(path, (1000 + age, 1000 + age))
+
+        # Reading an entry marks it as recently used
+        self.assertIsNotNone(cache.get(keys[0]))
+
+        # One more entry puts the tier over quota; it is trimmed back to 90%
+        cache.put("10key", image(10))
+        kept = [key for key in [*keys, "10key"] if os.path.exists(cache._disk_file(key))]
+        self.assertEqual(kept, [keys[0], *keys[3:], "10key"])
+        self.assertEqual(cache.stats()["disk_bytes"], self.entry_bytes * 9)
@@ -0,0 +1,105 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+# Runs in a bench (bench run-tests --module barcode_generator.barcode_generator.test_storage):
+# output files go to the test site's files folder and are registered as File records
+
+import hashlib
+import os
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from barcode_generator.barcode_generator.storage import (
+    get_file_hash,
+    get_file_url_path,
+    read_json_gz,
+    store_output_file,
+    temp_output_file,
+    write_json_gz,
+)
+
+
+class TestStorage(FrappeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doc = frappe._dict(doctype="Bulk Barcode Generator", name=f"_Test Storage {frappe.generate_hash(length=8)}")
+
+    def store(self, data, doc=None, file_name="barcodes_test.pdf", is_private=0):
+        with temp_output_file(file_name, is_private) as path:
+            with open(path, "wb") as f:
+                f.write(data)
+            file_doc = store_output_file(doc or self.doc, path, file_name, is_private)
+        self.assertFalse(os.path.exists(path))
+        self.addCleanup(self.remove_file, file_doc.file_url)
+        return file_doc
+
+    def remove_file(self, file_url):
+        path = get_file_url_path(file_url)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def test_store_output_file(self):
+        data = b"%PDF-1.4 labels"
+        file_doc = self.store(data)
+
+        self.assertEqual(file_doc.content_hash, hashlib.md5(data).hexdigest())
+        self.assertEqual((file_doc.attached_to_doctype, file_doc.attached_to_name), (self.doc.doctype, self.doc.name))
+        with open(get_file_url_path(file_doc.file_url), "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_same_content_reuses_the_file(self):
+        first = self.store(b"%PDF-1.4 same labels")
+        second = self.store(b"%PDF-1.4 same labels")
+        self.assertEqual(second.name, first.name)
+
+        # Different bytes get a file of their own, next to the first one
+        third = self.store(b"%PDF-1.4 other labels")
+        self.assertNotEqual(third.file_url, first.file_url)
+        self.assertTrue(os.path.exists(get_file_url_path(first.file_url)))
+
+    def test_other_document_shares_the_file_on_disk(self):
+        first = self.store(b"%PDF-1.4 shared labels")
+        other = frappe._dict(doctype=self.doc.doctype, name=f"{self.doc.name} other")
+        second = self.store(b"%PDF-1.4 shared labels", doc=other)
+
+        self.assertNotEqual(second.name, first.name)
+        self.assertEqual(second.file_url, first.file_url)
+        self.assertEqual(second.attached_to_name, other.name)
+
+    def test_missing_file_is_not_reused(self):
+        first = self.store(b"%PDF-1.4 deleted labels")
+        os.remove(get_file_url_path(first.file_url))
+
+        second = self.store(b"%PDF-1.4 deleted labels")
+        self.assertNotEqual(second.name, first.name)
+        self.assertTrue(os.path.exists(get_file_url_path(second.file_url)))
+
+    def test_private_output(self):
+        file_doc = self.store(b"%PDF-1.4 private labels", is_private=1)
+        self.assertTrue(file_doc.file_url.startswith("/private/files/"))
+        self.assertTrue(file_doc.is_private)
+
+    def test_temp_output_file_cleans_up(self):
+        with self.assertRaises(ValueError):
+            with temp_output_file("barcodes_test.pdf") as path:
+                with open(path, "wb") as f:
+                    f.write(b"partial")
+                raise ValueError("render failed")
+        self.assertFalse(os.path.exists(path))
+
+        # Left in place when writing succeeds, for store_output_file to pick up
+        with temp_output_file("barcodes_test.pdf") as path:
+            pass
+        self.addCleanup(os.remove, path)
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.basename(path).startswith(".barcodes_"))
+
+    def test_file_hash_and_json(self):
+        with temp_output_file("fingerprints.json.gz", 1) as path:
+            self.addCleanup(os.remove, path)
+            write_json_gz(path, ["a", "b"])
+        self.assertEqual(read_json_gz(path), ["a", "b"])
+        self.assertEqual(read_json_gz(f"{path}.missing", default=[]), [])
+        with open(path, "rb") as f:
+            self.assertEqual(get_file_hash(path), hashlib.md5(f.read()).hexdigest())
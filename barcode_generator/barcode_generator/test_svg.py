@@ -0,0 +1,89 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import json
+import zipfile
+from xml.etree import ElementTree
+
+from barcode_generator.barcode_generator.layout import compute_layout
+from barcode_generator.barcode_generator.render import RenderConfig
+from barcode_generator.barcode_generator.svg import svg_file_name, symbol_svg, write_svg_archive
+from barcode_generator.barcode_generator.symbology import encode_symbol
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+from barcode_generator.barcode_generator.volumes import MANIFEST_NAME
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+class TestSvg(TempFolderTestCase):
+    def setUp(self):
+        super().setUp()
+        self.layout = compute_layout("A4", 50, 15, 3, 24)
+
+    def test_linear_symbol(self):
+        config = RenderConfig()
+        svg = ElementTree.fromstring(symbol_svg(config, encode_symbol("Code128", "AB<1>"), "Nuts & Bolts", 120, 60))
+
+        self.assertEqual((svg.get("width"), svg.get("height"), svg.get("viewBox")), ("120pt", "60pt", "0 0 120 60"))
+        texts = [text.text for text in svg.iter(f"{SVG}text")]
+        self.assertEqual(texts, ["Nuts & Bolts", "AB<1>"])
+        paths = list(svg.iter(f"{SVG}path"))
+        self.assertEqual(len(paths), 1)
+        # One segment per bar, each one module high before scaling
+        self.assertEqual(paths[0].get("d").count("M"), encode_symbol("Code128", "AB<1>").rows[0].count("01") + 1)
+
+    def test_without_bands(self):
+        config = RenderConfig(include_text=0)
+        svg = ElementTree.fromstring(symbol_svg(config, encode_symbol("Code128", "111"), "  ", 120, 60))
+        self.assertEqual(list(svg.iter(f"{SVG}text")), [])
+
+    def test_long_item_name(self):
+        config = RenderConfig()
+        svg = ElementTree.fromstring(symbol_svg(config, encode_symbol("Code128", "111"), "x" * 40, 120, 60))
+        self.assertEqual(next(svg.iter(f"{SVG}text")).text, "x" * 35 + "...")
+
+    def test_matrix_symbol(self):
+        config = RenderConfig(barcode_type="DataMatrix", include_text=0)
+        svg = ElementTree.fromstring(symbol_svg(config, encode_symbol("DataMatrix", "Hello"), "", 100, 60))
+        path = next(svg.iter(f"{SVG}path"))
+        # Square modules, centred horizontally in the box
+        self.assertEqual(path.get("transform"), "translate(20 0) scale(3.75)")
+
+    def test_file_name(self):
+        self.assertEqual(svg_file_name(7, "A/B C"), "000007_A_B_C.svg")
+        self.assertEqual(svg_file_name(1, "../../etc"), "000001_.._.._etc.svg")
+        self.assertEqual(svg_file_name(1, "x" * 60), f"000001_{'x' * 40}.svg")
+
+    def write(self, name, codes, **kwargs):
+        path = self.temp_path(name)
+        labels = write_svg_archive(path, RenderConfig(barcode_type="EAN13"), self.layout, codes, **kwargs)
+        return path, labels
+
+    def test_archive(self):
+        errors, progress = [], []
+        codes = [("A", "4006381333931", 2), ("B", "not digits", 1), ("C", "5901234123457", 1)]
+        path, labels = self.write("labels.zip", codes, on_error=errors.append, on_progress=progress.append)
+
+        self.assertEqual(labels, 3)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(progress, [3])
+        with zipfile.ZipFile(path) as archive:
+            # Skipped rows keep their number out of the file names
+            self.assertEqual(archive.namelist(), ["000001_4006381333931.svg", "000003_5901234123457.svg", MANIFEST_NAME])
+            manifest = json.loads(archive.read(MANIFEST_NAME))
+            ElementTree.fromstring(archive.read("000001_4006381333931.svg"))
+        self.assertEqual(manifest, {
+            "barcode_type": "EAN13",
+            "total_labels": 3,
+            "files": [
+                {"file": "000001_4006381333931.svg", "item_name": "A", "code": "4006381333931", "qty": 2},
+                {"file": "000003_5901234123457.svg", "item_name": "C", "code": "5901234123457", "qty": 1},
+            ],
+        })
+
+    def test_archive_is_deterministic(self):
+        codes = [("A", "4006381333931", 1), ("B", "4006381333931", 3)]
+        first, _ = self.write("first.zip", codes)
+        second, _ = self.write("second.zip", codes)
+        with open(first, "rb") as f, open(second, "rb") as g:
+            self.assertEqual(f.read(), g.read())
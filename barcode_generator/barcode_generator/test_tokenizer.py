@@ -0,0 +1,77 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+
+from barcode_generator.barcode_generator.tokenizer import (
+    ParsedRow,
+    count_rows,
+    iter_rows,
+    parse_fields,
+    parse_line,
+    unique_codes,
+)
+
+
+def rows(text):
+    return [tuple(row) for row in iter_rows(text)]
+
+
+class TestTokenizer(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_line("Widget,111", 1), ParsedRow(1, "Widget", "111", 1))
+        self.assertEqual(parse_line("Widget\t111"), ParsedRow(0, "Widget", "111", 1))
+        self.assertEqual(parse_line("Widget | 111"), ParsedRow(0, "Widget", "111", 1))
+        self.assertEqual(parse_line("Blue Widget 1111"), ParsedRow(0, "Blue Widget", "1111", 1))
+        self.assertEqual(parse_line("111"), ParsedRow(0, "", "111", 1))
+        self.assertEqual(parse_line("Widget,").error, "Missing barcode")
+
+    def test_trailing_number_is_part_of_the_code(self):
+        self.assertEqual(parse_line("Bolt, 10,55"), ParsedRow(0, "Bolt", "10,55", 1))
+        self.assertEqual(parse_line("Bolt,A,1"), ParsedRow(0, "Bolt", "A,1", 1))
+        self.assertEqual(
+            rows("Pipe, 1/2 in\n0119"),
+            [(1, "Pipe", "1/2 in", 1, ""), (2, "", "0119", 1, "")]
+        )
+
+    def test_quantity_header(self):
+        text = "\nItem Name,Barcode,Qty\nPipe, 1/2 in,0119,5\nNut,789012,\nWasher,111\n999\n"
+        self.assertEqual(rows(text), [
+            (3, "Pipe, 1/2 in", "0119", 5, ""),
+            (4, "Nut", "789012", 1, ""),
+            (5, "Washer", "111", 1, ""),
+            (6, "", "999", 1, ""),
+        ])
+        self.assertEqual(count_rows(text), 4)
+
+    def test_quantity_header_uses_its_own_separator(self):
+        text = "Item\tCode\tCopies\nBolt, M8\t10,55\t2\nA\tB\t0\nC\tD\tx"
+        self.assertEqual(rows(text), [
+            (2, "Bolt, M8", "10,55", 2, ""),
+            (3, "A", "B", 0, "Quantity must be between 1 and 9999"),
+            (4, "C", "D", 0, "Invalid quantity"),
+        ])
+
+    def test_header_only_counts_on_the_first_line(self):
+        text = "A,111\nItem,Barcode,Qty"
+        self.assertEqual(rows(text), [(1, "A", "111", 1, ""), (2, "Item", "Barcode,Qty", 1, "")])
+        self.assertEqual(count_rows(text), 2)
+
+    def test_count_rows(self):
+        self.assertEqual(count_rows(""), 0)
+        self.assertEqual(count_rows(None), 0)
+        self.assertEqual(count_rows("a\n\n  \nb\r\nc"), 3)
+
+    def test_parse_fields(self):
+        self.assertEqual(parse_fields(" A, B ", " 1,2 ", "3"), ParsedRow(0, "A, B", "1,2", 3))
+        self.assertEqual(parse_fields(None, 111, None), ParsedRow(0, "", "111", 1))
+        self.assertEqual(parse_fields("A", "1\n2").error, "Line break in item name or barcode")
+        self.assertEqual(parse_fields("A", "1", 10000).error, "Quantity must be between 1 and 9999")
+
+    def test_unique_codes(self):
+        parsed = iter_rows("A,1\nA,1\nB,1\n,\nA,2")
+        self.assertEqual(list(unique_codes(parsed)), [("A", "1", 1), ("B", "1", 1), ("A", "2", 1)])
+
+        seen = set()
+        list(unique_codes(iter_rows("A,1"), seen))
+        self.assertEqual(list(unique_codes(iter_rows("A,1\nC,3"), seen)), [("C", "3", 1)])
@@ -0,0 +1,100 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import unittest
+from unittest import mock
+
+from barcode_generator.barcode_generator import validation
+from barcode_generator.barcode_generator.validation import (
+    MAX_REPORTED_ROWS,
+    ValidationReport,
+    check_codes,
+    check_digits,
+    validate_codes,
+)
+
+# Published example codes with their check digit
+EAN13 = "4006381333931"
+EAN8 = "96385074"
+UPC_A = "036000291452"
+
+
+class TestValidation(unittest.TestCase):
+    def test_check_digits(self):
+        for has_numpy in {validation.HAS_NUMPY, False}:
+            with mock.patch.object(validation, "HAS_NUMPY", has_numpy):
+                self.assertEqual(check_digits([EAN13[:-1], "000000000000"], 12), [1, 0])
+                self.assertEqual(check_digits([EAN8[:-1]], 7), [4])
+                self.assertEqual(check_digits([UPC_A[:-1]], 11), [2])
+                self.assertEqual(check_digits([], 12), [])
+
+    def test_check_digit_codes(self):
+        codes = [EAN13, EAN13[:-1], "4006381333932", "40063813339", "40063813339x"]
+        self.assertEqual(check_codes("EAN13", codes), [
+            (EAN13, None),
+            (EAN13, None),
+            ("4006381333932", "Wrong check digit (should be 1)"),
+            ("40063813339", "Must be 12 or 13 digits"),
+            ("40063813339x", "Digits only"),
+        ])
+        self.assertEqual(check_codes("EAN13", [EAN13[:-1], "1"], add_check_digits=False), [
+            (EAN13[:-1], "Missing check digit"),
+            ("1", "Must be 13 digits"),
+        ])
+        self.assertEqual(check_codes("EAN8", [EAN8]), [(EAN8, None)])
+        self.assertEqual(check_codes("UPC-A", [UPC_A]), [(UPC_A, None)])
+        # A code stored as a number has lost its leading zero
+        self.assertEqual(check_codes("UPC-A", [int(UPC_A[:-1])]), [("3600029145", "Must be 11 or 12 digits")])
+
+    def test_charsets(self):
+        self.assertEqual(check_codes("Code128", ["ABC-123", "é"]), [("ABC-123", None), ("é", "Only ASCII characters")])
+        self.assertEqual(
+            check_codes("Code39", ["abc 12$", "A_B"]),
+            [("abc 12$", None), ("A_B", "Only letters, digits and - . space $ / + %")]
+        )
+        self.assertEqual(check_codes("ITF", ["1234", "12a4"]), [("1234", None), ("12a4", "Digits only")])
+        self.assertEqual(check_codes("DataMatrix", ["Hello"]), [("Hello", None)])
+        self.assertIsNotNone(check_codes("DataMatrix", ["x" * 1600])[0][1])
+
+    def test_validate_codes(self):
+        rows = [("A", EAN13[:-1], 2), ("B", "4006381333932", 1), ("C", EAN13, 1)]
+        valid, report = validate_codes("EAN13", rows)
+        self.assertEqual(valid, [("A", EAN13, 2), ("C", EAN13, 1)])
+        self.assertEqual((report.checked, report.fixed, report.invalid_count), (3, 1, 1))
+        self.assertEqual(report.rows, [(2, "4006381333932", "Wrong check digit (should be 1)")])
+        self.assertTrue(report)
+
+        # One report collects several batches
+        validate_codes("EAN13", [("D", "1", 1)], report=report)
+        self.assertEqual((report.checked, report.invalid_count), (4, 2))
+
+    def test_empty_report(self):
+        report = ValidationReport()
+        self.assertFalse(report)
+        self.assertEqual(report.summary(), "")
+
+    def test_report_summary(self):
+        report = ValidationReport(checked=MAX_REPORTED_ROWS + 10)
+        for row_no in range(MAX_REPORTED_ROWS + 2):
+            report.add(row_no, "1", f"Wrong check digit (should be {row_no % 10})")
+        report.add(0, "x", "Digits only")
+        report.add_error("Label 3 failed to draw")
+
+        self.assertEqual(len(report.rows), MAX_REPORTED_ROWS)
+        # Reasons are grouped by kind, most frequent first
+        self.assertEqual(report.reasons, {"Wrong check digit": MAX_REPORTED_ROWS + 2, "Digits only": 1})
+        lines = report.summary().split("\n")
+        self.assertEqual(lines[:3], [
+            f"{MAX_REPORTED_ROWS + 3} of {MAX_REPORTED_ROWS + 10} codes are invalid",
+            f"  Wrong check digit: {MAX_REPORTED_ROWS + 2}",
+            "  Digits only: 1",
+        ])
+        self.assertEqual(lines[4], "Row 0: 1 - Wrong check digit (should be 0)")
+        self.assertEqual(lines[-4:], ["... and 3 more", "", "1 errors while generating", "Label 3 failed to draw"])
+
+    def test_report_row_limit(self):
+        # A report sized to its batch lists every invalid row
+        report = ValidationReport(max_rows=MAX_REPORTED_ROWS + 5)
+        validate_codes("EAN13", [("A", "x", 1)] * (MAX_REPORTED_ROWS + 5), report=report)
+        self.assertEqual(len(report.rows), MAX_REPORTED_ROWS + 5)
+        self.assertEqual(report.rows[-1][0], MAX_REPORTED_ROWS + 5)
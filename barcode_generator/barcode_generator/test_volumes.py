@@ -0,0 +1,168 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+import json
+import os
+import zipfile
+from itertools import pairwise
+
+from barcode_generator.barcode_generator.fingerprints import row_fingerprint, row_fingerprints
+from barcode_generator.barcode_generator.layout import compute_layout
+from barcode_generator.barcode_generator.render import RenderConfig
+from barcode_generator.barcode_generator.symbology import encode_symbol
+from barcode_generator.barcode_generator.testing import TempFolderTestCase
+from barcode_generator.barcode_generator.volumes import (
+    MANIFEST_NAME,
+    VolumeWriter,
+    labels_fingerprint,
+    plan_volume_reuse,
+    read_bundle_volumes,
+    write_volume_bundle,
+)
+
+CONFIG = RenderConfig(render_mode="Vector")
+
+
+def vector_labels(codes):
+    return ((item_name, code_text, encode_symbol("Code128", code_text), qty) for item_name, code_text, qty in codes)
+
+
+def volume(first_index, last_index, fingerprint="x"):
+    return {"first_index": first_index, "last_index": last_index, "labels": last_index - first_index + 1,
+            "fingerprint": fingerprint}
+
+
+class TestVolumeBundle(TempFolderTestCase):
+    def setUp(self):
+        super().setUp()
+        # 24 labels per page
+        self.layout = compute_layout("A4", 50, 15, 3, 24)
+        self.codes = [(f"Item {n}", f"CODE{n:03d}", n % 3 + 1) for n in range(50)]
+
+    def test_volumes_roll_over_at_max_pages(self):
+        path = self.temp_path("labels.zip")
+        manifest = write_volume_bundle(
+            path, "labels", CONFIG, self.layout, vector_labels(self.codes), max_pages=2, max_bytes=0,
+            manifest_extra={"document": "BBG-0001"}
+        )
+
+        # 99 labels: two full volumes of 2 pages and one of a single page
+        self.assertEqual(manifest["total_labels"], 99)
+        self.assertEqual([(v["pages"], v["labels"]) for v in manifest["volumes"]], [(2, 48), (2, 48), (1, 3)])
+        with zipfile.ZipFile(path) as bundle:
+            self.assertEqual(bundle.namelist(), ["labels_vol001.pdf", "labels_vol002.pdf", "labels_vol003.pdf", MANIFEST_NAME])
+            self.assertEqual(json.loads(bundle.read(MANIFEST_NAME)), manifest)
+            for volume in manifest["volumes"]:
+                data = bundle.read(volume["file"])
+                self.assertTrue(data.startswith(b"%PDF"))
+                self.assertEqual(len(data), volume["bytes"])
+        self.assertEqual(manifest["document"], "BBG-0001")
+
+    def test_manifest_ranges_match_rows(self):
+        manifest = write_volume_bundle(
+            self.temp_path("labels.zip"), "labels", CONFIG, self.layout, vector_labels(self.codes), max_pages=1, max_bytes=0
+        )
+        placed = [code_text for _, code_text, qty in self.codes for _ in range(qty)]
+        self.assertEqual(manifest["volumes"][0]["first_index"], 1)
+        self.assertEqual(manifest["volumes"][-1]["last_index"], len(placed))
+        for previous, volume in pairwise(manifest["volumes"]):
+            self.assertEqual(volume["first_index"], previous["last_index"] + 1)
+        for volume in manifest["volumes"]:
+            self.assertEqual(volume["labels"], volume["last_index"] - volume["first_index"] + 1)
+            self.assertEqual(volume["first_code"], placed[volume["first_index"] - 1])
+            self.assertEqual(volume["last_code"], placed[volume["last_index"] - 1])
+
+    def test_volumes_roll_over_at_size_limit(self):
+        finished = []
+        writer = VolumeWriter(
+            self.folder, "labels", self.layout.pagesize, max_pages=100, max_bytes=1,
+            on_volume=lambda path, info: finished.append((os.path.getsize(path), dict(info)))
+        )
+        volumes = writer.write(CONFIG, self.layout, vector_labels(self.codes))
+
+        # Every page passes a one byte limit, so each one closes its volume
+        self.assertEqual([v["pages"] for v in volumes], [1, 1, 1, 1, 1])
+        self.assertEqual([info for _, info in finished], volumes)
+        self.assertEqual([size for size, _ in finished], [v["bytes"] for v in volumes])
+
+        # A limit above the estimated size keeps the pages together
+        writer = VolumeWriter(self.folder, "large", self.layout.pagesize, max_pages=100, max_bytes=50 * 1024 * 1024)
+        self.assertEqual([v["pages"] for v in writer.write(CONFIG, self.layout, vector_labels(self.codes))], [5])
+
+    def test_empty_bundle(self):
+        path = self.temp_path("labels.zip")
+        manifest = write_volume_bundle(path, "labels", CONFIG, self.layout, [], max_pages=1, max_bytes=0)
+        self.assertEqual((manifest["total_labels"], manifest["volumes"]), (0, []))
+        with zipfile.ZipFile(path) as bundle:
+            self.assertEqual(bundle.namelist(), [MANIFEST_NAME])
+
+
+class TestVolumeReuse(TempFolderTestCase):
+    def setUp(self):
+        super().setUp()
+        # 24 labels per page
+        self.layout = compute_layout("A4", 50, 15, 3, 24)
+
+    def fingerprint(self, item_name, code_text):
+        return row_fingerprint(CONFIG, code_text, item_name)
+
+    def write(self, name, codes, steps=None, previous_bundle=None):
+        path = self.temp_path(name)
+        write_volume_bundle(
+            path, "labels", CONFIG, self.layout, None if steps else vector_labels(codes), max_pages=1, max_bytes=0,
+            fingerprint=self.fingerprint, steps=steps, previous_bundle=previous_bundle
+        )
+        return path
+
+    def test_plan_splits_rows_around_reused_volumes(self):
+        codes = [("A", "1", 10), ("B", "2", 20), ("C", "3", 18)]
+        fingerprints = ["a", "b", "c"]
+        previous = [
+            volume(1, 24, labels_fingerprint([("a", 10), ("b", 14)])),
+            volume(25, 48, "changed"),
+            volume(49, 72, labels_fingerprint([("c", 24)])),
+        ]
+        steps = plan_volume_reuse(codes, fingerprints, previous, 24)
+        self.assertEqual(steps, [("reuse", previous[0]), ("render", [("B", "2", 6), ("C", "3", 18)])])
+
+    def test_plan_keeps_later_labels_in_place(self):
+        codes = [("A", "1", 24), ("B", "2", 30)]
+        fingerprints = ["a", "b"]
+        # An earlier volume ending mid-page would shift the labels after it
+        previous = [volume(1, 20, labels_fingerprint([("a", 20)])), volume(25, 48, labels_fingerprint([("b", 24)]))]
+        steps = plan_volume_reuse(codes, fingerprints, previous, 24)
+        self.assertEqual(steps, [("render", [("A", "1", 24)]), ("reuse", previous[1]), ("render", [("B", "2", 6)])])
+
+        # The last volume may end anywhere, as long as it ends with the labels
+        previous = [volume(25, 54, labels_fingerprint([("b", 30)]))]
+        self.assertEqual(plan_volume_reuse(codes, fingerprints, previous, 24)[-1], ("reuse", previous[0]))
+        self.assertEqual(plan_volume_reuse([("A", "1", 24), ("B", "2", 31)], fingerprints, previous, 24)[-1][0], "render")
+
+    def test_plan_without_previous_volumes(self):
+        codes = [("A", "1", 2), ("B", "2", 0), ("C", "3", 1)]
+        self.assertEqual(plan_volume_reuse(codes, ["a", "b", "c"], [], 24), [("render", [("A", "1", 2), ("C", "3", 1)])])
+        self.assertEqual(plan_volume_reuse([], [], [], 24), [])
+        # Volumes from bundles written before fingerprints were recorded are never reused
+        self.assertEqual(plan_volume_reuse(codes, ["a", "b", "c"], [volume(1, 3, None)], 24)[0][0], "render")
+
+    def test_unchanged_volumes_are_copied(self):
+        codes = [(f"Item {n}", f"CODE{n:03d}", 2) for n in range(60)]
+        old_path = self.write("old.zip", codes)
+        old_volumes = read_bundle_volumes(old_path)
+        self.assertEqual([v["labels"] for v in old_volumes], [24] * 5)
+
+        # Change one row on the third page
+        codes[30] = ("Item 30", "CHANGED", 2)
+        steps = plan_volume_reuse(codes, row_fingerprints(CONFIG, codes), old_volumes, 24)
+        self.assertEqual([action for action, _ in steps], ["reuse", "reuse", "render", "reuse", "reuse"])
+
+        steps = [(action, vector_labels(part) if action == "render" else part) for action, part in steps]
+        new_path = self.write("new.zip", codes, steps=steps, previous_bundle=old_path)
+        full_path = self.write("full.zip", codes)
+
+        # Same volumes and bytes as generating the whole batch again
+        self.assertEqual(read_bundle_volumes(new_path), read_bundle_volumes(full_path))
+        with zipfile.ZipFile(new_path) as new, zipfile.ZipFile(full_path) as full:
+            self.assertEqual(new.namelist(), full.namelist())
+            for name in full.namelist():
+                self.assertEqual(new.read(name), full.read(name), name)
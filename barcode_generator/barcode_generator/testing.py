@@ -0,0 +1,21 @@
+# Copyright (c) 2025, sammish and Contributors
+# See license.txt
+
+# Shared fixtures for the unit tests of the pure modules next to this file
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TempFolderTestCase(unittest.TestCase):
+    """Test case with a scratch folder of its own, removed after each test"""
+
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+
+    def temp_path(self, name):
+        return os.path.join(self.folder, name)
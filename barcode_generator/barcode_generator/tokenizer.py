@@ -0,0 +1,149 @@
+# Input line tokenizer shared by parse_input_data and preview_codes.
+#
+# Lines are read lazily from the input text and turned into ParsedRow tuples
+# that keep their line number, so callers can stop early and point at the
+# offending line when one cannot be used.
+#
+# Copies are only read when the input starts with a header naming a copies
+# column ("Item Name,Barcode,Qty"): without one, a trailing number after a
+# separator is part of the barcode, as in "Bolt, 10,55".
+
+import io
+import re
+from typing import NamedTuple
+
+# Tried in order; the first one present splits "Item Name<sep>Barcode"
+SEPARATORS = (',', '\t', '|')
+
+# Last word of a space separated "Item Name Barcode" line
+BARCODE_WORD = re.compile(r'^[A-Za-z0-9\-_\.]+$')
+
+# Header names recognised as the copies column
+QUANTITY_HEADERS = ('qty', 'quantity', 'copies')
+
+# Largest copies count a row can ask for
+MAX_QUANTITY = 9999
+
+# Start of every line with something other than whitespace on it
+NON_BLANK_LINE = re.compile(r'^[^\S\n]*\S', re.MULTILINE)
+
+
+class ParsedRow(NamedTuple):
+    line_no: int
+    item_name: str
+    code: str
+    qty: int
+    error: str = ""
+
+
+def iter_rows(text):
+    """Yield a ParsedRow for every non-blank line of text, one line at a time"""
+    quantity_separator = None
+    first = True
+    for line_no, line in enumerate(io.StringIO(text or ""), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if first:
+            first = False
+            quantity_separator = get_quantity_separator(line)
+            if quantity_separator:
+                continue
+        yield parse_line(line, line_no, quantity_separator)
+
+
+def count_rows(text):
+    """Number of rows iter_rows would yield, without parsing them"""
+    text = text or ""
+    count = sum(1 for _ in NON_BLANK_LINE.finditer(text))
+    first = NON_BLANK_LINE.search(text)
+    if first and get_quantity_separator(text[first.start():].split('\n', 1)[0].strip()):
+        count -= 1
+    return count
+
+
+def get_quantity_separator(line):
+    """Separator of an "Item Name<sep>Barcode<sep>Qty" header line, or None if line is not one"""
+    for separator in SEPARATORS:
+        if separator in line:
+            fields = [field.strip().lower() for field in line.split(separator)]
+            if len(fields) == 3 and fields[2] in QUANTITY_HEADERS:
+                return separator
+            return None
+    return None
+
+
+def parse_line(line, line_no=0, quantity_separator=None):
+    """Parse one stripped, non-blank input line.
+
+    Formats: "Item Name,Barcode", "Item Name<tab>Barcode", "Item Name | Barcode",
+    "Item Name Barcode" or just "Barcode". After a header with a copies column,
+    lines are "Item Name<sep>Barcode<sep>Qty" split on the header's separator.
+    """
+    if quantity_separator:
+        return parse_quantity_line(line, line_no, quantity_separator)
+
+    for separator in SEPARATORS:
+        if separator in line:
+            item_name, _, code = line.partition(separator)
+            item_name = item_name.strip()
+            code = code.strip()
+            break
+    else:
+        # Plain text - could be just barcode or "Item Name Barcode"
+        words = line.split()
+        if len(words) >= 2 and len(words[-1]) >= 4 and BARCODE_WORD.match(words[-1]):
+            item_name = ' '.join(words[:-1])
+            code = words[-1]
+        else:
+            item_name = ""
+            code = line
+
+    if not code:
+        return ParsedRow(line_no, item_name, code, 1, "Missing barcode")
+    return ParsedRow(line_no, item_name, code, 1)
+
+
+def parse_quantity_line(line, line_no, separator):
+    """Parse an "Item Name<sep>Barcode<sep>Qty" line; an item name may contain the separator, a blank Qty is 1"""
+    fields = line.rsplit(separator, 2)
+    if len(fields) == 2:
+        fields.append("")
+    elif len(fields) == 1:
+        fields = ["", fields[0], ""]
+    item_name, code, qty = fields
+    return parse_fields(item_name, code, qty.strip(), line_no)
+
+
+def parse_fields(item_name, code, qty=1, line_no=0):
+    """ParsedRow for a row that arrives already split, e.g. through the session API"""
+    item_name = str(item_name).strip() if item_name is not None else ""
+    code = str(code).strip() if code is not None else ""
+
+    try:
+        qty = int(qty) if qty not in (None, "") else 1
+    except (TypeError, ValueError):
+        return ParsedRow(line_no, item_name, code, 0, "Invalid quantity")
+
+    if not code:
+        return ParsedRow(line_no, item_name, code, qty, "Missing barcode")
+    if '\n' in code or '\n' in item_name:
+        return ParsedRow(line_no, item_name, code, qty, "Line break in item name or barcode")
+    if not 0 < qty <= MAX_QUANTITY:
+        return ParsedRow(line_no, item_name, code, qty, f"Quantity must be between 1 and {MAX_QUANTITY}")
+    return ParsedRow(line_no, item_name, code, qty)
+
+
+def unique_codes(rows, seen=None):
+    """Yield usable rows as (item_name, code, qty), keeping the first of each item/code pair.
+
+    Pass the same seen set to continue deduplicating across calls.
+    """
+    seen = set() if seen is None else seen
+    for row in rows:
+        if row.error:
+            continue
+        key = (row.item_name, row.code)
+        if key not in seen:
+            seen.add(key)
+            yield row.item_name, row.code, row.qty
@@ -0,0 +1,189 @@
+# Validation pass run over a whole batch of codes before anything is rendered.
+#
+# Length, character set and check digit rules are applied per symbology, so
+# invalid rows are found up front instead of one exception (and one Error Log
+# insert) at a time while rendering. With NumPy, the check digits of all
+# EAN/UPC codes of one length are computed in a single array operation.
+# Codes entered without their check digit can have it added; codes whose
+# check digit is wrong are rejected, since python-barcode would silently
+# print a different number.
+
+import re
+from dataclasses import dataclass, field
+
+from barcode_generator.barcode_generator.datamatrix import encode_ascii, symbol_size_for
+from barcode_generator.barcode_generator.symbology import encode_symbol
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Data digits before the check digit
+CHECK_DIGIT_TYPES = {'EAN13': 12, 'EAN8': 7, 'UPC-A': 11}
+
+DIGITS = re.compile(r'[0-9]+')
+ASCII = re.compile(r'[\x00-\x7f]+')
+CODE39_CHARS = re.compile(r'[0-9A-Z\-. $/+%]+')
+
+# Invalid rows listed in a report; past this they are only counted
+MAX_REPORTED_ROWS = 1000
+
+
+@dataclass
+class ValidationReport:
+    """Invalid rows and render errors of one run, reported together at the end"""
+    checked: int = 0
+    fixed: int = 0
+    invalid_count: int = 0
+    reasons: dict = field(default_factory=dict)
+    rows: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    error_count: int = 0
+    max_rows: int = MAX_REPORTED_ROWS
+
+    def add(self, row_no, code_text, reason):
+        self.invalid_count += 1
+        # Counted by kind, without per-code details such as the expected check digit
+        kind = reason.split(" (")[0]
+        self.reasons[kind] = self.reasons.get(kind, 0) + 1
+        if len(self.rows) < self.max_rows:
+            self.rows.append((row_no, code_text, reason))
+
+    def add_error(self, message):
+        """Record an error raised while generating, e.g. a label that failed to draw"""
+        self.error_count += 1
+        if len(self.errors) < self.max_rows:
+            self.errors.append(str(message))
+
+    def __bool__(self):
+        return bool(self.invalid_count or self.error_count)
+
+    def summary(self):
+        """Plain text report for the Error Log"""
+        lines = []
+        if self.invalid_count:
+            lines.append(f"{self.invalid_count} of {self.checked} codes are invalid")
+            lines.extend(f"  {reason}: {count}" for reason, count in sorted(self.reasons.items(), key=lambda x: -x[1]))
+            lines.append("")
+            lines.extend(f"Row {row_no}: {code_text} - {reason}" for row_no, code_text, reason in self.rows)
+            if self.invalid_count > len(self.rows):
+                lines.append(f"... and {self.invalid_count - len(self.rows)} more")
+        if self.error_count:
+            if lines:
+                lines.append("")
+            lines.append(f"{self.error_count} errors while generating")
+            lines.extend(self.errors)
+            if self.error_count > len(self.errors):
+                lines.append(f"... and {self.error_count - len(self.errors)} more")
+        return "\n".join(lines)
+
+
+def validate_codes(barcode_type, codes, add_check_digits=True, report=None):
+    """Valid (item_name, code, qty) rows, check digits added where asked, and a report of the rest"""
+    codes = list(codes)
+    report = report if report is not None else ValidationReport()
+    report.checked += len(codes)
+
+    valid = []
+    results = check_codes(barcode_type, [code_text for _, code_text, _ in codes], add_check_digits)
+    for row_no, ((item_name, code_text, qty), (checked_code, reason)) in enumerate(zip(codes, results, strict=True), 1):
+        if reason:
+            report.add(row_no, code_text, reason)
+            continue
+        if checked_code != code_text:
+            report.fixed += 1
+        valid.append((item_name, checked_code, qty))
+    return valid, report
+
+
+def check_codes(barcode_type, code_texts, add_check_digits=True):
+    """(code, None) for each valid code, with a missing check digit added, or (code, reason) for an invalid one"""
+    code_texts = [str(code_text) for code_text in code_texts]
+    if barcode_type in CHECK_DIGIT_TYPES:
+        return _check_digit_codes(code_texts, CHECK_DIGIT_TYPES[barcode_type], add_check_digits)
+
+    check = CHARSET_CHECKS.get(barcode_type, _check_by_encoding)
+    return [(code_text, check(code_text, barcode_type)) for code_text in code_texts]
+
+
+def check_digits(data, data_length):
+    """Modulo 10 check digit of each string of data_length digits, weights 3 and 1 from the right"""
+    if not data:
+        return []
+    weights = [3 if (data_length - i) % 2 else 1 for i in range(data_length)]
+    if HAS_NUMPY:
+        digits = np.frombuffer("".join(data).encode('ascii'), dtype=np.uint8).reshape(len(data), data_length) - 48
+        sums = digits.astype(np.int64) @ np.array(weights, dtype=np.int64)
+        return ((10 - sums % 10) % 10).tolist()
+    return [(10 - sum(int(d) * w for d, w in zip(code, weights, strict=True)) % 10) % 10 for code in data]
+
+
+def _check_digit_codes(code_texts, data_length, add_check_digits):
+    results = [None] * len(code_texts)
+    # Positions of the codes with and without their check digit
+    complete, missing = [], []
+    for index, code_text in enumerate(code_texts):
+        if not DIGITS.fullmatch(code_text):
+            results[index] = (code_text, "Digits only")
+        elif len(code_text) == data_length + 1:
+            complete.append(index)
+        elif len(code_text) == data_length and add_check_digits:
+            missing.append(index)
+        elif len(code_text) == data_length:
+            results[index] = (code_text, "Missing check digit")
+        else:
+            lengths = f"{data_length} or {data_length + 1}" if add_check_digits else f"{data_length + 1}"
+            results[index] = (code_text, f"Must be {lengths} digits")
+
+    expected = check_digits([code_texts[i][:data_length] for i in complete], data_length)
+    for index, digit in zip(complete, expected, strict=True):
+        code_text = code_texts[index]
+        if int(code_text[-1]) == digit:
+            results[index] = (code_text, None)
+        else:
+            results[index] = (code_text, f"Wrong check digit (should be {digit})")
+
+    added = check_digits([code_texts[i] for i in missing], data_length)
+    for index, digit in zip(missing, added, strict=True):
+        results[index] = (f"{code_texts[index]}{digit}", None)
+    return results
+
+
+def _check_code128(code_text, barcode_type):
+    return None if ASCII.fullmatch(code_text) else "Only ASCII characters"
+
+
+def _check_code39(code_text, barcode_type):
+    # python-barcode upper-cases Code 39 input
+    return None if CODE39_CHARS.fullmatch(code_text.upper()) else "Only letters, digits and - . space $ / + %"
+
+
+def _check_itf(code_text, barcode_type):
+    return None if DIGITS.fullmatch(code_text) else "Digits only"
+
+
+def _check_datamatrix(code_text, barcode_type):
+    try:
+        symbol_size_for(len(encode_ascii(code_text)))
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _check_by_encoding(code_text, barcode_type):
+    """Fallback for symbologies without cheap rules: try to encode"""
+    try:
+        encode_symbol(barcode_type, code_text)
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+CHARSET_CHECKS = {
+    'Code128': _check_code128,
+    'Code39': _check_code39,
+    'ITF': _check_itf,
+    'DataMatrix': _check_datamatrix,
+}
@@ -0,0 +1,84 @@
+# Vector label drawing: bars and text go straight onto the ReportLab canvas
+# as filled rectangles and strings, with no intermediate bitmap.
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from barcode_generator.barcode_generator.symbology import LINEAR, LINEAR_QUIET_ZONE, iter_runs
+
+TEXT_FONT = "Helvetica"
+ITEM_NAME_FONT = "Helvetica-Bold"
+
+# Share of the label height used by the item name and the human readable code
+ITEM_NAME_BAND = 0.22
+CODE_TEXT_BAND = 0.18
+
+
+def draw_vector_label(c, config, symbol, item_name, x, y, width, height):
+    """Draw symbol with its item name and code text inside the box at (x, y)"""
+    top = y + height
+    bottom = y
+
+    c.saveState()
+    c.setFillColorRGB(0, 0, 0)
+
+    if item_name and item_name.strip():
+        band = height * ITEM_NAME_BAND
+        max_chars = 25 if config.is_thermal else 35
+        display_name = item_name[:max_chars] + "..." if len(item_name) > max_chars else item_name
+        _draw_centred_text(c, display_name, ITEM_NAME_FONT, x + width / 2, top - band, width, band)
+        top -= band
+
+    if config.include_text:
+        band = height * CODE_TEXT_BAND
+        _draw_centred_text(c, symbol.text, TEXT_FONT, x + width / 2, bottom, width, band)
+        bottom += band
+
+    if symbol.kind == LINEAR:
+        _draw_linear(c, symbol.rows[0], x, bottom, width, top - bottom)
+    else:
+        _draw_matrix(c, symbol.rows, x, bottom, width, top - bottom)
+
+    c.restoreState()
+
+
+def _draw_centred_text(c, text, font, centre_x, y, max_width, band):
+    """Draw text centred in a band, shrinking the font until it fits the width"""
+    font_size = band * 0.8
+    text_width = stringWidth(text, font, font_size)
+    if text_width > max_width:
+        font_size *= max_width / text_width
+
+    c.setFont(font, font_size)
+    c.drawCentredString(centre_x, y + (band - font_size) / 2 + font_size * 0.15, text)
+
+
+def _draw_linear(c, modules, x, y, width, height):
+    """One rectangle per run of adjacent bar modules"""
+    module_width = width / (len(modules) + 2 * LINEAR_QUIET_ZONE)
+    left = x + LINEAR_QUIET_ZONE * module_width
+
+    for start, length in iter_runs(modules):
+        c.rect(left + start * module_width, y, length * module_width, height, stroke=0, fill=1)
+
+
+def _draw_matrix(c, rows, x, y, width, height):
+    """Square modules, centred in the box, one rectangle per horizontal run"""
+    module_size = min(width / len(rows[0]), height / len(rows))
+    left = x + (width - module_size * len(rows[0])) / 2
+    top = y + height - (height - module_size * len(rows)) / 2
+
+    for row_index, row in enumerate(rows):
+        row_y = top - (row_index + 1) * module_size
+        for start, length in iter_runs(row):
+            c.rect(left + start * module_size, row_y, length * module_size, module_size, stroke=0, fill=1)
+
+
+def draw_vector_error(c, code_text, x, y, width, height):
+    """Placeholder for a code that could not be encoded"""
+    c.saveState()
+    c.setStrokeColor('red')
+    c.setFillColor('red')
+    c.rect(x, y, width, height)
+    c.setFont(TEXT_FONT, min(8, height / 3))
+    c.drawString(x + 2, y + height / 2, f"Error: {code_text}"[:30])
+    c.restoreState()
@@ -0,0 +1,282 @@
+# Large-batch output: labels are split into PDF volumes capped by page count
+# and size, and each finished volume is streamed into a ZIP bundle together
+# with a manifest mapping code ranges to volume files.
+#
+# Volumes are written in ReportLab's invariant mode and archive entries carry
+# a fixed timestamp, so the same labels always produce the same bytes and a
+# regenerated bundle can be matched to the stored one by its content hash.
+#
+# Each volume also records a digest of its labels' row fingerprints. When a
+# batch is generated again with the same settings, plan_volume_reuse finds the
+# earlier volumes whose labels are unchanged and in the same place; those are
+# copied from the old bundle as they are and only the labels in between are
+# rendered and drawn.
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from bisect import bisect_right
+
+from reportlab.pdfgen import canvas
+
+from barcode_generator.barcode_generator.pdf_writer import (
+    PROGRESS_INTERVAL,
+    LabelForms,
+    draw_page,
+    estimate_stream_bytes,
+    iter_copies,
+    iter_pages,
+    take_image_bytes,
+)
+
+MANIFEST_NAME = "manifest.json"
+
+# Timestamp of every archive entry
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def zip_entry(name, compress_type=zipfile.ZIP_STORED, file_size=0):
+    """Archive member info with the fixed timestamp"""
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = compress_type
+    info.file_size = file_size
+    return info
+
+
+def read_bundle_volumes(zip_path):
+    """Volume list from the manifest of the bundle at zip_path, or [] when it cannot be read"""
+    try:
+        with zipfile.ZipFile(zip_path) as bundle:
+            return json.loads(bundle.read(MANIFEST_NAME)).get("volumes", [])
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return []
+
+
+def labels_fingerprint(runs):
+    """Digest of a label sequence given as (row fingerprint, copies) runs, as VolumeWriter records it"""
+    digest = hashlib.sha1()
+    for fingerprint, copies in runs:
+        digest.update(f"{fingerprint}\n".encode() * copies)
+    return digest.hexdigest()
+
+
+def plan_volume_reuse(codes, fingerprints, previous_volumes, codes_per_page):
+    """Steps that rebuild a bundle for codes from an earlier bundle's volumes.
+
+    Returns ("reuse", volume) for every earlier volume whose labels are
+    unchanged and start at the same position, and ("render", rows) for the
+    labels in between. fingerprints holds one row fingerprint per code, made
+    the way the earlier volumes recorded theirs. Rows whose copies straddle a
+    step boundary are split between the steps.
+    """
+    # Label offset of each row's first copy
+    starts = []
+    total = 0
+    for _, _, qty in codes:
+        starts.append(total)
+        total += qty
+
+    def rows_between(first, last):
+        """Rows of the labels from offset first up to last, with their copies clipped, and their fingerprints"""
+        rows, runs = [], []
+        index = max(bisect_right(starts, first) - 1, 0)
+        while index < len(codes) and starts[index] < last:
+            item_name, code_text, qty = codes[index]
+            copies = min(starts[index] + qty, last) - max(starts[index], first)
+            if copies > 0:
+                rows.append((item_name, code_text, copies))
+                runs.append((fingerprints[index], copies))
+            index += 1
+        return rows, runs
+
+    steps = []
+    position = 0
+    for volume in previous_volumes:
+        first, last = volume["first_index"] - 1, volume["last_index"]
+        if first < position or last > total or not volume.get("fingerprint"):
+            continue
+        # A volume ending mid-page would move every later label; only the last one may
+        if volume["labels"] % codes_per_page and last != total:
+            continue
+        _, runs = rows_between(first, last)
+        if labels_fingerprint(runs) != volume["fingerprint"]:
+            continue
+
+        if first > position:
+            steps.append(("render", rows_between(position, first)[0]))
+        steps.append(("reuse", volume))
+        position = last
+
+    if position < total:
+        steps.append(("render", rows_between(position, total)[0]))
+    return steps
+
+
+class VolumeWriter:
+    """Writes pages into successive PDF volumes and hands each finished one to on_volume.
+
+    fingerprint(item_name, code) gives a label's row fingerprint; when set,
+    every volume records the digest of its labels' fingerprints.
+    """
+
+    def __init__(self, work_dir, base_name, pagesize, max_pages=500, max_bytes=50 * 1024 * 1024, on_volume=None,
+                 fingerprint=None):
+        self.work_dir = work_dir
+        self.base_name = base_name
+        self.pagesize = pagesize
+        self.max_pages = max(1, max_pages or 1)
+        self.max_bytes = max_bytes or 0
+        self.on_volume = on_volume
+        self.fingerprint = fingerprint
+        self.volumes = []
+        self.placed = 0
+        self._canvas = None
+        self._current = None
+        self._forms = None
+        self._digest = None
+
+    def write(self, config, layout, labels, on_error=None, on_progress=None, template=None):
+        """Place labels across as many volumes as needed, closing the last one, and return the volume list.
+
+        Each call starts a new volume, so write and reuse can be mixed to build one bundle.
+        """
+        for page_labels in iter_pages(iter_copies(labels), layout.codes_per_page):
+            if self._canvas is None:
+                self._open_volume()
+
+            draw_page(self._canvas, config, layout, page_labels, on_error, self._forms, template)
+            self._finish_page(page_labels)
+
+            previous = self.placed
+            self.placed += len(page_labels)
+            if on_progress and self.placed // PROGRESS_INTERVAL != previous // PROGRESS_INTERVAL:
+                on_progress(self.placed)
+
+            current = self._current
+            if current["pages"] >= self.max_pages or (self.max_bytes and current["bytes"] >= self.max_bytes):
+                self._close_volume()
+
+        self._close_volume()
+        return self.volumes
+
+    def reuse(self, source, volume, on_progress=None):
+        """Add an earlier bundle's volume as it is; source is a binary file holding its PDF"""
+        info = dict(volume, file=self._next_file_name(), first_index=self.placed + 1)
+        info["last_index"] = info["first_index"] + info["labels"] - 1
+        path = os.path.join(self.work_dir, info["file"])
+        with open(path, 'wb') as dst:
+            shutil.copyfileobj(source, dst, 1024 * 1024)
+
+        self.placed += info["labels"]
+        self.volumes.append(info)
+        if self.on_volume:
+            self.on_volume(path, info)
+        if on_progress:
+            on_progress(self.placed)
+        return info
+
+    def _next_file_name(self):
+        return f"{self.base_name}_vol{len(self.volumes) + 1:03d}.pdf"
+
+    def _open_volume(self):
+        file_name = self._next_file_name()
+        self._current = {
+            "file": file_name,
+            "path": os.path.join(self.work_dir, file_name),
+            "pages": 0,
+            "labels": 0,
+            "bytes": 0,
+            "first_index": self.placed + 1,
+            "first_code": None,
+            "last_code": None,
+        }
+        self._canvas = canvas.Canvas(self._current["path"], pagesize=self.pagesize, invariant=1)
+        # Forms belong to one document, so each volume defines its own
+        self._forms = LabelForms()
+        self._digest = hashlib.sha1() if self.fingerprint else None
+
+    def _finish_page(self, page_labels):
+        current = self._current
+        current["bytes"] += (
+            estimate_stream_bytes(self._canvas) + take_image_bytes(self._canvas) + self._forms.take_new_bytes()
+        )
+        current["pages"] += 1
+        current["labels"] += len(page_labels)
+        if current["first_code"] is None:
+            current["first_code"] = page_labels[0][1]
+        current["last_code"] = page_labels[-1][1]
+        if self._digest:
+            for label in page_labels:
+                self._digest.update(f"{self.fingerprint(label[0], label[1])}\n".encode())
+        self._canvas.showPage()
+
+    def _close_volume(self):
+        if self._canvas is None:
+            return
+
+        self._canvas.save()
+        current = self._current
+        current["bytes"] = os.path.getsize(current["path"])
+        current["last_index"] = current["first_index"] + current["labels"] - 1
+        if self._digest:
+            current["fingerprint"] = self._digest.hexdigest()
+        self._canvas = None
+        self._current = None
+        self._forms = None
+        self._digest = None
+
+        path = current.pop("path")
+        self.volumes.append(current)
+        if self.on_volume:
+            self.on_volume(path, current)
+
+
+def write_volume_bundle(zip_path, base_name, config, layout, labels, max_pages, max_bytes,
+                        on_error=None, on_progress=None, manifest_extra=None, template=None,
+                        fingerprint=None, steps=None, previous_bundle=None):
+    """Write labels as PDF volumes into a ZIP at zip_path and return the manifest.
+
+    Each volume is added to the archive and deleted as soon as it is closed, so
+    at most one volume exists on disk besides the growing ZIP.
+
+    To build on an earlier bundle, pass steps from plan_volume_reuse instead of
+    labels, with each ("render", rows) step's rows turned into labels, and the
+    earlier bundle's path as previous_bundle to copy reused volumes from.
+    """
+    if steps is None:
+        steps = [("render", labels)]
+
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as bundle, \
+            tempfile.TemporaryDirectory(prefix="barcode_volumes_") as work_dir, \
+            contextlib.ExitStack() as stack:
+
+        def add_volume(path, info):
+            # PDF streams are already compressed; storing avoids a second deflate pass
+            with open(path, 'rb') as src, bundle.open(zip_entry(info["file"], file_size=os.path.getsize(path)), 'w') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.remove(path)
+
+        writer = VolumeWriter(
+            work_dir, base_name, layout.pagesize, max_pages, max_bytes, on_volume=add_volume, fingerprint=fingerprint
+        )
+        previous = None
+        for action, part in steps:
+            if action == "reuse":
+                if previous is None:
+                    previous = stack.enter_context(zipfile.ZipFile(previous_bundle))
+                with previous.open(part["file"]) as source:
+                    writer.reuse(source, part, on_progress=on_progress)
+            else:
+                writer.write(config, layout, part, on_error=on_error, on_progress=on_progress, template=template)
+        volumes = writer.volumes
+
+        manifest = dict(manifest_extra or {})
+        manifest["total_labels"] = sum(volume["labels"] for volume in volumes)
+        manifest["volumes"] = volumes
+        bundle.writestr(zip_entry(MANIFEST_NAME), json.dumps(manifest, indent=1))
+
+    return manifest
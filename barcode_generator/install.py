@@ -6,12 +6,14 @@ import os
 def get_requirements():
     """Get list of required packages"""
     return [
-        "reportlab>=4.0.4",
+        # Bilevel images are registered through ReportLab internals; keep to the tested versions
+        "reportlab>=4.0.4,<5.1",
         "python-barcode>=0.15.1", 
         "Pillow>=10.2.0",
-        "qrcode>=7.4.2",
         "pandas>=1.3.0",
-        "openpyxl>=3.0.0"
+        "openpyxl>=3.0.0",
+        "numpy>=1.21.0",
+        "pdf417gen>=0.7.1"
     ]
 
 def install_dependencies():
@@ -56,7 +58,7 @@ def install_dependencies():
         print(f"❌ Error during dependency installation: {str(e)}")
         # Don't fail the app installation if dependencies fail
         print("💡 You can manually install dependencies using:")
-        print("pip install reportlab>=4.0.4 python-barcode>=0.15.1 Pillow>=10.2.0 qrcode>=7.4.2 pandas>=1.3.0 openpyxl>=3.0.0")
+        print("pip install 'reportlab>=4.0.4,<5.1' python-barcode>=0.15.1 Pillow>=10.2.0 pandas>=1.3.0 openpyxl>=3.0.0 numpy>=1.21.0 pdf417gen>=0.7.1")
 
 def verify_installations():
     """Verify that all packages are properly installed"""
@@ -64,9 +66,10 @@ def verify_installations():
         ("reportlab", "reportlab"),
         ("barcode", "python-barcode"),
         ("PIL", "Pillow"),
-        ("qrcode", "qrcode"),
         ("pandas", "pandas"),
-        ("openpyxl", "openpyxl")
+        ("openpyxl", "openpyxl"),
+        ("numpy", "numpy"),
+        ("pdf417gen", "pdf417gen")
     ]
     
     for import_name, package_name in test_imports:
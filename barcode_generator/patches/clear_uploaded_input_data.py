@@ -0,0 +1,29 @@
+import os
+
+import frappe
+
+
+def execute():
+    """Drop input_data copied from uploaded files where their rows are kept elsewhere.
+
+    input_data is only cleared when the code store of the current upload exists
+    and the uploaded file can still be read; otherwise it may be the last copy
+    of the rows, and the document keeps it.
+    """
+    generators = frappe.get_all(
+        "Bulk Barcode Generator",
+        filters={"upload_file": ["is", "set"], "input_data": ["is", "set"]},
+        pluck="name"
+    )
+    for name in generators:
+        doc = frappe.get_doc("Bulk Barcode Generator", name)
+        if not doc.is_code_store_current() or not upload_file_exists(doc.upload_file):
+            continue
+        doc.db_set("input_data", None, update_modified=False)
+
+
+def upload_file_exists(file_url):
+    file_name = frappe.db.get_value("File", {"file_url": file_url}, "name")
+    if not file_name:
+        return False
+    return os.path.exists(frappe.get_doc("File", file_name).get_full_path())